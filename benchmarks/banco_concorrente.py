@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Vazão de leituras concorrentes no SQLite: modo padrão (rollback journal) contra o
+perfil sqlite de src/config/database.py (WAL, synchronous=NORMAL, mmap, cache).
+
+Várias threads leem páginas da listagem enquanto uma thread grava equivalências
+sem parar. Sem WAL cada commit bloqueia os leitores; com WAL eles seguem lendo.
+
+    python benchmarks/banco_concorrente.py --leitores 8 --segundos 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, insert, select
+
+from src.config.database import executar_pragmas, pragmas_sqlite
+from src.models.equivalencia import db, Equivalencia
+
+
+def _linha(i):
+    return {
+        'disciplina_adm': f'Disciplina ADM {i}', 'codigo_adm': f'ADM{i % 500:04d}', 'ch_adm': '60h',
+        'disciplina_equiv': f'Disciplina {i}', 'codigo_equiv': f'EQV{i:06d}',
+        'curso_equiv': f'Curso {i % 20}', 'ch_equiv': '60h',
+        'justificativa': 'Conteúdo programático equivalente', 'ch_adm_horas': 60, 'ch_equiv_horas': 60,
+    }
+
+
+def criar_engine(caminho, pragmas):
+    engine = create_engine(f'sqlite:///{caminho}', pool_size=32, max_overflow=0)
+    if pragmas:
+        event.listen(engine, 'connect', lambda conexao, registro: executar_pragmas(conexao, pragmas))
+    return engine
+
+
+def medir(engine, linhas, leitores, segundos):
+    db.metadata.create_all(engine, tables=[Equivalencia.__table__])
+    with engine.begin() as conexao:
+        conexao.execute(insert(Equivalencia), [_linha(i) for i in range(linhas)])
+
+    parar = threading.Event()
+    leituras = [0] * leitores
+    escritas = [0]
+    consulta = select(Equivalencia.__table__).order_by(Equivalencia.id).limit(50)
+
+    def ler(indice):
+        with engine.connect() as conexao:
+            while not parar.is_set():
+                conexao.execute(consulta.offset(random.randrange(linhas - 50))).all()
+                conexao.rollback()
+                leituras[indice] += 1
+
+    def escrever():
+        proximo = linhas
+        with engine.connect() as conexao:
+            while not parar.is_set():
+                conexao.execute(insert(Equivalencia), [_linha(proximo + i) for i in range(20)])
+                conexao.commit()
+                proximo += 20
+                escritas[0] += 1
+
+    threads = [threading.Thread(target=ler, args=(i,)) for i in range(leitores)]
+    threads.append(threading.Thread(target=escrever))
+    for thread in threads:
+        thread.start()
+    time.sleep(segundos)
+    parar.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return sum(leituras) / segundos, escritas[0] / segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=20000)
+    parser.add_argument('--leitores', type=int, default=8)
+    parser.add_argument('--segundos', type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        for nome, pragmas in (('padrão', None), ('perfil sqlite', pragmas_sqlite())):
+            engine = criar_engine(os.path.join(diretorio, f'{len(pragmas or ())}.db'), pragmas)
+            leituras, escritas = medir(engine, args.linhas, args.leitores, args.segundos)
+            print(f'{nome:>14}: {leituras:8.0f} leituras/s  {escritas:6.0f} commits/s')
+
+
+if __name__ == '__main__':
+    main()
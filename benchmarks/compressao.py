@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Custo de CPU contra bytes economizados na compressão da listagem de equivalências.
+
+Monta o JSON de GET /api/equivalencias (mesma serialização da rota) para N
+linhas sintéticas e mede, para cada nível de gzip e qualidade de brotli, o
+tempo de compressão e o tamanho final. Ajuda a escolher COMPRESSION_GZIP_LEVEL
+e COMPRESSION_BROTLI_QUALITY.
+
+    python benchmarks/compressao.py --linhas 2000
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _registro(i):
+    return {
+        'id': i + 1,
+        'disciplina_adm': f'Introdução à Administração {i % 40}', 'codigo_adm': f'ADM{i % 500:04d}',
+        'ch_adm': '60h', 'disciplina_equiv': f'Fundamentos de Gestão {i}', 'codigo_equiv': f'EQV{i:06d}',
+        'curso_equiv': f'Curso {i % 20}', 'ch_equiv': '60h',
+        'justificativa': ('Conteúdo programático equivalente, com ementa, objetivos e bibliografia '
+                          f'compatíveis com a disciplina {i % 40} do curso de Administração.'),
+        'data_criacao': '2025-01-15T10:30:00',
+    }
+
+
+def medir(comprimir, corpo, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        comprimido = comprimir(corpo)
+    return (time.perf_counter() - inicio) / repeticoes, len(comprimido)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=2000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    corpo = json.dumps([_registro(i) for i in range(args.linhas)], ensure_ascii=False).encode('utf-8')
+    print(f'corpo original: {len(corpo) / 1024:.0f} KiB ({args.linhas} linhas)\n')
+    print(f'{"codificação":>14}  {"ms":>8}  {"KiB":>8}  {"razão":>6}  {"MiB/s":>7}')
+
+    casos = [(f'gzip {nivel}', lambda c, n=nivel: gzip.compress(c, compresslevel=n, mtime=0))
+             for nivel in (1, 3, 6, 9)]
+    if brotli is not None:
+        casos += [(f'br {qualidade}', lambda c, q=qualidade: brotli.compress(c, quality=q))
+                  for qualidade in (1, 4, 6, 9)]
+    else:
+        print('(pacote brotli não instalado: só gzip)')
+
+    for nome, comprimir in casos:
+        segundos, tamanho = medir(comprimir, corpo, args.repeticoes)
+        print(f'{nome:>14}  {segundos * 1000:8.2f}  {tamanho / 1024:8.1f}  '
+              f'{len(corpo) / tamanho:6.1f}  {len(corpo) / segundos / 2 ** 20:7.0f}')
+
+
+if __name__ == '__main__':
+    main()
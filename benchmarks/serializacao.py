@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Listagem completa: objetos ORM + to_dict() + json do Flask contra tuplas de
+colunas + src.services.serializacao (orjson, se instalado).
+
+Mede separadamente a consulta (incluindo a montagem das linhas) e a
+serialização, para 10 mil e 100 mil equivalências em um SQLite temporário.
+
+    python benchmarks/serializacao.py --linhas 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, undefer
+
+from src.models.equivalencia import db, Equivalencia
+from src.repositories.sqlalchemy import colunas_listagem, dicionarios
+from src.services import serializacao
+from src.services.serializacao import json_bytes
+
+
+def _linha(i):
+    return {
+        'disciplina_adm': f'Introdução à Administração {i % 40}', 'codigo_adm': f'ADM{i % 500:04d}',
+        'ch_adm': '60h', 'disciplina_equiv': f'Fundamentos de Gestão {i}', 'codigo_equiv': f'EQV{i:06d}',
+        'curso_equiv': f'Curso {i % 20}', 'ch_equiv': '60h',
+        'justificativa': 'Conteúdo programático equivalente, com ementa e bibliografia compatíveis.',
+        'ch_adm_horas': 60, 'ch_equiv_horas': 60, 'data_criacao': datetime(2025, 1, 15, 10, 30, i % 60),
+    }
+
+
+def caminho_orm(engine, json_flask):
+    with Session(engine) as sessao:
+        inicio = time.perf_counter()
+        # undefer: sem ele a justificativa (deferred) viria num SELECT por linha
+        consulta = select(Equivalencia).options(undefer(Equivalencia.justificativa))
+        dados = [e.to_dict() for e in sessao.scalars(consulta).all()]
+        meio = time.perf_counter()
+        corpo = json_flask.dumps(dados).encode('utf-8')
+    return meio - inicio, time.perf_counter() - meio, len(corpo)
+
+
+def caminho_tuplas(engine, json_flask):
+    with Session(engine) as sessao:
+        inicio = time.perf_counter()
+        dados = dicionarios(sessao.execute(select(*colunas_listagem())))
+        meio = time.perf_counter()
+        corpo = json_bytes(dados)
+    return meio - inicio, time.perf_counter() - meio, len(corpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    # Mesmo provider JSON do app (chaves ordenadas, ASCII), sem subir o app inteiro
+    json_flask = Flask(__name__).json
+    print(f"orjson: {'sim' if serializacao.orjson is not None else 'não (json da biblioteca padrão)'}\n")
+    print(f'{"linhas":>8}  {"caminho":>12}  {"consulta ms":>11}  {"json ms":>8}  {"total ms":>8}  {"KiB":>7}')
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        for linhas in args.linhas:
+            engine = create_engine(f"sqlite:///{os.path.join(diretorio, f'{linhas}.db')}")
+            db.metadata.create_all(engine, tables=[Equivalencia.__table__])
+            with engine.begin() as conexao:
+                conexao.execute(insert(Equivalencia), [_linha(i) for i in range(linhas)])
+
+            for nome, caminho in (('to_dict', caminho_orm), ('tuplas', caminho_tuplas)):
+                # Melhor de N: descarta o aquecimento do cache de páginas do SQLite
+                consulta, serializacao_, tamanho = min(
+                    (caminho(engine, json_flask) for _ in range(args.repeticoes)), key=lambda t: t[0] + t[1]
+                )
+                print(f'{linhas:>8}  {nome:>12}  {consulta * 1000:11.1f}  {serializacao_ * 1000:8.1f}  '
+                      f'{(consulta + serializacao_) * 1000:8.1f}  {tamanho / 1024:7.0f}')
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Leituras de sessão por segundo: cookie assinado padrão do Flask contra o
+armazém SQLite de src/services/sessoes.py, com e sem o cache LRU na frente.
+
+Cada leitura é um open_session() completo (cookie, assinatura, dados) seguido
+da verificação de admin_id, como nas rotas administrativas.
+
+    python benchmarks/sessoes.py --sessoes 1000 --leituras 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.sessions import SecureCookieSessionInterface
+
+from src.services.sessoes import ArmazemSQLite, CacheSessoes, InterfaceSessoesServidor
+
+
+def criar_cookies(app, interface, sessoes):
+    """Cria as sessões pela própria interface e retorna os valores dos cookies"""
+    cookies = []
+    for i in range(sessoes):
+        with app.test_request_context():
+            sessao = interface.session_class()
+            sessao['admin_id'] = i
+            sessao['admin_username'] = f'admin{i}'
+            resposta = app.response_class()
+            interface.save_session(app, sessao, resposta)
+            cookies.append(resposta.headers['Set-Cookie'].split(';')[0].split('=', 1)[1])
+    return cookies
+
+
+def medir(app, interface, cookies, leituras):
+    requisicoes = []
+    for cookie in random.choices(cookies, k=min(leituras, 5000)):
+        with app.test_request_context(headers={'Cookie': f'session={cookie}'}) as contexto:
+            requisicoes.append(contexto.request)
+            contexto.request.cookies  # interpreta o cabeçalho fora da medição
+
+    inicio = time.perf_counter()
+    for i in range(leituras):
+        sessao = interface.open_session(app, requisicoes[i % len(requisicoes)])
+        assert 'admin_id' in sessao
+    return leituras / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessoes', type=int, default=1000)
+    parser.add_argument('--leituras', type=int, default=100000)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.secret_key = 'benchmark'
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazem = ArmazemSQLite(os.path.join(diretorio, 'sessoes.db'))
+        casos = [
+            ('cookie assinado', SecureCookieSessionInterface()),
+            # Validade zero: toda leitura vai ao SQLite
+            ('sqlite sem cache', InterfaceSessoesServidor(armazem, CacheSessoes(validade=0))),
+            ('sqlite + LRU', InterfaceSessoesServidor(armazem, CacheSessoes(capacidade=args.sessoes))),
+        ]
+        for nome, interface in casos:
+            cookies = criar_cookies(app, interface, args.sessoes)
+            por_segundo = medir(app, interface, cookies, args.leituras)
+            print(f'{nome:>18}: {por_segundo:10.0f} leituras/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+"""
+Modo ASGI: as leituras públicas mais pesadas em handlers assíncronos, o resto no app Flask.
+
+    uvicorn src.asgi:app --host 0.0.0.0 --port 5000 --workers 2
+
+GET /api/equivalencias, /api/equivalencias/search e /api/equivalencias/export
+rodam no event loop com sessões assíncronas do SQLAlchemy (asyncpg ou aiosqlite),
+sobre os mesmos modelos de src/models/equivalencia.py. As demais rotas (login,
+escritas, grafo, match, métricas, arquivos estáticos) e as requisições com cookie
+de sessão do admin (leitura da própria escrita) vão para src.main:app, executado
+em threads.
+
+GET /api/equivalencias/stream (Server-Sent Events) também roda no event loop,
+com ou sem cookie: cada conexão parada é só uma corrotina esperando o broker de
+src.services.eventos, sem ocupar thread nem conexão do banco.
+
+O número de consultas simultâneas ao banco é limitado por ASGI_DB_CONCURRENCY;
+as conexões HTTP em si (keep-alive) ficam só no event loop e não têm esse limite.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_accept_header, parse_etags
+
+from src.config.database import BIND_LEITURA, criar_engine_assincrono, opcoes_engine
+from src.main import app as flask_app
+from src.models.equivalencia import Equivalencia, CatalogoVersao
+from src.repositories import RepositorioSQLAlchemy, repositorio
+from src.repositories.sqlalchemy import aplicar_filtros, colunas_listagem, dicionarios
+from src.routes.equivalencia import (
+    FORMATOS_EXPORTACAO, ler_campos, ler_filtros, pagina_busca, pagina_keyset, parametros_busca,
+    parametros_paginacao
+)
+from src.services.busca import consulta_busca
+from src.services.cache import ID_VERSAO, cache_listagem, chave_consulta, etag_catalogo
+from src.services.compressao import negociar
+from src.services.eventos import CABECALHOS_STREAM, gerar_stream_async, inicio_stream, ler_ultimo_id
+from src.services.serializacao import json_bytes
+from src.services.exportacao import (
+    CAMPOS_EXPORTACAO, LINHAS_POR_BLOCO, consulta_exportacao, registro_exportacao
+)
+
+logger = logging.getLogger(__name__)
+
+# Threads para as rotas atendidas pelo app Flask
+THREADS_WSGI_PADRAO = 16
+
+
+def _limite_concorrencia():
+    """ASGI_DB_CONCURRENCY, ou o máximo de conexões do pool do perfil"""
+    if os.getenv('ASGI_DB_CONCURRENCY'):
+        return int(os.getenv('ASGI_DB_CONCURRENCY'))
+    opcoes = opcoes_engine(flask_app.config['DB_PROFILE'])
+    return opcoes.get('pool_size', 5) + opcoes.get('max_overflow', 10)
+
+
+# Leituras anônimas vão para a réplica, se houver (ver init_replica)
+_binds = flask_app.config.get('SQLALCHEMY_BINDS', {})
+_url = _binds[BIND_LEITURA]['url'] if BIND_LEITURA in _binds else flask_app.config['SQLALCHEMY_DATABASE_URI']
+engine = criar_engine_assincrono(_url, flask_app.config['DB_PROFILE'])
+Sessao = async_sessionmaker(engine, expire_on_commit=False)
+limite_banco = asyncio.Semaphore(_limite_concorrencia())
+metricas = flask_app.extensions['metricas']
+broker = flask_app.extensions['eventos']
+
+# Cookie de sessão do Flask: quem tem (admin) é atendido pelo app Flask
+COOKIE_SESSAO = flask_app.config['SESSION_COOKIE_NAME']
+# ... exceto nestas rotas, que não dependem da sessão
+ROTAS_SEM_SESSAO = ('/api/equivalencias/stream',)
+
+
+def _args(request):
+    return MultiDict(request.query_params.multi_items())
+
+
+def _comprimido(request, corpo, cabecalhos, cacheado=None):
+    """Resposta JSON comprimida como em src.services.compressao.comprimir_resposta"""
+    aceitas = parse_accept_header(request.headers.get('accept-encoding'))
+    corpo, codificacao = negociar(corpo, aceitas, cacheado)
+    cabecalhos = dict(cabecalhos, Vary='Accept-Encoding')
+    if codificacao is not None:
+        cabecalhos['Content-Encoding'] = codificacao
+        if 'ETag' in cabecalhos:
+            cabecalhos['ETag'] = f"W/{cabecalhos['ETag']}"
+    return Response(corpo, media_type='application/json', headers=cabecalhos)
+
+
+def _json(dados, status=200):
+    # Mesma serialização do jsonify do Flask, para que as respostas sejam idênticas
+    corpo = flask_app.json.dumps(dados, separators=(',', ':'))
+    return Response(f'{corpo}\n', status_code=status, media_type='application/json')
+
+
+def _erro(mensagem, status):
+    return _json({'error': mensagem}, status)
+
+
+def medido(rota):
+    """Registra latência, status e tamanho no mesmo coletor de /api/metrics"""
+    def decorador(handler):
+        async def envolvido(request):
+            inicio = time.perf_counter()
+            resposta = await handler(request)
+            tamanho = int(resposta.headers.get('content-length', 0))
+            metricas.registrar(rota, request.method, resposta.status_code,
+                               time.perf_counter() - inicio, tamanho, 0.0)
+            return resposta
+        return envolvido
+    return decorador
+
+
+async def _versao(sessao):
+    versao = await sessao.scalar(select(CatalogoVersao.versao).where(CatalogoVersao.id == ID_VERSAO))
+    return versao or 0
+
+
+@medido('/api/equivalencias')
+async def listar_equivalencias(request):
+    """Mesmo contrato de get_equivalencias: lista completa ou página por cursor, com ETag"""
+    args = _args(request)
+    try:
+        filtros = ler_filtros(args)
+        campos = ler_campos(args)
+        paginado = 'limit' in args or 'cursor' in args
+        limit, cursor = parametros_paginacao(args) if paginado else (None, None)
+    except ValueError:
+        return _erro('Parâmetros de consulta inválidos', 400)
+
+    try:
+        async with limite_banco, Sessao() as sessao:
+            versao = await _versao(sessao)
+            chave = chave_consulta(args)
+            etag = etag_catalogo(versao, chave)
+            cabecalhos = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache', 'X-Catalog-Version': str(versao)}
+
+            if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+                return Response(status_code=304, headers=cabecalhos)
+
+            item = cache_listagem.obter(versao, chave)
+            if item is None:
+                consulta = aplicar_filtros(select(*colunas_listagem(campos)), filtros)
+                if cursor is not None:
+                    consulta = consulta.where(Equivalencia.id > cursor)
+                if paginado:
+                    consulta = consulta.order_by(Equivalencia.id).limit(limit + 1)
+                equivalencias = dicionarios(await sessao.execute(consulta), campos)
+                dados = pagina_keyset(equivalencias, limit) if paginado else equivalencias
+                item = cache_listagem.guardar(versao, chave, json_bytes(dados), etag)
+
+        return _comprimido(request, item.corpo, cabecalhos, item)
+    except Exception as e:
+        logger.error("Erro ao buscar equivalências (ASGI): %s", e)
+        return _erro(str(e), 500)
+
+
+@medido('/api/equivalencias/search')
+async def buscar_equivalencias(request):
+    """Mesmo contrato de search_equivalencias"""
+    args = _args(request)
+    termo = args.get('q', '').strip()
+    if not termo:
+        return _erro('Parâmetro q é obrigatório', 400)
+    try:
+        limit, offset = parametros_busca(args)
+        filtros = ler_filtros(args)
+        campos = ler_campos(args)
+    except ValueError:
+        return _erro('Parâmetros de consulta inválidos', 400)
+
+    try:
+        consulta = consulta_busca(termo, dialeto=engine.dialect.name)
+        if consulta is None:
+            return _comprimido(request, json_bytes(pagina_busca([], limit, offset)), {})
+        consulta = aplicar_filtros(consulta.with_only_columns(*colunas_listagem(campos)), filtros)
+        async with limite_banco, Sessao() as sessao:
+            equivalencias = dicionarios(await sessao.execute(consulta.limit(limit + 1).offset(offset)), campos)
+        return _comprimido(request, json_bytes(pagina_busca(equivalencias, limit, offset)), {})
+    except Exception as e:
+        logger.error("Erro na busca de equivalências (ASGI): %s", e)
+        return _erro(str(e), 500)
+
+
+async def _partes_exportacao(consulta, gerador, campos):
+    """
+    Lê o cursor do servidor em blocos e gera o texto de cada bloco.
+
+    A vaga em limite_banco fica ocupada até o fim da exportação, pois a conexão também.
+    """
+    cabecalho = True
+    async with limite_banco, Sessao() as sessao:
+        resultado = await sessao.stream(consulta)
+        async for linhas in resultado.partitions(LINHAS_POR_BLOCO):
+            registros = [registro_exportacao(linha) for linha in linhas]
+            yield ''.join(gerador(registros, campos=campos, cabecalho=cabecalho))
+            cabecalho = False
+    if cabecalho:
+        # Exportação vazia: só o cabeçalho (se o formato tiver um)
+        yield ''.join(gerador([], campos=campos))
+
+
+@medido('/api/equivalencias/export')
+async def exportar_equivalencias(request):
+    """Mesmo contrato de export_equivalencias, em streaming assíncrono"""
+    args = _args(request)
+    formato = args.get('format', 'csv')
+    if formato not in FORMATOS_EXPORTACAO:
+        return _erro('Formato inválido. Use csv ou ndjson', 400)
+
+    gerador, content_type, extensao = FORMATOS_EXPORTACAO[formato]
+    try:
+        campos = ler_campos(args) or CAMPOS_EXPORTACAO
+        consulta = aplicar_filtros(consulta_exportacao(campos), ler_filtros(args))
+    except ValueError:
+        return _erro('Parâmetros de consulta inválidos', 400)
+    logger.info("Exportando equivalências em %s (ASGI)", formato)
+
+    return StreamingResponse(
+        _partes_exportacao(consulta, gerador, campos),
+        headers={'Content-Type': content_type,
+                 'Content-Disposition': f'attachment; filename=equivalencias.{extensao}'}
+    )
+
+
+@medido('/api/equivalencias/stream')
+async def stream_equivalencias(request):
+    """Mesmo contrato de stream_equivalencias, sem limite de duração"""
+    try:
+        ultimo = ler_ultimo_id(request.headers.get('last-event-id') or request.query_params.get('last_event_id'))
+    except ValueError:
+        return _erro('Last-Event-ID inválido', 400)
+
+    try:
+        async with limite_banco, Sessao() as sessao:
+            versao = await _versao(sessao)
+    except Exception as e:
+        logger.error("Erro ao iniciar o stream de eventos (ASGI): %s", e)
+        return _erro(str(e), 500)
+
+    inicio, ultimo = inicio_stream(broker, ultimo, lambda: versao)
+    return StreamingResponse(gerar_stream_async(broker, inicio, ultimo),
+                             media_type='text/event-stream', headers=CABECALHOS_STREAM)
+
+
+class SessaoParaWsgi:
+    """Manda ao app Flask as requisições com cookie de sessão (admin logado)"""
+
+    def __init__(self, app, wsgi):
+        self.app = app
+        self.wsgi = wsgi
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] not in ROTAS_SEM_SESSAO:
+            for nome, valor in scope['headers']:
+                if nome == b'cookie' and f'{COOKIE_SESSAO}='.encode() in valor:
+                    return await self.wsgi(scope, receive, send)
+        await self.app(scope, receive, send)
+
+
+@asynccontextmanager
+async def _ciclo_de_vida(app):
+    yield
+    await engine.dispose()
+
+
+def criar_app():
+    wsgi = WSGIMiddleware(flask_app, workers=int(os.getenv('ASGI_WSGI_THREADS', THREADS_WSGI_PADRAO)))
+    if not isinstance(repositorio, RepositorioSQLAlchemy):
+        # Os handlers assíncronos leem direto do banco; outros backends ficam todos no Flask
+        return wsgi
+    rotas = [
+        Route('/api/equivalencias', listar_equivalencias, methods=['GET']),
+        Route('/api/equivalencias/search', buscar_equivalencias, methods=['GET']),
+        Route('/api/equivalencias/export', exportar_equivalencias, methods=['GET']),
+        Route('/api/equivalencias/stream', stream_equivalencias, methods=['GET']),
+        # Todo o resto do contrato /api e o frontend
+        Mount('/', app=wsgi),
+    ]
+    return SessaoParaWsgi(Starlette(routes=rotas, lifespan=_ciclo_de_vida), wsgi)
+
+
+app = criar_app()
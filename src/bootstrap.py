@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Inicialização única do banco: tabelas, migrações e administrador padrão.
+
+Executar uma vez por deploy, antes de subir os workers:
+
+    python -m src.bootstrap
+
+Os workers do gunicorn não fazem mais nada disso ao importar src.main.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from werkzeug.security import generate_password_hash
+
+# Tempo máximo para importar src.main em um processo novo (segundos)
+LIMITE_IMPORTACAO_PADRAO = 1.0
+
+
+def inicializar_banco(app, testar_supabase=True):
+    """Cria as tabelas, aplica as migrações e cria o administrador padrão"""
+    from src.config.supabase import supabase_config
+    from src.models.equivalencia import db, Admin
+    from src.models.migracoes import aplicar_migracoes
+
+    with app.app_context():
+        db.create_all()
+        aplicar_migracoes()
+
+        # Criar usuário administrador padrão se não existir
+        if not Admin.query.filter_by(username='admin').first():
+            admin_user = Admin(
+                username='admin',
+                password_hash=generate_password_hash('adm4125')
+            )
+            db.session.add(admin_user)
+            db.session.commit()
+            print("Usuário administrador criado: admin / adm4125")
+
+    # Testar conexão com Supabase
+    if testar_supabase and os.getenv('SUPABASE_URL'):
+        success, message = supabase_config.test_connection()
+        print(f"Supabase: {message}")
+
+
+def medir_importacao():
+    """Mede, em um processo novo, quanto tempo leva para importar src.main"""
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    codigo = ("import time; inicio = time.perf_counter(); import src.main; "
+              "print(time.perf_counter() - inicio)")
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=raiz, check=True,
+                           capture_output=True, text=True)
+    return float(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inicialização do Sistema de Equivalências UFSM')
+    parser.add_argument('--sem-supabase', action='store_true',
+                        help='não testar a conexão com o Supabase')
+    parser.add_argument('--verificar-importacao', action='store_true',
+                        help='só verifica se importar src.main cabe no orçamento de tempo')
+    parser.add_argument('--limite', type=float,
+                        default=float(os.getenv('IMPORT_BUDGET_SECONDS', LIMITE_IMPORTACAO_PADRAO)),
+                        help='orçamento de importação em segundos (padrão %(default)s)')
+    args = parser.parse_args()
+
+    if args.verificar_importacao:
+        duracao = medir_importacao()
+        print(f"Importação de src.main: {duracao:.3f}s (limite {args.limite:.3f}s)")
+        return 0 if duracao <= args.limite else 1
+
+    from src.main import app
+
+    inicio = time.perf_counter()
+    inicializar_banco(app, testar_supabase=not args.sem_supabase)
+    print(f"✅ Banco inicializado em {time.perf_counter() - inicio:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import NullPool
+
+# Perfis de engine por ambiente (DB_PROFILE); 'auto' escolhe pelo DATABASE_URL
+PERFIS = {
+    # Postgres com pool próprio por worker
+    'postgres': {
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+    },
+    # Postgres atrás do PgBouncer em modo transaction: o pool é do PgBouncer, então
+    # cada checkout abre uma conexão nova e nada de estado de sessão fica preso a ela
+    'pgbouncer': {
+        'poolclass': NullPool,
+    },
+    # SQLite local: o ajuste é feito por PRAGMAs na abertura de cada conexão
+    'sqlite': {},
+}
+
+# PRAGMAs do perfil sqlite: WAL deixa leitores rodarem durante uma escrita
+PRAGMAS_SQLITE = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+}
+
+
+def pragmas_sqlite():
+    pragmas = dict(PRAGMAS_SQLITE)
+    # mmap em bytes; cache_size negativo é em KiB
+    pragmas['mmap_size'] = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    pragmas['cache_size'] = -int(os.getenv('SQLITE_CACHE_KB', str(64 * 1024)))
+    return pragmas
+
+
+def executar_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for nome, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nome}={valor}')
+    finally:
+        cursor.close()
+
+
+# PRAGMAs em uso (None com um perfil que não é sqlite)
+_configuracao = {'pragmas': None}
+
+
+def _aplicar_pragmas(dbapi_connection, connection_record):
+    if _configuracao['pragmas'] and isinstance(dbapi_connection, sqlite3.Connection):
+        executar_pragmas(dbapi_connection, _configuracao['pragmas'])
+
+
+# Bind do SQLALCHEMY_BINDS usado para as leituras quando DATABASE_READ_URL existe
+BIND_LEITURA = 'leitura'
+
+# Segundos após uma escrita em que a sessão do admin continua lendo do primário
+JANELA_LEITURA_PROPRIA_PADRAO = 10
+
+
+class SessaoRoteada(Session):
+    """
+    Sessão do db que manda os SELECTs das requisições GET para a réplica de leitura.
+
+    Escritas, flushes e qualquer comando fora de uma leitura roteada ficam no
+    primário. A decisão por requisição é tomada em init_replica().
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and isinstance(clause, Select)
+                and has_request_context() and g.get('ler_replica')):
+            return self._db.engines[BIND_LEITURA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def leitura_primario():
+    """
+    Dentro do bloco, os SELECTs da requisição vão ao primário mesmo num GET roteado
+    para a réplica: usado onde uma leitura atrasada corromperia estado em memória
+    (índices versionados).
+    """
+    if not has_request_context():
+        yield
+        return
+    anterior = g.get('ler_replica')
+    g.ler_replica = False
+    try:
+        yield
+    finally:
+        g.ler_replica = anterior
+
+
+def _marcar_escrita(sessao):
+    if has_request_context():
+        g.escrita_commitada = True
+
+
+def init_replica(app):
+    """
+    Roteia as leituras para a réplica (se configurada em configurar_banco()).
+
+    Depois de um commit a sessão do usuário guarda o horário da escrita e, durante
+    READ_YOUR_WRITES_SECONDS, as leituras dele continuam no primário para que vejam
+    a própria alteração mesmo com atraso de replicação.
+    """
+    if BIND_LEITURA not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+
+    janela = float(os.getenv('READ_YOUR_WRITES_SECONDS', JANELA_LEITURA_PROPRIA_PADRAO))
+
+    if not event.contains(SessaoRoteada, 'after_commit', _marcar_escrita):
+        event.listen(SessaoRoteada, 'after_commit', _marcar_escrita)
+
+    @app.before_request
+    def _escolher_banco():
+        if request.method in ('GET', 'HEAD'):
+            g.ler_replica = time.time() - session.get('escrita_em', 0) > janela
+
+    @app.after_request
+    def _lembrar_escrita(response):
+        if g.get('escrita_commitada'):
+            session['escrita_em'] = time.time()
+        return response
+
+
+def escolher_perfil(url):
+    """Perfil de DB_PROFILE, ou deduzido da URL quando DB_PROFILE=auto (padrão)"""
+    perfil = os.getenv('DB_PROFILE', 'auto').lower()
+    if perfil == 'auto':
+        return 'sqlite' if url.startswith('sqlite') else 'postgres'
+    if perfil not in PERFIS:
+        raise ValueError(f"DB_PROFILE inválido: {perfil} (use auto, {', '.join(PERFIS)})")
+    return perfil
+
+
+def opcoes_engine(perfil):
+    """Opções de create_engine do perfil, com os ajustes de pool do ambiente"""
+    opcoes = dict(PERFIS[perfil])
+    if perfil == 'postgres':
+        opcoes['pool_size'] = int(os.getenv('DB_POOL_SIZE', opcoes['pool_size']))
+        opcoes['max_overflow'] = int(os.getenv('DB_MAX_OVERFLOW', opcoes['max_overflow']))
+        opcoes['pool_recycle'] = int(os.getenv('DB_POOL_RECYCLE', opcoes['pool_recycle']))
+    return opcoes
+
+
+def configurar_banco(app):
+    """
+    Define SQLALCHEMY_DATABASE_URI e SQLALCHEMY_ENGINE_OPTIONS do app.
+
+    Variáveis de ambiente:
+        DATABASE_URL: Postgres (ou outro); sem ela usa SQLite em src/database/app.db
+        DATABASE_READ_URL: réplica de leitura opcional (bind 'leitura'), mesmo perfil
+        DB_PROFILE: auto (padrão), postgres, pgbouncer ou sqlite
+        DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE: pool do perfil postgres
+        SQLITE_MMAP_SIZE, SQLITE_CACHE_KB: memória do perfil sqlite
+
+    Returns:
+        str: Nome do perfil escolhido
+    """
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        # Usar SQLite local (desenvolvimento)
+        db_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database')
+        os.makedirs(db_dir, exist_ok=True)
+        database_url = f"sqlite:///{os.path.join(db_dir, 'app.db')}"
+
+    perfil = escolher_perfil(database_url)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opcoes_engine(perfil)
+    app.config['DB_PROFILE'] = perfil
+
+    database_read_url = os.getenv('DATABASE_READ_URL')
+    if database_read_url:
+        opcoes_leitura = opcoes_engine(perfil)
+        if perfil == 'postgres':
+            # Conexões da réplica recusam escrita mesmo se algo escapar do roteamento
+            opcoes_leitura['connect_args'] = {'options': '-c default_transaction_read_only=on'}
+        app.config['SQLALCHEMY_BINDS'] = {BIND_LEITURA: {'url': database_read_url, **opcoes_leitura}}
+
+    _configuracao['pragmas'] = pragmas_sqlite() if perfil == 'sqlite' else None
+    if not event.contains(Engine, 'connect', _aplicar_pragmas):
+        event.listen(Engine, 'connect', _aplicar_pragmas)
+
+    return perfil
+
+
+# Drivers assíncronos usados pelo modo ASGI (src/asgi.py)
+DRIVERS_ASSINCRONOS = {'postgresql': 'postgresql+asyncpg', 'postgres': 'postgresql+asyncpg',
+                       'sqlite': 'sqlite+aiosqlite'}
+
+
+def criar_engine_assincrono(url, perfil):
+    """
+    Engine assíncrono (asyncpg ou aiosqlite) para a mesma URL, com o mesmo perfil.
+
+    Requer os pacotes do driver assíncrono e do SQLAlchemy com suporte a asyncio.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in DRIVERS_ASSINCRONOS:
+        raise ValueError(f'Banco sem driver assíncrono configurado: {backend}')
+    url = url.set(drivername=DRIVERS_ASSINCRONOS[backend])
+
+    opcoes = opcoes_engine(perfil)
+    if perfil == 'pgbouncer':
+        # Statements preparados do asyncpg não sobrevivem ao pooling por transação
+        opcoes['connect_args'] = {'statement_cache_size': 0, 'prepared_statement_cache_size': 0}
+    engine = create_async_engine(url, **opcoes)
+
+    if perfil == 'sqlite':
+        pragmas = pragmas_sqlite()
+        event.listen(engine.sync_engine, 'connect',
+                     lambda conexao, registro: executar_pragmas(conexao, pragmas))
+    return engine
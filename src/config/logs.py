@@ -0,0 +1,154 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+# Chaves cujo valor nunca vai para o log
+CAMPOS_SENSIVEIS = {'password', 'senha', 'password_hash', 'secret_key', 'token',
+                    'authorization', 'cookie', 'service_role_key', 'anon_key'}
+
+# Rede de segurança para mensagens montadas com dicionários: 'password': 'valor'
+PADRAO_SENSIVEL = re.compile(
+    r"""(['"]?(?:%s)['"]?\s*[:=]\s*)(['"]).*?\2""" % '|'.join(CAMPOS_SENSIVEIS), re.IGNORECASE
+)
+
+REDIGIDO = '***'
+
+# Amostragem padrão dos logs INFO/DEBUG das rotas de leitura mais chamadas
+AMOSTRAGEM_PADRAO = {
+    'equivalencia.get_equivalencias': 0.01,
+    'equivalencia.search_equivalencias': 0.01,
+    'equivalencia.check_auth': 0.01,
+}
+
+# Atributos padrão de LogRecord; o resto veio de extra= e vai como campo do JSON
+_ATRIBUTOS_RECORD = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+def redigir(valor):
+    """Substitui recursivamente os valores de chaves sensíveis"""
+    if isinstance(valor, dict):
+        return {k: REDIGIDO if str(k).lower() in CAMPOS_SENSIVEIS else redigir(v)
+                for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [redigir(v) for v in valor]
+    return valor
+
+
+class FormatadorJson(logging.Formatter):
+    """Uma linha JSON por registro, com os campos de extra= e valores sensíveis redigidos"""
+
+    def format(self, record):
+        mensagem = PADRAO_SENSIVEL.sub(rf'\1\2{REDIGIDO}\2', record.getMessage())
+        dados = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': mensagem,
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_RECORD:
+                dados[chave] = REDIGIDO if chave.lower() in CAMPOS_SENSIVEIS else redigir(valor)
+        if record.exc_info:
+            dados['exc'] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FormatadorTexto(logging.Formatter):
+    """Formato texto simples (desenvolvimento), também com valores sensíveis redigidos"""
+
+    def format(self, record):
+        return PADRAO_SENSIVEL.sub(rf'\1\2{REDIGIDO}\2', super().format(record))
+
+
+class FiltroRequisicao(logging.Filter):
+    """
+    Roda na thread da requisição: amostra INFO/DEBUG das rotas quentes e anexa
+    método, rota e endpoint ao registro. Avisos e erros nunca são descartados.
+
+    A decisão de amostragem é tomada uma vez por requisição, então os logs de
+    uma requisição amostrada saem completos.
+    """
+
+    def __init__(self, amostragem):
+        super().__init__()
+        self.amostragem = amostragem
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+
+        if record.levelno < logging.WARNING:
+            manter = g.get('log_amostrado')
+            if manter is None:
+                taxa = self.amostragem.get(request.endpoint, 1.0)
+                manter = g.log_amostrado = taxa >= 1.0 or random.random() < taxa
+            if not manter:
+                return False
+
+        record.method = request.method
+        record.path = request.path
+        record.endpoint = request.endpoint
+        return True
+
+
+class HandlerFila(logging.handlers.QueueHandler):
+    """
+    QueueHandler que não formata a mensagem na thread da requisição.
+
+    O QueueHandler padrão chama format() em prepare(); como a fila é só em
+    memória, o registro pode seguir intacto e a formatação fica para a thread
+    do QueueListener.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _ler_amostragem():
+    """LOG_SAMPLE_ROUTES=endpoint=taxa,... sobrescreve a amostragem padrão"""
+    amostragem = dict(AMOSTRAGEM_PADRAO)
+    for item in filter(None, os.getenv('LOG_SAMPLE_ROUTES', '').split(',')):
+        endpoint, _, taxa = item.partition('=')
+        amostragem[endpoint.strip()] = float(taxa)
+    return amostragem
+
+
+def configurar_logs():
+    """
+    Configura o logging da aplicação: registros vão para uma fila em memória e uma
+    thread em segundo plano formata (JSON) e escreve em stdout.
+
+    Variáveis de ambiente:
+        LOG_LEVEL: nível mínimo (padrão INFO)
+        LOG_FORMAT: json (padrão) ou text
+        LOG_SAMPLE_ROUTES: amostragem por endpoint, ex. equivalencia.get_equivalencias=0.05
+    """
+    raiz = logging.getLogger()
+    if any(isinstance(h, HandlerFila) for h in raiz.handlers):
+        return
+
+    saida = logging.StreamHandler(sys.stdout)
+    if os.getenv('LOG_FORMAT', 'json') == 'json':
+        saida.setFormatter(FormatadorJson())
+    else:
+        saida.setFormatter(FormatadorTexto('%(levelname)s:%(name)s:%(message)s'))
+
+    fila = queue.SimpleQueue()
+    handler = HandlerFila(fila)
+    handler.addFilter(FiltroRequisicao(_ler_amostragem()))
+
+    listener = logging.handlers.QueueListener(fila, saida, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    raiz.handlers = [handler]
+    raiz.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
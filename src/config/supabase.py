@@ -1,25 +1,54 @@
 import os
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
 class SupabaseConfig:
-    """Configuração do cliente Supabase"""
+    """
+    Configuração do cliente Supabase.
+
+    Os clientes são criados no primeiro uso (e o pacote supabase só é importado
+    nesse momento), então importar este módulo não faz I/O nem acessa a rede.
+    """
     
     def __init__(self):
         self.url = os.getenv('SUPABASE_URL', 'https://supabases.iaprojetos.com.br')
         self.anon_key = os.getenv('SUPABASE_ANON_KEY', 'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.ewogICJyb2xlIjogImFub24iLAogICJpc3MiOiAic3VwYWJhc2UiLAogICJpYXQiOiAxNzE1MDUwODAwLAogICJleHAiOiAxODcyODE3MjAwCn0.TKsuZpcWuZTmGvi2ZihI_xNTTWKdGUJ_9jpf49rIHLE')
         self.service_role_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY', 'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.ewogICJyb2xlIjogInNlcnZpY2Vfcm9sZSIsCiAgImlzcyI6ICJzdXBhYmFzZSIsCiAgImlhdCI6IDE3MTUwNTA4MDAsCiAgImV4cCI6IDE4NzI4MTcyMDAKfQ.3HrXvFpCTuI8a9NPJjNY-frjGSx0iwMbhO9Gah9RkVs')
         
-        # Cliente público (para operações de leitura)
-        self.client = create_client(self.url, self.anon_key)
-        
-        # Cliente admin (para operações administrativas)
-        self.admin_client = create_client(self.url, self.service_role_key)
+        self._client = None
+        self._admin_client = None
+        self._lock = threading.Lock()
+    
+    def _criar_cliente(self, key):
+        from supabase import create_client
+        return create_client(self.url, key)
+    
+    @property
+    def client(self) -> 'Client':
+        """Cliente público (para operações de leitura)"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._criar_cliente(self.anon_key)
+        return self._client
+    
+    @property
+    def admin_client(self) -> 'Client':
+        """Cliente admin (para operações administrativas)"""
+        if self._admin_client is None:
+            with self._lock:
+                if self._admin_client is None:
+                    self._admin_client = self._criar_cliente(self.service_role_key)
+        return self._admin_client
     
-    def get_client(self, admin=False) -> Client:
+    def get_client(self, admin=False) -> 'Client':
         """
         Retorna o cliente Supabase apropriado
         
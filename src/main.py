@@ -1,5 +1,6 @@
 import os
 import sys
+from datetime import timedelta
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente
@@ -8,40 +9,67 @@ load_dotenv()
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, jsonify
-from werkzeug.security import generate_password_hash
-from src.models.equivalencia import db, Admin
+from src.config.logs import configurar_logs
+
+# Logging em fila com escrita em segundo plano (antes de qualquer outro import do app)
+configurar_logs()
+
+from flask import Flask, Response, request, send_from_directory, jsonify
+from src.models.equivalencia import db
 from src.routes.equivalencia import equivalencia_bp
 from src.config.supabase import supabase_config
+from src.config.database import configurar_banco, init_replica
+from src.services.metricas import init_metricas
+from src.services.profiler import init_profiler
+from src.services.compressao import init_compressao
+from src.services.sessoes import init_sessoes
+from src.services.eventos import init_eventos
+from src.services.estaticos import ArquivosEstaticos
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 
 # Configurações do Flask - CORREÇÃO: Configuração adequada de sessões
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'ufsm_equivalencias_2025_secret_key_admin')
-app.config['SESSION_TYPE'] = 'filesystem'
+# Sessões no servidor (sqlite, compartilhadas pelos workers) ou cookie assinado (cookie)
+app.config['SESSION_TYPE'] = os.getenv('SESSION_TYPE', 'sqlite')
 app.config['SESSION_PERMANENT'] = False
 app.config['SESSION_USE_SIGNER'] = True
-app.config['SESSION_KEY_PREFIX'] = 'ufsm_equiv:'
+# Validade da sessão no servidor (renovada enquanto o admin usa o sistema)
+app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=int(os.getenv('SESSION_LIFETIME_HOURS', '8')))
+init_sessoes(app)
 
 # Registrar blueprints
 app.register_blueprint(equivalencia_bp, url_prefix='/api')
 
-# Configuração do banco de dados
-database_url = os.getenv('DATABASE_URL')
-if database_url:
-    # Usar PostgreSQL (Supabase ou outro)
-    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-else:
-    # Usar SQLite local (desenvolvimento)
-    db_dir = os.path.join(os.path.dirname(__file__), 'database')
-    os.makedirs(db_dir, exist_ok=True)
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(db_dir, 'app.db')}"
+# Configuração do banco de dados (URL e perfil de engine: pool do Postgres ou PRAGMAs do SQLite)
+configurar_banco(app)
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Inicializar banco de dados
 db.init_app(app)
 
+# Leituras GET na réplica (opcional: DATABASE_READ_URL)
+init_replica(app)
+
+# Métricas por rota (latência, status, tamanho, tempo de banco)
+metricas = init_metricas(app)
+
+# Compressão gzip/brotli das respostas JSON (depois das métricas: elas medem o tamanho enviado)
+init_compressao(app)
+
+# Profiler de SQL (opcional: SQL_PROFILER=1) e orçamentos de consultas por endpoint
+init_profiler(app)
+
+# Eventos do catálogo para /api/equivalencias/stream (EVENTS_BROKER: auto, local ou postgres)
+init_eventos(app)
+
+# Rota com as métricas de todos os workers no formato do Prometheus
+@app.route('/api/metrics')
+def prometheus_metrics():
+    """Endpoint de métricas para o Prometheus"""
+    return Response(metricas.exportar_prometheus(), mimetype='text/plain; version=0.0.4')
+
 # Rota para testar conexão com Supabase
 @app.route('/api/supabase/test')
 def test_supabase():
@@ -68,27 +96,15 @@ def system_info():
         'session_configured': True
     })
 
-with app.app_context():
-    db.create_all()
-    
-    # Criar usuário administrador padrão se não existir
-    if not Admin.query.filter_by(username='admin').first():
-        admin_user = Admin(
-            username='admin',
-            password_hash=generate_password_hash('adm4125')
-        )
-        db.session.add(admin_user)
-        db.session.commit()
-        print("Usuário administrador criado: admin / adm4125")
-    
-    # Testar conexão com Supabase
-    if os.getenv('SUPABASE_URL'):
-        success, message = supabase_config.test_connection()
-        print(f"Supabase: {message}")
+# Estáticos do build (python -m src.services.estaticos), em memória; None sem build
+estaticos = ArquivosEstaticos.carregar()
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
+    if estaticos is not None:
+        return estaticos.responder(path or 'index.html', request)
+
     static_folder_path = app.static_folder
     if static_folder_path is None:
         return "Static folder not configured", 404
@@ -112,5 +128,9 @@ if __name__ == '__main__':
     print(f"🔧 Debug: {debug}")
     print(f"🔐 Sessões: Configuradas")
     
+    # Em produção o bootstrap roda uma vez antes dos workers (python -m src.bootstrap)
+    from src.bootstrap import inicializar_banco
+    inicializar_banco(app)
+    
     app.run(host='0.0.0.0', port=port, debug=debug)
 
@@ -1,10 +1,47 @@
+import re
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import deferred, validates
 from datetime import datetime
 
-db = SQLAlchemy()
+from src.config.database import SessaoRoteada
+
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
+
+# Chave natural: uma disciplina de ADM equivale no máximo uma vez à mesma disciplina de um curso
+CHAVE_NATURAL = ['codigo_adm', 'codigo_equiv', 'curso_equiv']
+
+# Campos que toda equivalência precisa ter preenchidos
+CAMPOS_OBRIGATORIOS = ['disciplina_adm', 'codigo_adm', 'ch_adm', 'disciplina_equiv',
+                       'codigo_equiv', 'curso_equiv', 'ch_equiv', 'justificativa']
+
+def extrair_horas(carga_horaria):
+    """
+    Converte uma carga horária ("60h", "60 horas", 60) em número de horas.
+
+    Returns:
+        int ou None se não houver número no valor
+    """
+    if carga_horaria is None:
+        return None
+    if isinstance(carga_horaria, (int, float)):
+        return int(carga_horaria)
+    encontrado = re.search(r'\d+', str(carga_horaria))
+    return int(encontrado.group()) if encontrado else None
 
 class Equivalencia(db.Model):
     __tablename__ = 'equivalencias'
+    # Índices compostos (filtro, id) para paginação por cursor com filtros:
+    # o custo de uma página não depende da posição do cursor
+    __table_args__ = (
+        db.Index('ix_equivalencias_curso_equiv_id', 'curso_equiv', 'id'),
+        db.Index('ix_equivalencias_codigo_adm_id', 'codigo_adm', 'id'),
+        db.Index('ix_equivalencias_codigo_equiv_id', 'codigo_equiv', 'id'),
+        db.Index('uq_equivalencias_chave_natural', *CHAVE_NATURAL, unique=True),
+        # Filtros por carga horária (min_ch, ch_ratio_min)
+        db.Index('ix_equivalencias_horas', 'ch_equiv_horas', 'ch_adm_horas'),
+        # Feed de alterações (GET /equivalencias/changes?since=)
+        db.Index('ix_equivalencias_versao', 'versao'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     disciplina_adm = db.Column(db.String(255), nullable=False)
@@ -14,8 +51,22 @@ class Equivalencia(db.Model):
     codigo_equiv = db.Column(db.String(50), nullable=False)
     curso_equiv = db.Column(db.String(255), nullable=False)
     ch_equiv = db.Column(db.String(10), nullable=False)
-    justificativa = db.Column(db.Text, nullable=False)
+    # Texto sem limite e a maior parte da linha: as listagens selecionam as colunas
+    # que precisam e quem carrega o objeto inteiro pede undefer. raiseload: acessar
+    # sem undefer lança erro em vez de um SELECT por linha (N+1) silencioso
+    justificativa = deferred(db.Column(db.Text, nullable=False), raiseload=True)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    # Cargas horárias em horas, derivadas de ch_adm/ch_equiv a cada escrita
+    ch_adm_horas = db.Column(db.Integer)
+    ch_equiv_horas = db.Column(db.Integer)
+    # Versão do catálogo na última escrita da linha (gravada pelo repositório) e quando foi
+    versao = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @validates('ch_adm', 'ch_equiv')
+    def _atualizar_horas(self, campo, valor):
+        setattr(self, f'{campo}_horas', extrair_horas(valor))
+        return valor
 
     def __repr__(self):
         return f'<Equivalencia {self.disciplina_adm} -> {self.disciplina_equiv}>'
@@ -34,6 +85,27 @@ class Equivalencia(db.Model):
             'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None
         }
 
+class CatalogoVersao(db.Model):
+    """Contador de versão do catálogo, incrementado a cada escrita em equivalencias"""
+    __tablename__ = 'catalogo_versao'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    versao = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CatalogoVersao {self.versao}>'
+
+class EquivalenciaRemovida(db.Model):
+    """Lápide de uma equivalência excluída, para o feed de alterações"""
+    __tablename__ = 'equivalencias_removidas'
+
+    id = db.Column(db.Integer, primary_key=True)
+    versao = db.Column(db.BigInteger, nullable=False, index=True)
+    removido_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<EquivalenciaRemovida {self.id} v{self.versao}>'
+
 class Admin(db.Model):
     __tablename__ = 'admins'
     
@@ -0,0 +1,92 @@
+import logging
+
+from sqlalchemy import inspect, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.models.equivalencia import db, Equivalencia, CatalogoVersao, extrair_horas
+from src.services.busca import criar_indice_busca
+
+logger = logging.getLogger(__name__)
+
+# Linhas por lote no preenchimento de colunas novas
+LOTE_MIGRACAO = 1000
+
+
+def _adicionar_colunas(tabela, colunas):
+    """Adiciona à tabela existente as colunas do modelo que ainda não existem"""
+    existentes = {c['name'] for c in inspect(db.engine).get_columns(tabela.name)}
+    adicionadas = []
+    with db.engine.begin() as conn:
+        for nome in colunas:
+            if nome not in existentes:
+                coluna = tabela.c[nome]
+                tipo = coluna.type.compile(dialect=db.engine.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE {tabela.name} ADD COLUMN {nome} {tipo}')
+                adicionadas.append(nome)
+    return adicionadas
+
+
+def _preencher_horas():
+    """Preenche ch_adm_horas/ch_equiv_horas das linhas gravadas antes das colunas existirem"""
+    pendentes = db.session.execute(
+        select(Equivalencia.id, Equivalencia.ch_adm, Equivalencia.ch_equiv)
+        .where(Equivalencia.ch_adm_horas.is_(None) | Equivalencia.ch_equiv_horas.is_(None))
+    ).all()
+    for inicio in range(0, len(pendentes), LOTE_MIGRACAO):
+        lote = pendentes[inicio:inicio + LOTE_MIGRACAO]
+        db.session.execute(update(Equivalencia), [
+            {'id': id, 'ch_adm_horas': extrair_horas(ch_adm), 'ch_equiv_horas': extrair_horas(ch_equiv)}
+            for id, ch_adm, ch_equiv in lote
+        ])
+        db.session.commit()
+    if pendentes:
+        logger.info("Carga horária numérica preenchida em %d equivalências", len(pendentes))
+
+
+def _preencher_versoes():
+    """Linhas anteriores ao feed de alterações: versão 0 e atualizado_em = data_criacao"""
+    resultado = db.session.execute(
+        update(Equivalencia)
+        .where(Equivalencia.versao.is_(None))
+        .values(versao=0, atualizado_em=Equivalencia.data_criacao)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if resultado.rowcount:
+        logger.info("Versão inicial preenchida em %d equivalências", resultado.rowcount)
+
+
+def aplicar_migracoes():
+    """
+    Aplica alterações de schema que o db.create_all() não faz em tabelas já existentes.
+
+    Todas as etapas são idempotentes e podem ser executadas a cada inicialização.
+    """
+    # Todas as colunas novas antes de qualquer preenchimento: o UPDATE do ORM grava
+    # atualizado_em (onupdate), que também pode ainda não existir
+    _adicionar_colunas(Equivalencia.__table__, [
+        # Cargas horárias numéricas (precisam existir antes dos índices sobre elas)
+        'ch_adm_horas', 'ch_equiv_horas',
+        # Feed de alterações (a tabela de lápides é criada pelo create_all)
+        'versao', 'atualizado_em',
+    ])
+    _preencher_horas()
+    _preencher_versoes()
+
+    # Índices declarados no modelo depois da criação da tabela
+    for index in Equivalencia.__table__.indexes:
+        try:
+            index.create(db.engine, checkfirst=True)
+        except IntegrityError:
+            # Índice único sobre dados que já têm duplicatas: não removemos nada
+            # automaticamente, o upsert fica indisponível até a limpeza manual
+            logger.warning("Índice %s não criado: existem linhas duplicadas em (%s)",
+                           index.name, ', '.join(c.name for c in index.columns))
+
+    # Índice de busca textual (FTS5 no SQLite, tsvector/unaccent no PostgreSQL)
+    criar_indice_busca()
+
+    # Linha única do contador de versão do catálogo
+    if db.session.get(CatalogoVersao, 1) is None:
+        db.session.add(CatalogoVersao(id=1, versao=0))
+        db.session.commit()
@@ -0,0 +1,34 @@
+import os
+
+from src.repositories.base import ChaveDuplicada, RepositorioEquivalencias
+from src.repositories.sqlalchemy import RepositorioSQLAlchemy
+
+__all__ = ['ChaveDuplicada', 'RepositorioEquivalencias', 'RepositorioSQLAlchemy',
+           'criar_repositorio', 'repositorio']
+
+
+def criar_repositorio():
+    """
+    Repositório escolhido por STORAGE_BACKEND: sqlalchemy (padrão) ou supabase.
+
+    O backend supabase usa SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY, com
+    SUPABASE_HTTP_POOL conexões keep-alive (padrão 10) e SUPABASE_TIMEOUT segundos.
+    """
+    backend = os.getenv('STORAGE_BACKEND', 'sqlalchemy').lower()
+    if backend == 'supabase':
+        # Importado só aqui: o backend padrão não carrega o requests
+        from src.config.supabase import supabase_config
+        from src.repositories.supabase import RepositorioSupabase
+        return RepositorioSupabase(
+            supabase_config.url,
+            supabase_config.service_role_key,
+            conexoes=int(os.getenv('SUPABASE_HTTP_POOL', '10')),
+            timeout=float(os.getenv('SUPABASE_TIMEOUT', '10')),
+        )
+    if backend != 'sqlalchemy':
+        raise ValueError(f'STORAGE_BACKEND inválido: {backend} (use sqlalchemy ou supabase)')
+    return RepositorioSQLAlchemy()
+
+
+# Repositório usado pelas rotas e pelos índices em memória
+repositorio = criar_repositorio()
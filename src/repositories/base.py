@@ -0,0 +1,119 @@
+from src.models.equivalencia import CAMPOS_OBRIGATORIOS, extrair_horas
+
+# Filtros aceitos por listar/buscar/exportar (valores já convertidos pela rota)
+FILTROS_IGUALDADE = ['curso_equiv', 'codigo_adm', 'codigo_equiv']
+
+# Colunas de um registro completo (o que as escritas retornam para os índices em memória)
+COLUNAS_REGISTRO = ['id'] + CAMPOS_OBRIGATORIOS + ['data_criacao', 'ch_adm_horas', 'ch_equiv_horas']
+
+
+class ChaveDuplicada(Exception):
+    """Já existe uma equivalência com a mesma chave natural"""
+
+
+def com_horas(valores):
+    """Completa ch_adm_horas/ch_equiv_horas a partir de ch_adm/ch_equiv presentes em valores"""
+    valores = dict(valores)
+    for campo in ('ch_adm', 'ch_equiv'):
+        if campo in valores:
+            valores[f'{campo}_horas'] = extrair_horas(valores[campo])
+    return valores
+
+
+class RepositorioEquivalencias:
+    """
+    Armazenamento das equivalências usado pelas rotas.
+
+    Leituras retornam dicionários no formato de Equivalencia.to_dict(), mas
+    data_criacao pode vir como datetime (serializar com src.services.serializacao). Escritas
+    incrementam a versão do catálogo e retornam a nova versão junto com os registros
+    completos (COLUNAS_REGISTRO), que as rotas repassam a propagar_alteracao().
+
+    Filtros são um dicionário com os campos de FILTROS_IGUALDADE, min_ch (int) e
+    ch_ratio_min (float); backends que não suportam algum filtro lançam ValueError.
+    campos é a projeção pedida (subconjunto de CAMPOS_EXPORTACAO, sempre com id);
+    None retorna todos.
+    """
+
+    # Catálogo
+
+    def versao(self):
+        """Versão atual do catálogo"""
+        raise NotImplementedError
+
+    # Leituras
+
+    def listar(self, filtros, limit=None, cursor=None, campos=None):
+        """Até limit equivalências com id > cursor, ordenadas por id (todas se limit=None)"""
+        raise NotImplementedError
+
+    def buscar(self, termo, filtros, limit, offset, campos=None):
+        """Busca textual ordenada por relevância; [] se o termo não tiver palavras pesquisáveis"""
+        raise NotImplementedError
+
+    def obter(self, id):
+        """Uma equivalência, ou None se não existir"""
+        raise NotImplementedError
+
+    def exportar(self, filtros, campos=None):
+        """Itera as equivalências (campos de CAMPOS_EXPORTACAO) em lotes, sem carregar tudo em memória"""
+        raise NotImplementedError
+
+    def linhas(self, colunas):
+        """Tuplas com as colunas pedidas de todas as equivalências (reconstrução dos índices)"""
+        raise NotImplementedError
+
+    def alteracoes(self, desde, campos=None, versao=None):
+        """
+        Equivalências criadas, alteradas ou excluídas depois da versão desde do catálogo.
+
+        Cada linha guarda a versão da sua última escrita e cada exclusão deixa uma
+        lápide com a versão, então o custo é proporcional às alterações, não à tabela.
+        versao é a versão atual já lida por quem chama (evita consultá-la de novo);
+        sem ela, a versão é lida antes das linhas.
+
+        Returns:
+            tuple: (registros, ids removidos, versao); versao é o token da próxima
+            chamada. Lança NotImplementedError em backends sem o registro de alterações
+        """
+        raise NotImplementedError
+
+    # Escritas
+
+    def criar(self, valores):
+        """
+        Returns:
+            tuple: (registro, versao); lança ChaveDuplicada
+        """
+        raise NotImplementedError
+
+    def atualizar(self, id, valores):
+        """
+        Returns:
+            tuple: (registro, versao), ou (None, None) se o id não existir; lança ChaveDuplicada
+        """
+        raise NotImplementedError
+
+    def remover(self, id):
+        """
+        Returns:
+            int: Nova versão, ou None se o id não existir
+        """
+        raise NotImplementedError
+
+    def gravar_lote(self, lote, upsert=False):
+        """
+        Grava um lote de linhas validadas em um único comando (insert ou upsert pela chave
+        natural) e incrementa a versão. O lote inteiro falha junto.
+
+        Returns:
+            int: Nova versão
+        """
+        raise NotImplementedError
+
+    def upsert(self, valores):
+        """
+        Returns:
+            tuple: (id gravado, versao)
+        """
+        raise NotImplementedError
@@ -0,0 +1,201 @@
+from datetime import datetime
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import undefer
+
+from src.models.equivalencia import db, Equivalencia, EquivalenciaRemovida, CAMPOS_OBRIGATORIOS, CHAVE_NATURAL
+from src.repositories.base import COLUNAS_REGISTRO, FILTROS_IGUALDADE, ChaveDuplicada, RepositorioEquivalencias
+from src.services.busca import consulta_busca
+from src.services.cache import incrementar_versao_catalogo, versao_catalogo
+from src.services.exportacao import CAMPOS_EXPORTACAO, consulta_exportacao, registros_exportacao
+
+
+def _violacao_unicidade(erro):
+    """IntegrityError de chave única: 23505 no PostgreSQL, UNIQUE constraint failed no SQLite"""
+    original = erro.orig
+    if getattr(original, 'pgcode', None) == '23505':
+        return True
+    return (getattr(original, 'sqlite_errorname', None) == 'SQLITE_CONSTRAINT_UNIQUE'
+            or 'UNIQUE constraint failed' in str(original))
+
+
+def aplicar_filtros(query, filtros):
+    """
+    Aplica os filtros à consulta de equivalências.
+
+    Igualdade nos campos de FILTROS_IGUALDADE (usam os índices compostos do modelo),
+    min_ch e ch_ratio_min resolvidos no banco pelas colunas numéricas.
+    """
+    for campo in FILTROS_IGUALDADE:
+        valor = filtros.get(campo)
+        if valor:
+            query = query.filter(getattr(Equivalencia, campo) == valor)
+
+    if filtros.get('min_ch') is not None:
+        query = query.filter(Equivalencia.ch_equiv_horas >= filtros['min_ch'])
+
+    if filtros.get('ch_ratio_min') is not None:
+        query = query.filter(Equivalencia.ch_equiv_horas >= Equivalencia.ch_adm_horas * filtros['ch_ratio_min'])
+    return query
+
+
+def colunas_listagem(campos=None):
+    """Colunas de Equivalencia.to_dict() (ou só as de campos), para consultas de tuplas sem objetos ORM"""
+    return [getattr(Equivalencia, campo) for campo in campos or CAMPOS_EXPORTACAO]
+
+
+def dicionarios(linhas, campos=None):
+    """
+    Dicionários no formato de to_dict() a partir das tuplas de colunas_listagem().
+
+    data_criacao fica como datetime: a conversão para ISO 8601 acontece na
+    serialização (src.services.serializacao), sem uma chamada Python por linha.
+    """
+    campos = campos or CAMPOS_EXPORTACAO
+    return [dict(zip(campos, linha)) for linha in linhas]
+
+
+def consulta_upsert():
+    """
+    INSERT ... ON CONFLICT (chave natural) DO UPDATE do dialeto em uso.
+
+    Executado com uma lista de linhas, vira um único comando por lote.
+    """
+    dialetos = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+    nome = db.engine.dialect.name
+    if nome not in dialetos:
+        raise NotImplementedError(f'Upsert não suportado no banco {nome}')
+
+    consulta = dialetos[nome](Equivalencia)
+    campos = CAMPOS_OBRIGATORIOS + ['ch_adm_horas', 'ch_equiv_horas', 'versao', 'atualizado_em']
+    atualizar = {campo: consulta.excluded[campo] for campo in campos if campo not in CHAVE_NATURAL}
+    return consulta.on_conflict_do_update(index_elements=CHAVE_NATURAL, set_=atualizar)
+
+
+def _registro(equivalencia):
+    return {coluna: getattr(equivalencia, coluna) for coluna in COLUNAS_REGISTRO}
+
+
+class RepositorioSQLAlchemy(RepositorioEquivalencias):
+    """Equivalências no banco do Flask-SQLAlchemy (PostgreSQL ou SQLite), uma transação por escrita"""
+
+    def versao(self):
+        return versao_catalogo()
+
+    def listar(self, filtros, limit=None, cursor=None, campos=None):
+        consulta = aplicar_filtros(select(*colunas_listagem(campos)), filtros)
+        if cursor is not None:
+            consulta = consulta.where(Equivalencia.id > cursor)
+        if limit is not None:
+            consulta = consulta.order_by(Equivalencia.id).limit(limit)
+        return dicionarios(db.session.execute(consulta), campos)
+
+    def buscar(self, termo, filtros, limit, offset, campos=None):
+        consulta = consulta_busca(termo)
+        if consulta is None:
+            return []
+        consulta = aplicar_filtros(consulta.with_only_columns(*colunas_listagem(campos)), filtros)
+        return dicionarios(db.session.execute(consulta.limit(limit).offset(offset)), campos)
+
+    def obter(self, id):
+        equivalencia = db.session.get(Equivalencia, id, options=[undefer(Equivalencia.justificativa)])
+        return equivalencia.to_dict() if equivalencia else None
+
+    def exportar(self, filtros, campos=None):
+        return registros_exportacao(aplicar_filtros(consulta_exportacao(campos or CAMPOS_EXPORTACAO), filtros))
+
+    def linhas(self, colunas):
+        return db.session.execute(select(*[getattr(Equivalencia, c) for c in colunas])).all()
+
+    def alteracoes(self, desde, campos=None, versao=None):
+        # Versão lida antes das linhas: tudo até ela já foi commitado (as escritas
+        # incrementam a versão com a linha do contador travada até o commit)
+        if versao is None:
+            versao = versao_catalogo()
+        consulta = (
+            select(*colunas_listagem(campos))
+            .where(Equivalencia.versao <= versao)
+            .order_by(Equivalencia.versao, Equivalencia.id)
+        )
+        if desde > 0:
+            # Com desde=0 vão todas as linhas, inclusive as anteriores ao feed (versão 0)
+            consulta = consulta.where(Equivalencia.versao > desde)
+        # Exclusões sempre, também com desde=0: quem guardou as linhas da versão 0
+        # precisa saber quais delas saíram depois
+        removidos = list(db.session.scalars(
+            select(EquivalenciaRemovida.id)
+            .where(EquivalenciaRemovida.versao > desde, EquivalenciaRemovida.versao <= versao)
+            .order_by(EquivalenciaRemovida.versao)
+        ))
+        return dicionarios(db.session.execute(consulta), campos), removidos, versao
+
+    def _escrever(self, operacao):
+        """
+        Incrementa a versão, executa a operação com ela e faz o commit; desfaz tudo em caso de erro.
+
+        A versão vem primeiro para que as linhas gravadas levem a versão da escrita
+        (feed de alterações).
+        """
+        try:
+            versao = incrementar_versao_catalogo()
+            resultado = operacao(versao)
+            db.session.commit()
+            return resultado, versao
+        except IntegrityError as e:
+            db.session.rollback()
+            if _violacao_unicidade(e):
+                raise ChaveDuplicada(str(e.orig)) from e
+            # NOT NULL e demais restrições: erro de validação que escapou, não chave repetida
+            raise
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def _gravar(equivalencia, versao):
+        equivalencia.versao = versao
+        db.session.add(equivalencia)
+        # Registro lido antes do commit, que expiraria o objeto e custaria um SELECT
+        db.session.flush()
+        return _registro(equivalencia)
+
+    def criar(self, valores):
+        equivalencia = Equivalencia(**{c: valores[c] for c in CAMPOS_OBRIGATORIOS})
+        return self._escrever(lambda versao: self._gravar(equivalencia, versao))
+
+    def atualizar(self, id, valores):
+        # O registro retornado inclui a justificativa: carregada no mesmo SELECT
+        equivalencia = db.session.get(Equivalencia, id, options=[undefer(Equivalencia.justificativa)])
+        if equivalencia is None:
+            return None, None
+        for campo in CAMPOS_OBRIGATORIOS:
+            if campo in valores:
+                setattr(equivalencia, campo, valores[campo])
+        return self._escrever(lambda versao: self._gravar(equivalencia, versao))
+
+    def remover(self, id):
+        equivalencia = db.session.get(Equivalencia, id)
+        if equivalencia is None:
+            return None
+
+        def excluir(versao):
+            db.session.delete(equivalencia)
+            # Lápide para o feed de alterações; merge porque o SQLite pode reaproveitar ids
+            db.session.merge(EquivalenciaRemovida(id=id, versao=versao, removido_em=datetime.utcnow()))
+
+        _, versao = self._escrever(excluir)
+        return versao
+
+    def gravar_lote(self, lote, upsert=False):
+        consulta = consulta_upsert() if upsert else insert(Equivalencia)
+        _, versao = self._escrever(lambda versao: db.session.execute(
+            consulta, [dict(valores, versao=versao) for valores in lote]
+        ))
+        return versao
+
+    def upsert(self, valores):
+        return self._escrever(lambda versao: db.session.execute(
+            consulta_upsert().returning(Equivalencia.id), [dict(valores, versao=versao)]
+        ).scalar())
@@ -0,0 +1,208 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.models.equivalencia import CHAVE_NATURAL
+from src.repositories.base import (
+    COLUNAS_REGISTRO, FILTROS_IGUALDADE, ChaveDuplicada, RepositorioEquivalencias, com_horas
+)
+from src.services.busca import CAMPOS_BUSCA, termos_busca
+from src.services.exportacao import CAMPOS_EXPORTACAO
+
+# Linhas por requisição nas leituras completas; não pode passar do max-rows do
+# PostgREST (1000 no Supabase), senão a paginação termina antes da hora
+LINHAS_POR_PAGINA = 1000
+
+# Código do PostgreSQL para violação de unicidade, repassado pelo PostgREST no 409
+VIOLACAO_UNICIDADE = '23505'
+
+
+class ErroSupabase(Exception):
+    """Resposta de erro da API REST do Supabase"""
+
+
+class RepositorioSupabase(RepositorioEquivalencias):
+    """
+    Equivalências na API REST (PostgREST) do Supabase, sem conexão direta com o Postgres.
+
+    Usa uma única requests.Session (conexões keep-alive reaproveitadas entre
+    requisições), grava lotes inteiros em um POST e pagina com o cabeçalho Range.
+    A versão do catálogo é incrementada por um gatilho na própria transação da
+    escrita (ver supabase-config.md), que a grava na coluna versao das linhas e
+    nas lápides: cada escrita é uma única chamada e lê a versão da resposta.
+    """
+
+    def __init__(self, url, chave, conexoes=10, timeout=10.0):
+        self.base = f"{url.rstrip('/')}/rest/v1"
+        self.timeout = timeout
+        self._http = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=conexoes)
+        self._http.mount('https://', adaptador)
+        self._http.mount('http://', adaptador)
+        self._http.headers.update({
+            'apikey': chave,
+            'Authorization': f'Bearer {chave}',
+            'Accept': 'application/json',
+        })
+
+    def _requisitar(self, metodo, caminho, params=None, json=None, headers=None):
+        resposta = self._http.request(metodo, f'{self.base}/{caminho}', params=params, json=json,
+                                      headers=headers, timeout=self.timeout)
+        if resposta.status_code >= 400:
+            try:
+                erro = resposta.json()
+            except ValueError:
+                erro = {'message': resposta.text}
+            if resposta.status_code == 409 and erro.get('code') == VIOLACAO_UNICIDADE:
+                raise ChaveDuplicada(erro.get('message'))
+            raise ErroSupabase(f"{resposta.status_code}: {erro.get('message')}")
+        return resposta
+
+    # Consultas
+
+    @staticmethod
+    def _filtros(filtros):
+        """Filtros no formato do PostgREST (campo=operador.valor)"""
+        if filtros.get('ch_ratio_min') is not None:
+            # O PostgREST não compara duas colunas entre si
+            raise ValueError('ch_ratio_min não é suportado pelo Supabase')
+        params = [(campo, f'eq.{filtros[campo]}') for campo in FILTROS_IGUALDADE if filtros.get(campo)]
+        if filtros.get('min_ch') is not None:
+            params.append(('ch_equiv_horas', f"gte.{filtros['min_ch']}"))
+        return params
+
+    def _intervalo(self, params, inicio, quantidade, tabela='equivalencias'):
+        """Uma janela de linhas pedida pelo cabeçalho Range (inclusivo, base 0)"""
+        return self._requisitar('GET', tabela, params=params, headers={
+            'Range-Unit': 'items',
+            'Range': f'{inicio}-{inicio + quantidade - 1}',
+        }).json()
+
+    def _paginas(self, colunas, filtros, cursor=None, extras=(), tabela='equivalencias'):
+        """
+        Todas as linhas por páginas de LINHAS_POR_PAGINA, avançando por id (keyset).
+
+        extras são condições já no formato do PostgREST, somadas aos filtros.
+        """
+        params = [('select', ','.join(colunas)), ('order', 'id.asc')] + self._filtros(filtros) + list(extras)
+        while True:
+            pagina = params + ([('id', f'gt.{cursor}')] if cursor is not None else [])
+            linhas = self._intervalo(pagina, 0, LINHAS_POR_PAGINA, tabela)
+            yield from linhas
+            if len(linhas) < LINHAS_POR_PAGINA:
+                return
+            cursor = linhas[-1]['id']
+
+    def versao(self):
+        linhas = self._requisitar('GET', 'catalogo_versao', params={
+            'select': 'versao', 'id': 'eq.1'
+        }).json()
+        return linhas[0]['versao'] if linhas else 0
+
+    # Leituras
+
+    def listar(self, filtros, limit=None, cursor=None, campos=None):
+        campos = campos or CAMPOS_EXPORTACAO
+        if limit is None:
+            return list(self._paginas(campos, filtros, cursor))
+        params = [('select', ','.join(campos)), ('order', 'id.asc')] + self._filtros(filtros)
+        if cursor is not None:
+            params.append(('id', f'gt.{cursor}'))
+        return self._intervalo(params, 0, limit)
+
+    def buscar(self, termo, filtros, limit, offset, campos=None):
+        """Busca por substring (ilike) em todos os termos; sem ranking nem insensibilidade a acentos"""
+        termos = termos_busca(termo)
+        if not termos:
+            return []
+        condicoes = ['or(' + ','.join(f'{campo}.ilike.*{t}*' for campo in CAMPOS_BUSCA) + ')'
+                     for t in termos]
+        params = [('select', ','.join(campos or CAMPOS_EXPORTACAO)), ('order', 'id.asc'),
+                  ('and', f"({','.join(condicoes)})")] + self._filtros(filtros)
+        return self._intervalo(params, offset, limit)
+
+    def obter(self, id):
+        linhas = self._requisitar('GET', 'equivalencias', params={
+            'select': ','.join(CAMPOS_EXPORTACAO), 'id': f'eq.{id}'
+        }).json()
+        return linhas[0] if linhas else None
+
+    def exportar(self, filtros, campos=None):
+        return self._paginas(campos or CAMPOS_EXPORTACAO, filtros)
+
+    def linhas(self, colunas):
+        return [tuple(linha[c] for c in colunas) for linha in self._paginas(colunas, {})]
+
+    def alteracoes(self, desde, campos=None, versao=None):
+        # Versão lida antes das linhas: o gatilho trava a linha do contador até o
+        # commit, então tudo com versão até ela já está gravado
+        if versao is None:
+            versao = self.versao()
+        intervalo = [('versao', f'lte.{versao}')]
+        if desde > 0:
+            # Com desde=0 vão todas as linhas, inclusive as anteriores ao feed (versão 0)
+            intervalo.append(('versao', f'gt.{desde}'))
+        registros = list(self._paginas(campos or CAMPOS_EXPORTACAO, {}, extras=intervalo))
+        # Exclusões sempre, também com desde=0 (ver RepositorioSQLAlchemy.alteracoes)
+        removidos = [linha['id'] for linha in self._paginas(
+            ['id'], {}, tabela='equivalencias_removidas',
+            extras=[('versao', f'gt.{desde}'), ('versao', f'lte.{versao}')]
+        )]
+        return registros, removidos, versao
+
+    # Escritas
+
+    @staticmethod
+    def _com_versao(linha):
+        """Separa a versão gravada pelo gatilho do restante do registro"""
+        linha = dict(linha)
+        return linha, linha.pop('versao')
+
+    def criar(self, valores):
+        linha = self._requisitar(
+            'POST', 'equivalencias', params={'select': ','.join(COLUNAS_REGISTRO + ['versao'])},
+            json=com_horas(valores), headers={'Prefer': 'return=representation'}
+        ).json()[0]
+        return self._com_versao(linha)
+
+    def atualizar(self, id, valores):
+        params = {'select': ','.join(COLUNAS_REGISTRO), 'id': f'eq.{id}'}
+        if not valores:
+            linhas = self._requisitar('GET', 'equivalencias', params=params).json()
+            return (linhas[0], self.versao()) if linhas else (None, None)
+
+        params['select'] += ',versao'
+        linhas = self._requisitar('PATCH', 'equivalencias', params=params, json=com_horas(valores),
+                                  headers={'Prefer': 'return=representation'}).json()
+        if not linhas:
+            return None, None
+        return self._com_versao(linhas[0])
+
+    def remover(self, id):
+        linhas = self._requisitar('DELETE', 'equivalencias', params={'select': 'id', 'id': f'eq.{id}'},
+                                  headers={'Prefer': 'return=representation'}).json()
+        if not linhas:
+            return None
+        # A linha devolvida é a excluída (versão antiga); a da exclusão está na lápide
+        lapides = self._requisitar('GET', 'equivalencias_removidas', params={
+            'select': 'versao', 'id': f'eq.{id}'
+        }).json()
+        return lapides[0]['versao']
+
+    def gravar_lote(self, lote, upsert=False):
+        params, prefer = {'select': 'versao'}, 'return=representation'
+        if upsert:
+            params['on_conflict'] = ','.join(CHAVE_NATURAL)
+            prefer = f'resolution=merge-duplicates,{prefer}'
+        linhas = self._requisitar('POST', 'equivalencias', params=params, json=lote,
+                                  headers={'Prefer': prefer}).json()
+        # Uma transação, uma versão para todas as linhas do lote
+        return linhas[0]['versao'] if linhas else self.versao()
+
+    def upsert(self, valores):
+        linhas = self._requisitar(
+            'POST', 'equivalencias',
+            params={'on_conflict': ','.join(CHAVE_NATURAL), 'select': 'id,versao'},
+            json=[com_horas(valores)],
+            headers={'Prefer': 'resolution=merge-duplicates,return=representation'}
+        ).json()
+        return linhas[0]['id'], linhas[0]['versao']
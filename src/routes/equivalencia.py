@@ -1,14 +1,33 @@
-from flask import Blueprint, request, jsonify, session
-from werkzeug.security import check_password_hash, generate_password_hash
-from src.models.equivalencia import db, Equivalencia, Admin
+from flask import Blueprint, Response, current_app, request, jsonify, session, stream_with_context
+from werkzeug.security import check_password_hash
+from src.models.equivalencia import Admin
+from src.repositories import ChaveDuplicada, repositorio
+from src.repositories.base import FILTROS_IGUALDADE
+from src.config.database import leitura_primario
+from src.services.aproveitamento import indice_aproveitamento
+from src.services.indices import propagar_alteracao
+from src.services.profiler import orcamento_consultas
+from src.services.exportacao import CAMPOS_EXPORTACAO, gerar_csv, gerar_ndjson
+from src.services.grafo import grafo_equivalencias
+from src.services.estatisticas import estatisticas_catalogo
+from src.services.importacao import importar_equivalencias, ler_csv, validar_alteracao, validar_linha
+from src.services.cache import CacheRespostas, cache_listagem, chave_consulta, etag_catalogo
+from src.services.compressao import comprimir_resposta
+from src.services.serializacao import json_bytes, resposta_json
+from src.services.eventos import (
+    CABECALHOS_STREAM, gerar_stream, inicio_stream, ler_ultimo_id, liberar_vaga_stream, publicar_alteracao,
+    publicar_resync, reservar_vaga_stream
+)
 import logging
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+# Logging configurado em src.config.logs (fila + JSON em segundo plano)
 logger = logging.getLogger(__name__)
 
 equivalencia_bp = Blueprint('equivalencia', __name__)
 
+ERRO_CHAVE_DUPLICADA = 'Já existe uma equivalência com este codigo_adm, codigo_equiv e curso_equiv'
+ERRO_NAO_ENCONTRADA = 'Equivalência não encontrada'
+
 # Rota para login do administrador - CORRIGIDA
 @equivalencia_bp.route('/login', methods=['POST'])
 def login():
@@ -21,7 +40,6 @@ def login():
             return jsonify({'error': 'Content-Type deve ser application/json'}), 400
         
         data = request.get_json()
-        logger.info(f"Dados recebidos: {data}")
         
         username = data.get('username')
         password = data.get('password')
@@ -30,21 +48,21 @@ def login():
             logger.error("Username ou password não fornecidos")
             return jsonify({'error': 'Username e password são obrigatórios'}), 400
         
-        logger.info(f"Tentando login para usuário: {username}")
+        logger.info("Tentando login para usuário: %s", username)
         admin = Admin.query.filter_by(username=username).first()
         
         if not admin:
-            logger.error(f"Usuário não encontrado: {username}")
+            logger.error("Usuário não encontrado: %s", username)
             return jsonify({'error': 'Credenciais inválidas'}), 401
         
         if not check_password_hash(admin.password_hash, password):
-            logger.error(f"Senha incorreta para usuário: {username}")
+            logger.error("Senha incorreta para usuário: %s", username)
             return jsonify({'error': 'Credenciais inválidas'}), 401
         
         # Login bem-sucedido
         session['admin_id'] = admin.id
         session['admin_username'] = admin.username
-        logger.info(f"Login bem-sucedido para usuário: {username}")
+        logger.info("Login bem-sucedido para usuário: %s", username)
         
         return jsonify({
             'message': 'Login realizado com sucesso', 
@@ -53,7 +71,7 @@ def login():
         }), 200
         
     except Exception as e:
-        logger.error(f"Erro no login: {str(e)}")
+        logger.error("Erro no login: %s", e)
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
 # Rota para logout - CORRIGIDA
@@ -64,7 +82,7 @@ def logout():
         session.clear()
         return jsonify({'message': 'Logout realizado com sucesso'}), 200
     except Exception as e:
-        logger.error(f"Erro no logout: {str(e)}")
+        logger.error("Erro no logout: %s", e)
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
 # Rota para verificar se está logado - CORRIGIDA
@@ -72,7 +90,7 @@ def logout():
 def check_auth():
     try:
         if 'admin_id' in session:
-            logger.info(f"Usuário autenticado: {session.get('admin_username')}")
+            logger.info("Usuário autenticado: %s", session.get('admin_username'))
             return jsonify({
                 'authenticated': True, 
                 'username': session.get('admin_username')
@@ -81,19 +99,429 @@ def check_auth():
             logger.info("Usuário não autenticado")
             return jsonify({'authenticated': False}), 200
     except Exception as e:
-        logger.error(f"Erro ao verificar autenticação: {str(e)}")
+        logger.error("Erro ao verificar autenticação: %s", e)
         return jsonify({'authenticated': False}), 200
 
-# Rota pública para listar todas as equivalências
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+
+def ler_filtros(args):
+    """
+    Lê os filtros da query string para o repositório.
+
+    Igualdade exata em FILTROS_IGUALDADE (curso_equiv, codigo_adm, codigo_equiv),
+    min_ch (horas mínimas da disciplina equivalente) e ch_ratio_min (ch_equiv / ch_adm
+    mínimo, ex.: 0.9). Lança ValueError se algum valor for inválido.
+    """
+    filtros = {campo: args[campo] for campo in FILTROS_IGUALDADE if args.get(campo)}
+
+    min_ch = args.get('min_ch')
+    if min_ch:
+        filtros['min_ch'] = int(min_ch)
+
+    ch_ratio_min = args.get('ch_ratio_min')
+    if ch_ratio_min:
+        filtros['ch_ratio_min'] = float(ch_ratio_min)
+    return filtros
+
+
+def ler_campos(args):
+    """
+    Lê a projeção fields= (campos separados por vírgula, ex.: fields=id,disciplina_adm).
+
+    Returns:
+        list: Campos pedidos na ordem de CAMPOS_EXPORTACAO, sempre com id (cursor e
+        detalhe dependem dele), ou None sem fields; lança ValueError se algum campo
+        não existir
+    """
+    valor = args.get('fields')
+    if not valor:
+        return None
+    pedidos = {campo.strip() for campo in valor.split(',') if campo.strip()}
+    invalidos = pedidos - set(CAMPOS_EXPORTACAO)
+    if invalidos:
+        raise ValueError(f"Campos inválidos: {', '.join(sorted(invalidos))}")
+    pedidos.add('id')
+    return [campo for campo in CAMPOS_EXPORTACAO if campo in pedidos]
+
+
+def parametros_paginacao(args):
+    """
+    Lê limit e cursor da query string.
+
+    Returns:
+        tuple: (limit, cursor) ou lança ValueError se algum parâmetro for inválido
+    """
+    limit = int(args.get('limit', LIMITE_PADRAO))
+    if limit < 1:
+        raise ValueError('limit deve ser maior que zero')
+    limit = min(limit, LIMITE_MAXIMO)
+
+    cursor = args.get('cursor')
+    cursor = int(cursor) if cursor else None
+    return limit, cursor
+
+
+def pagina_keyset(equivalencias, limit):
+    """Monta a página a partir de até limit + 1 equivalências ordenadas por id"""
+    tem_proxima = len(equivalencias) > limit
+    equivalencias = equivalencias[:limit]
+    return {
+        'items': equivalencias,
+        'next_cursor': str(equivalencias[-1]['id']) if tem_proxima else None,
+        'limit': limit
+    }
+
+
+def parametros_busca(args):
+    """
+    Lê limit e offset da busca textual.
+
+    Returns:
+        tuple: (limit, offset) ou lança ValueError se algum parâmetro for inválido
+    """
+    limit = min(int(args.get('limit', LIMITE_PADRAO)), LIMITE_MAXIMO)
+    offset = int(args.get('offset', 0))
+    if limit < 1 or offset < 0:
+        raise ValueError('limit e offset inválidos')
+    return limit, offset
+
+
+def pagina_busca(equivalencias, limit, offset):
+    """Monta a página da busca a partir de até limit + 1 resultados"""
+    return {
+        'items': equivalencias[:limit],
+        'limit': limit,
+        'offset': offset,
+        'next_offset': offset + limit if len(equivalencias) > limit else None
+    }
+
+
+def _listar_equivalencias(args):
+    """
+    Monta os dados da listagem.
+
+    Sem limit/cursor retorna a lista completa (formato antigo). Com limit ou cursor
+    retorna uma página por keyset em id: {'items', 'next_cursor', 'limit'}.
+    Com fields= retorna só os campos pedidos. Lança ValueError se os parâmetros de
+    paginação, filtros ou campos forem inválidos.
+    """
+    filtros = ler_filtros(args)
+    campos = ler_campos(args)
+
+    if 'limit' not in args and 'cursor' not in args:
+        equivalencias = repositorio.listar(filtros, campos=campos)
+        logger.info("Encontradas %d equivalências", len(equivalencias))
+        return equivalencias
+
+    limit, cursor = parametros_paginacao(args)
+
+    # Busca um registro a mais para saber se existe próxima página
+    return pagina_keyset(repositorio.listar(filtros, limit=limit + 1, cursor=cursor, campos=campos), limit)
+
+
+# Rota pública para listar as equivalências
 @equivalencia_bp.route('/equivalencias', methods=['GET'])
+@orcamento_consultas(2)
 def get_equivalencias():
+    """
+    Lista as equivalências com cache por versão do catálogo.
+
+    A resposta serializada fica em cache até a próxima escrita (junto com as versões
+    comprimidas já geradas), e o ETag permite que o navegador revalide com
+    If-None-Match e receba 304 sem corpo. X-Catalog-Version é o token para
+    continuar por /equivalencias/changes.
+    """
     try:
         logger.info("Buscando equivalências")
-        equivalencias = Equivalencia.query.all()
-        logger.info(f"Encontradas {len(equivalencias)} equivalências")
-        return jsonify([equiv.to_dict() for equiv in equivalencias]), 200
+        versao = repositorio.versao()
+        chave = chave_consulta(request.args)
+        etag = etag_catalogo(versao, chave)
+        item = None
+
+        if request.if_none_match.contains_weak(etag):
+            resposta = current_app.response_class(status=304)
+        else:
+            item = cache_listagem.obter(versao, chave)
+            if item is None:
+                try:
+                    dados = _listar_equivalencias(request.args)
+                except ValueError:
+                    return jsonify({'error': 'Parâmetros de consulta inválidos'}), 400
+                item = cache_listagem.guardar(versao, chave, json_bytes(dados), etag)
+            resposta = current_app.response_class(item.corpo, mimetype='application/json')
+
+        resposta.set_etag(etag)
+        resposta.headers['Cache-Control'] = 'no-cache'
+        resposta.headers['X-Catalog-Version'] = str(versao)
+        return comprimir_resposta(resposta, item)
+    except Exception as e:
+        logger.error("Erro ao buscar equivalências: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Respostas de /equivalencias/stats por versão do catálogo (poucas chaves: só varia top)
+cache_estatisticas = CacheRespostas(capacidade=16)
+ESTATISTICAS_TOP_PADRAO = 10
+ESTATISTICAS_TOP_MAXIMO = 100
+
+
+# Rota pública com as estatísticas do catálogo
+@equivalencia_bp.route('/equivalencias/stats', methods=['GET'])
+# Versão do catálogo + alterações e exclusões do feed quando o índice está atrasado
+@orcamento_consultas(3)
+def get_estatisticas():
+    """
+    Totais e cobertura de horas, geral e por curso_equiv, e os codigo_adm com mais
+    equivalências (?top=, padrão 10).
+
+    Os agregados são mantidos em memória a cada escrita (src.services.estatisticas)
+    e a resposta serializada fica em cache até a próxima versão do catálogo, com
+    ETag como a listagem: o custo não depende do tamanho do catálogo.
+    """
+    try:
+        top = int(request.args.get('top', ESTATISTICAS_TOP_PADRAO))
+        if top < 0:
+            raise ValueError('top negativo')
+    except ValueError:
+        return jsonify({'error': 'Parâmetros de consulta inválidos'}), 400
+    top = min(top, ESTATISTICAS_TOP_MAXIMO)
+
+    try:
+        # Versão do primário, a mesma base do índice (ver IndiceVersionado.atualizar)
+        with leitura_primario():
+            versao = repositorio.versao()
+        chave = f'stats?top={top}'
+        etag = etag_catalogo(versao, chave)
+        item = None
+
+        if request.if_none_match.contains_weak(etag):
+            resposta = current_app.response_class(status=304)
+        else:
+            item = cache_estatisticas.obter(versao, chave)
+            if item is None:
+                dados = estatisticas_catalogo.resumo(top, versao)
+                item = cache_estatisticas.guardar(versao, chave, json_bytes(dados), etag)
+            resposta = current_app.response_class(item.corpo, mimetype='application/json')
+
+        resposta.set_etag(etag)
+        resposta.headers['Cache-Control'] = 'no-cache'
+        resposta.headers['X-Catalog-Version'] = str(versao)
+        return comprimir_resposta(resposta, item)
+    except Exception as e:
+        logger.error("Erro ao calcular estatísticas: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Rota pública de busca textual, ordenada por relevância
+@equivalencia_bp.route('/equivalencias/search', methods=['GET'])
+@orcamento_consultas(1)
+def search_equivalencias():
+    """
+    Busca textual insensível a acentos nos nomes, códigos, curso e justificativa.
+
+    Retorna {'items', 'limit', 'offset', 'next_offset'}; aceita os mesmos filtros da listagem.
+    """
+    termo = request.args.get('q', '').strip()
+    if not termo:
+        return jsonify({'error': 'Parâmetro q é obrigatório'}), 400
+
+    try:
+        limit, offset = parametros_busca(request.args)
+        filtros = ler_filtros(request.args)
+        campos = ler_campos(request.args)
+    except ValueError:
+        return jsonify({'error': 'Parâmetros de consulta inválidos'}), 400
+
+    try:
+        equivalencias = repositorio.buscar(termo, filtros, limit + 1, offset, campos=campos)
+        return resposta_json(pagina_busca(equivalencias, limit, offset))
+    except Exception as e:
+        logger.error("Erro na busca de equivalências: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Formatos de exportação: (gerador, content type, extensão)
+FORMATOS_EXPORTACAO = {
+    'csv': (gerar_csv, 'text/csv; charset=utf-8', 'csv'),
+    'ndjson': (gerar_ndjson, 'application/x-ndjson; charset=utf-8', 'ndjson'),
+}
+
+
+# Rota pública para exportar as equivalências em streaming
+@equivalencia_bp.route('/equivalencias/export', methods=['GET'])
+def export_equivalencias():
+    """
+    Exporta as equivalências em CSV ou NDJSON sem montar a resposta em memória.
+
+    Aceita os mesmos filtros e a mesma projeção fields= da listagem; as linhas são
+    lidas do repositório em lotes e enviadas conforme são geradas.
+    """
+    formato = request.args.get('format', 'csv')
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({'error': 'Formato inválido. Use csv ou ndjson'}), 400
+
+    gerador, content_type, extensao = FORMATOS_EXPORTACAO[formato]
+    try:
+        campos = ler_campos(request.args) or CAMPOS_EXPORTACAO
+        registros = repositorio.exportar(ler_filtros(request.args), campos=campos)
+    except ValueError:
+        return jsonify({'error': 'Parâmetros de consulta inválidos'}), 400
+    logger.info("Exportando equivalências em %s", formato)
+
+    return Response(
+        stream_with_context(gerador(registros, campos=campos)),
+        content_type=content_type,
+        headers={'Content-Disposition': f'attachment; filename=equivalencias.{extensao}'}
+    )
+
+# Rota pública com as alterações desde um token, para sincronizar sem baixar tudo de novo
+@equivalencia_bp.route('/equivalencias/changes', methods=['GET'])
+@orcamento_consultas(3)
+def get_alteracoes():
+    """
+    Equivalências criadas, alteradas ou excluídas desde o token since (a versão do
+    catálogo, devolvida por esta rota e no cabeçalho X-Catalog-Version da listagem).
+
+    Retorna {'items', 'deleted', 'token'}; since=0 retorna todas. Aceita fields=.
+    Um token maior que a versão atual (banco recriado) responde 410 e o cliente
+    deve recarregar a listagem completa.
+    """
+    try:
+        desde = int(request.args.get('since', 0))
+        campos = ler_campos(request.args)
+        if desde < 0:
+            raise ValueError('since negativo')
+    except ValueError:
+        return jsonify({'error': 'Parâmetros de consulta inválidos'}), 400
+
+    try:
+        registros, removidos, versao = repositorio.alteracoes(desde, campos)
+    except NotImplementedError as e:
+        return jsonify({'error': str(e)}), 501
+    except Exception as e:
+        logger.error("Erro ao buscar alterações desde %s: %s", desde, e)
+        return jsonify({'error': str(e)}), 500
+
+    if desde > versao:
+        return jsonify({'error': 'Token de sincronização inválido; recarregue a listagem'}), 410
+    logger.info("Alterações desde %s: %d gravadas, %d removidas", desde, len(registros), len(removidos))
+    return resposta_json({'items': registros, 'deleted': removidos, 'token': str(versao)})
+
+# Segundos sugeridos ao cliente quando não há vaga de stream no worker
+RETRY_AFTER_STREAM = 30
+
+
+# Rota pública com os eventos do catálogo (Server-Sent Events)
+@equivalencia_bp.route('/equivalencias/stream', methods=['GET'])
+def stream_equivalencias():
+    """
+    Stream text/event-stream com um evento por escrita (ver src.services.eventos).
+
+    Retoma a partir do Last-Event-ID enviado pelo navegador na reconexão ou, na
+    primeira conexão, do last_event_id da query string (o X-Catalog-Version da
+    listagem). Neste app cada conexão ocupa uma thread até EVENTS_MAX_SECONDS, e
+    no máximo EVENTS_MAX_STREAMS por worker (depois disso, 503 com Retry-After);
+    no modo ASGI (padrão da imagem Docker) a mesma rota é atendida no event loop.
+    """
+    try:
+        ultimo = ler_ultimo_id(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID inválido'}), 400
+
+    if not reservar_vaga_stream():
+        logger.warning("Limite de streams de eventos do worker atingido")
+        resposta = jsonify({'error': 'Limite de conexões de eventos atingido; tente novamente'})
+        resposta.status_code = 503
+        resposta.headers['Retry-After'] = str(RETRY_AFTER_STREAM)
+        return resposta
+
+    broker = current_app.extensions['eventos']
+    try:
+        inicio, ultimo = inicio_stream(broker, ultimo, repositorio.versao)
+    except Exception as e:
+        liberar_vaga_stream()
+        logger.error("Erro ao iniciar o stream de eventos: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+    # Sem stream_with_context: a conexão do banco volta ao pool antes do stream começar
+    resposta = Response(gerar_stream(broker, inicio, ultimo), mimetype='text/event-stream',
+                        headers=CABECALHOS_STREAM)
+    # Chamado pelo servidor no fim do stream ou na desconexão do cliente
+    resposta.call_on_close(liberar_vaga_stream)
+    return resposta
+
+# Rota pública com uma equivalência completa (as listagens podem omitir a justificativa)
+@equivalencia_bp.route('/equivalencias/<int:id>', methods=['GET'])
+@orcamento_consultas(1)
+def get_equivalencia(id):
+    try:
+        equivalencia = repositorio.obter(id)
+        if equivalencia is None:
+            return jsonify({'error': ERRO_NAO_ENCONTRADA}), 404
+        return resposta_json(equivalencia)
+    except Exception as e:
+        logger.error("Erro ao buscar equivalência ID %s: %s", id, e)
+        return jsonify({'error': str(e)}), 500
+
+# Rota pública com o grafo de equivalências transitivas de um código
+@equivalencia_bp.route('/equivalencias/graph/<codigo>', methods=['GET'])
+# Versão do catálogo + alterações e exclusões do feed quando o índice está atrasado
+@orcamento_consultas(3)
+def get_grafo_equivalencias(codigo):
+    """
+    Componente conexo do código no grafo de equivalências e as cadeias mínimas
+    até cada disciplina dele. Com ?destino=<codigo> retorna só a cadeia até o destino.
+    """
+    try:
+        # Versão do primário, a mesma base do índice (ver IndiceVersionado.atualizar)
+        with leitura_primario():
+            versao = repositorio.versao()
+        resultado = grafo_equivalencias.consultar(codigo, request.args.get('destino'), versao)
+        if resultado is None:
+            return jsonify({'error': f'Código {codigo} não encontrado'}), 404
+        return jsonify(resultado), 200
+    except Exception as e:
+        logger.error("Erro ao consultar grafo de equivalências: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Máximo de disciplinas por histórico conferido
+MAXIMO_DISCIPLINAS_MATCH = 1000
+
+
+# Rota pública para conferir um histórico escolar contra o catálogo
+@equivalencia_bp.route('/match', methods=['POST'])
+# Versão do catálogo + alterações e exclusões do feed quando o índice está atrasado
+@orcamento_consultas(3)
+def match_historico():
+    """
+    Confere uma lista de disciplinas cursadas ({codigo, carga_horaria}) de uma vez.
+
+    Para cada código retorna as disciplinas de ADM que ele satisfaz e se a carga
+    horária cobre a de ADM, além das disciplinas sem equivalência cadastrada.
+    """
+    data = request.get_json(silent=True)
+    disciplinas = data.get('disciplinas') if isinstance(data, dict) else data
+
+    if not isinstance(disciplinas, list):
+        return jsonify({'error': 'Envie uma lista de disciplinas {codigo, carga_horaria}'}), 400
+    if len(disciplinas) > MAXIMO_DISCIPLINAS_MATCH:
+        return jsonify({'error': f'Máximo de {MAXIMO_DISCIPLINAS_MATCH} disciplinas por consulta'}), 400
+    for indice, disciplina in enumerate(disciplinas):
+        if not isinstance(disciplina, dict):
+            return jsonify({'error': f'Disciplina {indice} deve ser um objeto'}), 400
+        codigo = disciplina.get('codigo')
+        if not isinstance(codigo, str) or not codigo.strip():
+            return jsonify({'error': f'Disciplina {indice}: codigo deve ser um texto não vazio'}), 400
+        carga_horaria = disciplina.get('carga_horaria')
+        if carga_horaria is not None and (isinstance(carga_horaria, bool)
+                                          or not isinstance(carga_horaria, (str, int, float))):
+            return jsonify({'error': f'Disciplina {indice}: carga_horaria deve ser texto ou número'}), 400
+
+    try:
+        with leitura_primario():
+            versao = repositorio.versao()
+        return jsonify(indice_aproveitamento.conferir(disciplinas, versao)), 200
     except Exception as e:
-        logger.error(f"Erro ao buscar equivalências: {str(e)}")
+        logger.error("Erro ao conferir histórico: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # Rota protegida para criar nova equivalência
@@ -105,36 +533,122 @@ def create_equivalencia():
     
     try:
         data = request.get_json()
-        logger.info(f"Criando nova equivalência: {data}")
+        logger.info("Criando nova equivalência", extra={'campos': sorted(data or {})})
         
         # Validação dos campos obrigatórios
-        required_fields = ['disciplina_adm', 'codigo_adm', 'ch_adm', 'disciplina_equiv', 
-                          'codigo_equiv', 'curso_equiv', 'ch_equiv', 'justificativa']
-        
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'Campo {field} é obrigatório'}), 400
+        valores, erro = validar_linha(data)
+        if erro:
+            return jsonify({'error': erro}), 400
         
-        nova_equivalencia = Equivalencia(
-            disciplina_adm=data['disciplina_adm'],
-            codigo_adm=data['codigo_adm'],
-            ch_adm=data['ch_adm'],
-            disciplina_equiv=data['disciplina_equiv'],
-            codigo_equiv=data['codigo_equiv'],
-            curso_equiv=data['curso_equiv'],
-            ch_equiv=data['ch_equiv'],
-            justificativa=data['justificativa']
-        )
+        registro, versao = repositorio.criar(valores)
+        propagar_alteracao(versao, gravados=[registro])
+        publicar_alteracao(versao, gravados=[registro])
         
-        db.session.add(nova_equivalencia)
-        db.session.commit()
-        
-        logger.info(f"Equivalência criada com sucesso: ID {nova_equivalencia.id}")
-        return jsonify({'message': 'Equivalência criada com sucesso', 'id': nova_equivalencia.id}), 201
+        logger.info("Equivalência criada com sucesso: ID %s", registro['id'])
+        return jsonify({'message': 'Equivalência criada com sucesso', 'id': registro['id']}), 201
         
+    except ChaveDuplicada:
+        return jsonify({'error': ERRO_CHAVE_DUPLICADA}), 409
+    except Exception as e:
+        logger.error("Erro ao criar equivalência: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Tamanho de lote da importação em massa
+LOTE_IMPORTACAO_PADRAO = 1000
+LOTE_IMPORTACAO_MAXIMO = 10000
+
+
+def _tamanho_lote(args):
+    """Lê chunk_size da query string, lança ValueError se inválido"""
+    tamanho_lote = int(args.get('chunk_size', LOTE_IMPORTACAO_PADRAO))
+    if tamanho_lote < 1:
+        raise ValueError('chunk_size deve ser maior que zero')
+    return min(tamanho_lote, LOTE_IMPORTACAO_MAXIMO)
+
+
+# Rota protegida para importação em massa
+@equivalencia_bp.route('/equivalencias/bulk', methods=['POST'])
+def bulk_create_equivalencias():
+    """
+    Importa muitas equivalências de uma vez (JSON array ou CSV).
+
+    As linhas válidas são inseridas em lotes de chunk_size, um INSERT e um commit
+    por lote; a resposta lista as linhas rejeitadas pelo índice (0-based).
+    Com upsert=1, linhas com chave natural já cadastrada são atualizadas.
+    """
+    if 'admin_id' not in session:
+        logger.warning("Tentativa de importação sem autenticação")
+        return jsonify({'error': 'Acesso negado. Login necessário.'}), 401
+
+    try:
+        tamanho_lote = _tamanho_lote(request.args)
+    except ValueError:
+        return jsonify({'error': 'Parâmetro chunk_size inválido'}), 400
+    upsert = request.args.get('upsert') in ('1', 'true')
+
+    try:
+        if request.is_json:
+            linhas = request.get_json(silent=True)
+        elif 'arquivo' in request.files:
+            linhas = ler_csv(request.files['arquivo'].read().decode('utf-8-sig'))
+        elif request.mimetype == 'text/csv':
+            linhas = ler_csv(request.get_data(as_text=True))
+        else:
+            return jsonify({'error': 'Envie um JSON array ou um CSV'}), 400
+
+        if not isinstance(linhas, list):
+            return jsonify({'error': 'O corpo deve ser uma lista de equivalências'}), 400
+
+        relatorio = importar_equivalencias(linhas, tamanho_lote, upsert=upsert)
+        if relatorio['lotes']:
+            # Um evento só para a importação inteira, sem as linhas
+            publicar_resync(repositorio.versao())
+        logger.info("Importação concluída: %d linhas rejeitadas em %d lotes",
+                    len(relatorio['rejeitadas']), relatorio['lotes'])
+        return jsonify(relatorio), 200
+    except UnicodeDecodeError:
+        return jsonify({'error': 'O arquivo CSV deve estar em UTF-8'}), 400
+    except Exception as e:
+        logger.error("Erro na importação em massa: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Rota protegida para criar ou atualizar pela chave natural
+@equivalencia_bp.route('/equivalencias/by-key', methods=['PUT'])
+def upsert_equivalencias():
+    """
+    Cria ou atualiza equivalências pela chave (codigo_adm, codigo_equiv, curso_equiv).
+
+    Aceita um objeto (retorna o id gravado) ou uma lista (gravada em lotes de
+    chunk_size com INSERT ... ON CONFLICT DO UPDATE, retorna o relatório da importação).
+    """
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Acesso negado. Login necessário.'}), 401
+
+    data = request.get_json(silent=True)
+    try:
+        if isinstance(data, list):
+            try:
+                tamanho_lote = _tamanho_lote(request.args)
+            except ValueError:
+                return jsonify({'error': 'Parâmetro chunk_size inválido'}), 400
+            relatorio = importar_equivalencias(data, tamanho_lote, upsert=True)
+            if relatorio['lotes']:
+                publicar_resync(repositorio.versao())
+            logger.info("Upsert em lote concluído: %d gravadas", relatorio['gravadas'])
+            return jsonify(relatorio), 200
+
+        valores, erro = validar_linha(data)
+        if erro:
+            return jsonify({'error': erro}), 400
+
+        id_gravado, versao = repositorio.upsert(valores)
+        # Sem o registro completo aqui: os clientes buscam a linha pelo feed
+        publicar_resync(versao)
+        logger.info("Equivalência gravada pela chave natural: ID %s", id_gravado)
+        return jsonify({'message': 'Equivalência gravada com sucesso', 'id': id_gravado}), 200
+
     except Exception as e:
-        db.session.rollback()
-        logger.error(f"Erro ao criar equivalência: {str(e)}")
+        logger.error("Erro no upsert de equivalências: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # Rota protegida para atualizar equivalência
@@ -144,37 +658,28 @@ def update_equivalencia(id):
         return jsonify({'error': 'Acesso negado. Login necessário.'}), 401
     
     try:
-        equivalencia = Equivalencia.query.get_or_404(id)
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        
+        logger.info("Atualizando equivalência ID %s", id,
+                    extra={'campos': sorted(data) if isinstance(data, dict) else []})
+        
+        # Atualizar campos se fornecidos, com as mesmas regras da criação
+        valores, erro = validar_alteracao(data)
+        if erro:
+            return jsonify({'error': erro}), 400
+        registro, versao = repositorio.atualizar(id, valores)
+        if registro is None:
+            return jsonify({'error': ERRO_NAO_ENCONTRADA}), 404
+        propagar_alteracao(versao, gravados=[registro])
+        publicar_alteracao(versao, gravados=[registro])
         
-        logger.info(f"Atualizando equivalência ID {id}: {data}")
-        
-        # Atualizar campos se fornecidos
-        if 'disciplina_adm' in data:
-            equivalencia.disciplina_adm = data['disciplina_adm']
-        if 'codigo_adm' in data:
-            equivalencia.codigo_adm = data['codigo_adm']
-        if 'ch_adm' in data:
-            equivalencia.ch_adm = data['ch_adm']
-        if 'disciplina_equiv' in data:
-            equivalencia.disciplina_equiv = data['disciplina_equiv']
-        if 'codigo_equiv' in data:
-            equivalencia.codigo_equiv = data['codigo_equiv']
-        if 'curso_equiv' in data:
-            equivalencia.curso_equiv = data['curso_equiv']
-        if 'ch_equiv' in data:
-            equivalencia.ch_equiv = data['ch_equiv']
-        if 'justificativa' in data:
-            equivalencia.justificativa = data['justificativa']
-        
-        db.session.commit()
-        
-        logger.info(f"Equivalência ID {id} atualizada com sucesso")
+        logger.info("Equivalência ID %s atualizada com sucesso", id)
         return jsonify({'message': 'Equivalência atualizada com sucesso'}), 200
         
+    except ChaveDuplicada:
+        return jsonify({'error': ERRO_CHAVE_DUPLICADA}), 409
     except Exception as e:
-        db.session.rollback()
-        logger.error(f"Erro ao atualizar equivalência ID {id}: {str(e)}")
+        logger.error("Erro ao atualizar equivalência ID %s: %s", id, e)
         return jsonify({'error': str(e)}), 500
 
 # Rota protegida para deletar equivalência
@@ -184,15 +689,16 @@ def delete_equivalencia(id):
         return jsonify({'error': 'Acesso negado. Login necessário.'}), 401
     
     try:
-        equivalencia = Equivalencia.query.get_or_404(id)
-        db.session.delete(equivalencia)
-        db.session.commit()
+        versao = repositorio.remover(id)
+        if versao is None:
+            return jsonify({'error': ERRO_NAO_ENCONTRADA}), 404
+        propagar_alteracao(versao, removidos=[id])
+        publicar_alteracao(versao, removidos=[id])
         
-        logger.info(f"Equivalência ID {id} deletada com sucesso")
+        logger.info("Equivalência ID %s deletada com sucesso", id)
         return jsonify({'message': 'Equivalência deletada com sucesso'}), 200
         
     except Exception as e:
-        db.session.rollback()
-        logger.error(f"Erro ao deletar equivalência ID {id}: {str(e)}")
+        logger.error("Erro ao deletar equivalência ID %s: %s", id, e)
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,115 @@
+from src.models.equivalencia import extrair_horas
+from src.services.grafo import normalizar_codigo
+from src.services.indices import IndiceVersionado, registrar_indice
+
+
+def _cobre(horas, horas_adm):
+    if horas is None or horas_adm is None:
+        return None
+    return horas >= horas_adm
+
+
+class IndiceAproveitamento(IndiceVersionado):
+    """
+    Índice hash das equivalências por codigo_equiv, para conferir históricos escolares
+    inteiros sem consultar o banco por disciplina.
+    """
+
+    COLUNAS = ['id', 'codigo_equiv', 'disciplina_equiv', 'curso_equiv', 'ch_equiv', 'ch_equiv_horas',
+               'codigo_adm', 'disciplina_adm', 'ch_adm', 'ch_adm_horas']
+
+    def __init__(self):
+        super().__init__()
+        self._limpar()
+
+    def _limpar(self):
+        # codigo_equiv normalizado -> {id: equivalência}
+        self._por_codigo = {}
+        # id -> codigo_equiv normalizado
+        self._codigos = {}
+
+    def _adicionar(self, linha):
+        (id, codigo_equiv, disciplina_equiv, curso_equiv, ch_equiv, ch_equiv_horas,
+         codigo_adm, disciplina_adm, ch_adm, ch_adm_horas) = linha
+        codigo = normalizar_codigo(codigo_equiv)
+        self._codigos[id] = codigo
+        self._por_codigo.setdefault(codigo, {})[id] = {
+            'id': id,
+            'codigo_adm': codigo_adm,
+            'disciplina_adm': disciplina_adm,
+            'ch_adm': ch_adm,
+            'codigo_equiv': codigo_equiv,
+            'disciplina_equiv': disciplina_equiv,
+            'curso_equiv': curso_equiv,
+            'ch_equiv': ch_equiv,
+            'horas_adm': ch_adm_horas,
+            'horas_equiv': ch_equiv_horas,
+        }
+
+    def _remover(self, id):
+        codigo = self._codigos.pop(id, None)
+        if codigo is None:
+            return
+        equivalencias = self._por_codigo[codigo]
+        equivalencias.pop(id, None)
+        if not equivalencias:
+            del self._por_codigo[codigo]
+
+    def conferir(self, disciplinas, versao=None):
+        """
+        Confere as disciplinas cursadas pelo aluno contra o catálogo.
+
+        Args:
+            disciplinas (list): [{'codigo', 'carga_horaria'}], carga_horaria opcional
+            versao (int): Versão do catálogo já lida pela rota, se houver
+
+        Returns:
+            dict: {'resultados', 'nao_encontradas', 'disciplinas_adm'}
+        """
+        self.atualizar(versao)
+        resultados = []
+        nao_encontradas = []
+        disciplinas_adm = {}
+
+        with self._lock:
+            for disciplina in disciplinas:
+                codigo = disciplina.get('codigo')
+                carga_horaria = disciplina.get('carga_horaria')
+                horas_aluno = extrair_horas(carga_horaria)
+                encontradas = self._por_codigo.get(normalizar_codigo(codigo))
+
+                if not encontradas:
+                    nao_encontradas.append({'codigo': codigo, 'carga_horaria': carga_horaria})
+                    continue
+
+                equivalencias = []
+                for equiv in encontradas.values():
+                    equivalencias.append({
+                        'id': equiv['id'],
+                        'codigo_adm': equiv['codigo_adm'],
+                        'disciplina_adm': equiv['disciplina_adm'],
+                        'ch_adm': equiv['ch_adm'],
+                        'curso_equiv': equiv['curso_equiv'],
+                        'ch_equiv': equiv['ch_equiv'],
+                        # A carga horária cadastrada da disciplina externa cobre a de ADM?
+                        'ch_equiv_cobre': _cobre(equiv['horas_equiv'], equiv['horas_adm']),
+                        # A carga horária informada no histórico cobre a de ADM?
+                        'ch_aluno_cobre': _cobre(horas_aluno, equiv['horas_adm']),
+                    })
+                    disciplinas_adm[equiv['codigo_adm']] = equiv['disciplina_adm']
+
+                resultados.append({
+                    'codigo': codigo,
+                    'carga_horaria': carga_horaria,
+                    'equivalencias': equivalencias
+                })
+
+        return {
+            'resultados': resultados,
+            'nao_encontradas': nao_encontradas,
+            'disciplinas_adm': [{'codigo_adm': c, 'disciplina_adm': d}
+                                for c, d in sorted(disciplinas_adm.items())]
+        }
+
+
+indice_aproveitamento = registrar_indice(IndiceAproveitamento())
@@ -0,0 +1,139 @@
+import re
+
+from sqlalchemy import and_, column, func, literal_column, or_, select, table
+
+from src.models.equivalencia import db, Equivalencia
+
+# Campos indexados para a busca textual, na ordem das colunas do índice
+CAMPOS_BUSCA = ['disciplina_adm', 'codigo_adm', 'disciplina_equiv',
+                'codigo_equiv', 'curso_equiv', 'justificativa']
+
+# Pesos do bm25 (SQLite) por coluna: nomes e códigos valem mais que a justificativa
+PESOS_BM25 = [10.0, 10.0, 10.0, 10.0, 4.0, 1.0]
+
+# Documento indexado no PostgreSQL. A mesma expressão é usada no índice GIN e na
+# consulta, para que o planner use o índice.
+DOCUMENTO_PG = (
+    "setweight(to_tsvector('portuguese', equivalencias_unaccent("
+    "coalesce(disciplina_adm, '') || ' ' || coalesce(codigo_adm, '') || ' ' || "
+    "coalesce(disciplina_equiv, '') || ' ' || coalesce(codigo_equiv, ''))), 'A') || "
+    "setweight(to_tsvector('portuguese', equivalencias_unaccent(coalesce(curso_equiv, ''))), 'B') || "
+    "setweight(to_tsvector('portuguese', equivalencias_unaccent(coalesce(justificativa, ''))), 'C')"
+)
+
+
+def _dialeto():
+    return db.engine.dialect.name
+
+
+def termos_busca(consulta):
+    """Quebra a consulta em palavras, descartando pontuação e operadores"""
+    termos = re.findall(r'\w+', consulta.lower())
+    longos = [t for t in termos if len(t) > 1]
+    return longos or termos
+
+
+def _criar_indice_sqlite(conn):
+    existe = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'equivalencias_fts'"
+    ).first()
+    if existe:
+        return
+
+    colunas = ', '.join(CAMPOS_BUSCA)
+    novos = ', '.join(f'new.{c}' for c in CAMPOS_BUSCA)
+    antigos = ', '.join(f'old.{c}' for c in CAMPOS_BUSCA)
+
+    # Tabela FTS5 de conteúdo externo: guarda só o índice, o texto fica em equivalencias.
+    # remove_diacritics faz "Introdução" casar com "introducao".
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE equivalencias_fts USING fts5({colunas}, "
+        "content='equivalencias', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS equivalencias_fts_ai AFTER INSERT ON equivalencias BEGIN "
+        f"INSERT INTO equivalencias_fts(rowid, {colunas}) VALUES (new.id, {novos}); END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS equivalencias_fts_ad AFTER DELETE ON equivalencias BEGIN "
+        f"INSERT INTO equivalencias_fts(equivalencias_fts, rowid, {colunas}) "
+        f"VALUES ('delete', old.id, {antigos}); END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS equivalencias_fts_au AFTER UPDATE ON equivalencias BEGIN "
+        f"INSERT INTO equivalencias_fts(equivalencias_fts, rowid, {colunas}) "
+        f"VALUES ('delete', old.id, {antigos}); "
+        f"INSERT INTO equivalencias_fts(rowid, {colunas}) VALUES (new.id, {novos}); END"
+    )
+    # Indexa as linhas que já existiam antes da criação do índice
+    conn.exec_driver_sql("INSERT INTO equivalencias_fts(equivalencias_fts) VALUES ('rebuild')")
+
+
+def _criar_indice_postgres(conn):
+    conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() não é IMMUTABLE e por isso não pode ser usada direto em um índice;
+    # o wrapper com dicionário explícito pode
+    conn.exec_driver_sql(
+        "CREATE OR REPLACE FUNCTION equivalencias_unaccent(text) RETURNS text AS "
+        "$$ SELECT public.unaccent('public.unaccent', $1) $$ "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_equivalencias_busca ON equivalencias "
+        f"USING GIN (({DOCUMENTO_PG}))"
+    )
+
+
+def criar_indice_busca():
+    """Cria (se necessário) o índice de busca textual do dialeto em uso"""
+    with db.engine.begin() as conn:
+        if _dialeto() == 'sqlite':
+            _criar_indice_sqlite(conn)
+        elif _dialeto() == 'postgresql':
+            _criar_indice_postgres(conn)
+
+
+def consulta_busca(consulta, dialeto=None):
+    """
+    Monta a consulta de busca textual ordenada por relevância.
+
+    Args:
+        consulta (str): Texto digitado pelo usuário
+        dialeto (str): Nome do dialeto; padrão o do engine do Flask-SQLAlchemy
+
+    Returns:
+        Select: Consulta de Equivalencia, ou None se não houver termos pesquisáveis
+    """
+    termos = termos_busca(consulta)
+    if not termos:
+        return None
+    dialeto = dialeto or _dialeto()
+
+    if dialeto == 'sqlite':
+        # Cada termo vira um prefixo entre aspas ("termo"*), combinados com AND
+        expressao = ' '.join(f'"{t}"*' for t in termos)
+        fts = table('equivalencias_fts', column('rowid'))
+        tabela_fts = literal_column('equivalencias_fts')
+        return (
+            select(Equivalencia)
+            .join(fts, fts.c.rowid == Equivalencia.id)
+            .where(tabela_fts.op('MATCH')(expressao))
+            .order_by(func.bm25(tabela_fts, *PESOS_BM25), Equivalencia.id)
+        )
+
+    if dialeto == 'postgresql':
+        expressao = ' & '.join(f'{t}:*' for t in termos)
+        documento = literal_column(f'({DOCUMENTO_PG})')
+        tsquery = func.to_tsquery(literal_column("'portuguese'"),
+                                  func.equivalencias_unaccent(expressao))
+        return (
+            select(Equivalencia)
+            .where(documento.op('@@')(tsquery))
+            .order_by(func.ts_rank(documento, tsquery).desc(), Equivalencia.id)
+        )
+
+    # Outros bancos: sem índice textual, busca simples por substring
+    condicoes = [or_(*[getattr(Equivalencia, campo).ilike(f'%{termo}%') for campo in CAMPOS_BUSCA])
+                 for termo in termos]
+    return select(Equivalencia).where(and_(*condicoes)).order_by(Equivalencia.id)
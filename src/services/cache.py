@@ -0,0 +1,103 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import select, update
+
+from src.models.equivalencia import db, CatalogoVersao
+
+# Linha única da tabela catalogo_versao
+ID_VERSAO = 1
+
+# comprimidos: codificação -> corpo comprimido, preenchido sob demanda (ver src.services.compressao)
+RespostaCacheada = namedtuple('RespostaCacheada', ['corpo', 'etag', 'comprimidos'])
+
+
+def versao_catalogo():
+    """Retorna a versão atual do catálogo (consulta por chave primária, barata)"""
+    versao = db.session.execute(
+        select(CatalogoVersao.versao).where(CatalogoVersao.id == ID_VERSAO)
+    ).scalar()
+    return versao or 0
+
+
+def incrementar_versao_catalogo():
+    """
+    Incrementa a versão do catálogo na transação corrente.
+
+    Deve ser chamada antes do commit de qualquer escrita em equivalencias, para que
+    todos os workers enxerguem a nova versão junto com os dados.
+
+    Returns:
+        int: Nova versão
+    """
+    versao = db.session.execute(
+        update(CatalogoVersao)
+        .where(CatalogoVersao.id == ID_VERSAO)
+        .values(versao=CatalogoVersao.versao + 1)
+        .returning(CatalogoVersao.versao)
+    ).scalar()
+    if versao is None:
+        db.session.add(CatalogoVersao(id=ID_VERSAO, versao=1))
+        versao = 1
+    return versao
+
+
+def etag_catalogo(versao, chave):
+    """ETag determinística (igual em todos os workers) para uma versão e uma chave de consulta"""
+    resumo = hashlib.sha1(chave.encode('utf-8')).hexdigest()[:16]
+    return f'v{versao}-{resumo}'
+
+
+def chave_consulta(args):
+    """Normaliza a query string para usar como chave de cache"""
+    return '&'.join(f'{k}={v}' for k, v in sorted(args.items(multi=True)))
+
+
+class CacheRespostas:
+    """
+    Cache em memória de respostas serializadas, válido para uma única versão do catálogo.
+
+    Ao observar uma versão nova, todas as entradas antigas são descartadas. A versão
+    vem do banco, então cada worker invalida o próprio cache quando qualquer outro
+    worker grava.
+    """
+
+    def __init__(self, capacidade=256):
+        self.capacidade = capacidade
+        self._versao = None
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, versao, chave):
+        with self._lock:
+            if versao != self._versao:
+                return None
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+            return item
+
+    def guardar(self, versao, chave, corpo, etag):
+        item = RespostaCacheada(corpo, etag, {})
+        with self._lock:
+            if self._versao is not None and versao < self._versao:
+                # Resposta montada com dados mais antigos que o cache atual
+                return item
+            if versao != self._versao:
+                self._itens.clear()
+                self._versao = versao
+            self._itens[chave] = item
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+        return item
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._versao = None
+
+
+# Cache da listagem pública de equivalências
+cache_listagem = CacheRespostas()
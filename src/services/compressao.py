@@ -0,0 +1,139 @@
+"""
+Compressão das respostas JSON da API, negociada pelo Accept-Encoding.
+
+Respostas a partir de COMPRESSION_MIN_BYTES vão em brotli (se o pacote estiver
+instalado) ou gzip, conforme o que o cliente aceitar. Streaming (exportação) e
+respostas já codificadas não são tocadas.
+
+Corpos em cache (cache_listagem) guardam as versões comprimidas junto com o
+corpo original: cada corpo é comprimido no máximo uma vez por codificação
+enquanto a versão do catálogo não mudar.
+"""
+
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só há gzip
+    brotli = None
+
+# Tipos comprimidos (o resto da API é pequeno ou já vem comprimido, como os estáticos)
+TIPOS_COMPRIMIVEIS = ('application/json',)
+
+
+class ConfiguracaoCompressao:
+    """Configuração da compressão, lida das variáveis de ambiente em init_compressao()"""
+
+    def __init__(self):
+        self.ativa = True
+        self.tamanho_minimo = 1024
+        self.nivel_gzip = 6
+        self.qualidade_brotli = 4
+
+
+config = ConfiguracaoCompressao()
+
+
+def codificacoes():
+    """Codificações disponíveis, na ordem de preferência do servidor"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def escolher_codificacao(aceitas):
+    """
+    Melhor codificação aceita pelo cliente, ou None.
+
+    Args:
+        aceitas: Accept-Encoding já interpretado (werkzeug Accept, como request.accept_encodings)
+    """
+    for codificacao in codificacoes():
+        if aceitas[codificacao]:
+            return codificacao
+    return None
+
+
+def comprimir(corpo, codificacao):
+    if codificacao == 'br':
+        return brotli.compress(corpo, quality=config.qualidade_brotli)
+    return gzip.compress(corpo, compresslevel=config.nivel_gzip, mtime=0)
+
+
+def corpo_comprimido(corpo, codificacao, cacheado=None):
+    """
+    Corpo comprimido; com um item de cache_listagem reaproveita (e guarda) a versão pronta.
+
+    Duas threads podem comprimir o mesmo item ao mesmo tempo; o resultado é igual e
+    a última gravação vence, sem necessidade de lock.
+    """
+    if cacheado is None:
+        return comprimir(corpo, codificacao)
+    comprimido = cacheado.comprimidos.get(codificacao)
+    if comprimido is None:
+        comprimido = comprimir(corpo, codificacao)
+        cacheado.comprimidos[codificacao] = comprimido
+    return comprimido
+
+
+def negociar(corpo, aceitas, cacheado=None):
+    """
+    Corpo a enviar e a codificação usada (None se não comprimido).
+
+    Abaixo do tamanho mínimo, ou sem codificação em comum, o corpo vai como está.
+    """
+    if not config.ativa or len(corpo) < config.tamanho_minimo:
+        return corpo, None
+    codificacao = escolher_codificacao(aceitas)
+    if codificacao is None:
+        return corpo, None
+    return corpo_comprimido(corpo, codificacao, cacheado), codificacao
+
+
+def comprimir_resposta(response, cacheado=None):
+    """
+    Comprime uma resposta Flask já montada, se o tipo, o tamanho e o cliente permitirem.
+
+    O ETag passa a ser fraco quando o corpo é comprimido (como faz o nginx): continua
+    valendo para If-None-Match, mas não identifica os bytes de uma codificação só.
+    """
+    if (response.mimetype not in TIPOS_COMPRIMIVEIS or response.direct_passthrough
+            or response.is_streamed or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if response.status_code != 200:
+        return response
+
+    corpo, codificacao = negociar(response.get_data(), request.accept_encodings, cacheado)
+    if codificacao is not None:
+        response.set_data(corpo)
+        response.headers['Content-Encoding'] = codificacao
+        etag, fraco = response.get_etag()
+        if etag and not fraco:
+            response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compressao(app):
+    """
+    Comprime as respostas JSON do app.
+
+    Deve ser registrada depois de init_metricas, para que as métricas vejam o
+    tamanho enviado (os after_request rodam na ordem inversa do registro).
+
+    Variáveis de ambiente:
+        COMPRESSION: 0 desliga a compressão (padrão 1)
+        COMPRESSION_MIN_BYTES: tamanho mínimo do corpo para comprimir (padrão 1024)
+        COMPRESSION_GZIP_LEVEL: nível do gzip, 1 a 9 (padrão 6)
+        COMPRESSION_BROTLI_QUALITY: qualidade do brotli, 0 a 11 (padrão 4)
+    """
+    config.ativa = os.getenv('COMPRESSION', '1') != '0'
+    config.tamanho_minimo = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+    config.nivel_gzip = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+    config.qualidade_brotli = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+
+    @app.after_request
+    def _comprimir(response):
+        return comprimir_resposta(response)
@@ -0,0 +1,229 @@
+"""
+Arquivos estáticos pré-processados: nomes com hash do conteúdo, variantes gzip e
+brotli e um manifesto carregado uma vez na inicialização.
+
+Build (uma vez por deploy, já feito no Dockerfile):
+
+    python -m src.services.estaticos
+
+Em tempo de execução o manifesto e os arquivos ficam em memória: servir um
+arquivo não acessa o disco. Sem o build (desenvolvimento), ou com um build
+desatualizado em relação a src/static, o app serve src/static direto.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+from collections import namedtuple
+
+from flask import current_app
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só há a variante gzip
+    brotli = None
+
+DIRETORIO_ORIGEM = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+DIRETORIO_BUILD = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'dist')
+MANIFESTO = 'manifest.json'
+
+# Página de entrada: não leva hash no nome e é sempre revalidada
+PAGINA_INICIAL = 'index.html'
+
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+CACHE_REVALIDAR = 'no-cache'
+
+# Codificações na ordem de preferência do servidor
+CODIFICACOES = ('br', 'gzip')
+EXTENSOES = {'br': '.br', 'gzip': '.gz'}
+
+Estatico = namedtuple('Estatico', ['tipo', 'etag', 'imutavel', 'corpos'])
+
+logger = logging.getLogger(__name__)
+
+
+def impressao_origem(origem=DIRETORIO_ORIGEM):
+    """Hash dos nomes e conteúdos dos arquivos de origem; None se o diretório não existir"""
+    if not os.path.isdir(origem):
+        return None
+    impressao = hashlib.sha256()
+    for nome in sorted(os.listdir(origem)):
+        caminho = os.path.join(origem, nome)
+        if os.path.isfile(caminho):
+            with open(caminho, 'rb') as arquivo:
+                impressao.update(nome.encode('utf-8') + b'\0' + hashlib.sha256(arquivo.read()).digest())
+    return impressao.hexdigest()
+
+
+def _comprimir(conteudo, codificacao):
+    if codificacao == 'br':
+        return brotli.compress(conteudo, quality=11) if brotli else None
+    # mtime=0 deixa o .gz igual entre builds do mesmo conteúdo
+    return gzip.compress(conteudo, compresslevel=9, mtime=0)
+
+
+def _tipo(nome):
+    tipo = mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+    if tipo.startswith('text/') or tipo in ('application/javascript', 'application/json'):
+        tipo += '; charset=utf-8'
+    return tipo
+
+
+def _gravar(destino, nome, conteudo, imutavel):
+    """Grava o arquivo e as variantes comprimidas que ficarem menores; retorna a entrada do manifesto"""
+    with open(os.path.join(destino, nome), 'wb') as arquivo:
+        arquivo.write(conteudo)
+
+    variantes = {}
+    for codificacao in CODIFICACOES:
+        comprimido = _comprimir(conteudo, codificacao)
+        if comprimido is not None and len(comprimido) < len(conteudo):
+            variantes[codificacao] = nome + EXTENSOES[codificacao]
+            with open(os.path.join(destino, variantes[codificacao]), 'wb') as arquivo:
+                arquivo.write(comprimido)
+
+    return {
+        'arquivo': nome,
+        'tipo': _tipo(nome),
+        'etag': hashlib.sha256(conteudo).hexdigest()[:16],
+        'imutavel': imutavel,
+        'variantes': variantes,
+    }
+
+
+def construir(origem=DIRETORIO_ORIGEM, destino=DIRETORIO_BUILD):
+    """
+    Gera o build dos estáticos de origem em destino.
+
+    Cada arquivo ganha uma cópia com o hash no nome (servida como imutável), e as
+    referências a ele em index.html são trocadas pelo nome com hash. O manifesto
+    guarda também a impressão da origem, conferida ao carregar o build.
+
+    Returns:
+        dict: Arquivos do manifesto (caminho da URL -> entrada)
+    """
+    if os.path.isdir(destino):
+        shutil.rmtree(destino)
+    os.makedirs(destino)
+
+    manifesto = {}
+    com_hash = {}
+    for nome in sorted(os.listdir(origem)):
+        caminho = os.path.join(origem, nome)
+        if nome == PAGINA_INICIAL or not os.path.isfile(caminho):
+            continue
+        with open(caminho, 'rb') as arquivo:
+            conteudo = arquivo.read()
+        base, extensao = os.path.splitext(nome)
+        nome_hash = f'{base}.{hashlib.sha256(conteudo).hexdigest()[:10]}{extensao}'
+        com_hash[nome] = nome_hash
+        manifesto[nome_hash] = _gravar(destino, nome_hash, conteudo, imutavel=True)
+        # O nome original continua respondendo (ex.: /favicon.ico), mas é revalidado
+        manifesto[nome] = dict(manifesto[nome_hash], imutavel=False)
+
+    with open(os.path.join(origem, PAGINA_INICIAL), encoding='utf-8') as arquivo:
+        pagina = arquivo.read()
+    for nome, nome_hash in com_hash.items():
+        pagina = re.sub(rf'''((?:src|href)=["'])/?{re.escape(nome)}(["'])''', rf'\g<1>/{nome_hash}\g<2>', pagina)
+    manifesto[PAGINA_INICIAL] = _gravar(destino, PAGINA_INICIAL, pagina.encode('utf-8'), imutavel=False)
+
+    with open(os.path.join(destino, MANIFESTO), 'w') as arquivo:
+        json.dump({'origem': impressao_origem(origem), 'arquivos': manifesto}, arquivo,
+                  indent=2, sort_keys=True)
+    return manifesto
+
+
+class ArquivosEstaticos:
+    """Estáticos do build em memória, servidos com negociação de Content-Encoding"""
+
+    def __init__(self, arquivos):
+        # caminho da URL -> Estatico
+        self.arquivos = arquivos
+
+    @classmethod
+    def carregar(cls, diretorio=DIRETORIO_BUILD, origem=DIRETORIO_ORIGEM):
+        """
+        Lê o manifesto e todos os arquivos do build.
+
+        Returns:
+            ArquivosEstaticos, ou None se não houver build ou se ele não corresponder
+            aos arquivos atuais de origem (editados depois do último build)
+        """
+        try:
+            with open(os.path.join(diretorio, MANIFESTO)) as arquivo:
+                manifesto = json.load(arquivo)
+        except FileNotFoundError:
+            return None
+
+        atual = impressao_origem(origem)
+        # Sem a origem (imagem só com o build) não há com o que comparar
+        if atual is not None and manifesto.get('origem') != atual:
+            logger.warning("Build dos estáticos em %s desatualizado em relação a %s; servindo a origem. "
+                           "Refaça com: python -m src.services.estaticos", diretorio, origem)
+            return None
+
+        lidos = {}
+
+        def ler(nome):
+            if nome not in lidos:
+                with open(os.path.join(diretorio, nome), 'rb') as arquivo:
+                    lidos[nome] = arquivo.read()
+            return lidos[nome]
+
+        arquivos = {}
+        for caminho, entrada in manifesto['arquivos'].items():
+            corpos = {'identity': ler(entrada['arquivo'])}
+            for codificacao, nome in entrada['variantes'].items():
+                corpos[codificacao] = ler(nome)
+            arquivos[caminho] = Estatico(entrada['tipo'], entrada['etag'], entrada['imutavel'], corpos)
+        return cls(arquivos)
+
+    def responder(self, caminho, request):
+        """
+        Resposta para o caminho pedido; caminhos desconhecidos recebem index.html
+        (rotas do frontend).
+        """
+        estatico = self.arquivos.get(caminho) or self.arquivos[PAGINA_INICIAL]
+
+        codificacao = 'identity'
+        for candidata in CODIFICACOES:
+            if candidata in estatico.corpos and request.accept_encodings[candidata]:
+                codificacao = candidata
+                break
+        etag = estatico.etag if codificacao == 'identity' else f'{estatico.etag}-{codificacao}'
+
+        if request.if_none_match.contains(etag):
+            resposta = current_app.response_class(status=304)
+        else:
+            resposta = current_app.response_class(estatico.corpos[codificacao], content_type=estatico.tipo)
+            if codificacao != 'identity':
+                resposta.headers['Content-Encoding'] = codificacao
+
+        resposta.set_etag(etag)
+        resposta.headers['Cache-Control'] = CACHE_IMUTAVEL if estatico.imutavel else CACHE_REVALIDAR
+        resposta.headers['Vary'] = 'Accept-Encoding'
+        return resposta
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build dos arquivos estáticos')
+    parser.add_argument('--origem', default=DIRETORIO_ORIGEM)
+    parser.add_argument('--destino', default=DIRETORIO_BUILD)
+    args = parser.parse_args()
+
+    manifesto = construir(args.origem, args.destino)
+    for caminho, entrada in sorted(manifesto.items()):
+        variantes = ', '.join(entrada['variantes']) or 'sem compressão'
+        print(f"{caminho} -> {entrada['arquivo']} ({variantes})")
+    if brotli is None:
+        print('⚠️ Pacote brotli não instalado: apenas variantes gzip')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import heapq
+
+from src.services.indices import IndiceVersionado, registrar_indice
+
+
+def _razao_horas(horas_equiv, horas_adm):
+    """Cobertura da carga horária: ch_equiv / ch_adm, ou None sem as duas horas"""
+    if horas_equiv is None or not horas_adm:
+        return None
+    return horas_equiv / horas_adm
+
+
+class Agregado:
+    """Contagem e soma das coberturas de horas de um grupo de equivalências"""
+
+    __slots__ = ('total', 'soma_razao', 'com_horas', 'cobertas')
+
+    def __init__(self):
+        self.total = 0
+        self.soma_razao = 0.0
+        self.com_horas = 0
+        self.cobertas = 0
+
+    def somar(self, razao, sinal):
+        self.total += sinal
+        if razao is not None:
+            self.soma_razao += sinal * razao
+            self.com_horas += sinal
+            self.cobertas += sinal * (razao >= 1)
+
+    def resumo(self):
+        return {
+            'total': self.total,
+            # Média de ch_equiv / ch_adm entre as equivalências com as duas cargas horárias
+            'cobertura_media': round(self.soma_razao / self.com_horas, 4) if self.com_horas else None,
+            'cobertas': self.cobertas,
+            'sem_horas': self.total - self.com_horas,
+        }
+
+
+class EstatisticasCatalogo(IndiceVersionado):
+    """
+    Agregados do catálogo mantidos a cada escrita: total e cobertura de horas
+    geral e por curso_equiv, e quantas equivalências tem cada codigo_adm.
+
+    Adicionar ou remover uma linha custa O(1); o resumo só percorre os grupos
+    (cursos e códigos de ADM), nunca as equivalências.
+    """
+
+    COLUNAS = ['id', 'curso_equiv', 'codigo_adm', 'disciplina_adm', 'ch_adm_horas', 'ch_equiv_horas']
+
+    def __init__(self):
+        super().__init__()
+        self._limpar()
+
+    def _limpar(self):
+        # id -> (curso_equiv, codigo_adm, razão das horas), para desfazer a contagem
+        self._linhas = {}
+        self._geral = Agregado()
+        self._por_curso = {}
+        self._por_codigo_adm = {}
+        self._disciplinas_adm = {}
+
+    def _adicionar(self, linha):
+        id, curso_equiv, codigo_adm, disciplina_adm, ch_adm_horas, ch_equiv_horas = linha
+        razao = _razao_horas(ch_equiv_horas, ch_adm_horas)
+        self._linhas[id] = (curso_equiv, codigo_adm, razao)
+        self._geral.somar(razao, 1)
+        self._por_curso.setdefault(curso_equiv, Agregado()).somar(razao, 1)
+        self._por_codigo_adm[codigo_adm] = self._por_codigo_adm.get(codigo_adm, 0) + 1
+        self._disciplinas_adm[codigo_adm] = disciplina_adm
+
+    def _remover(self, id):
+        linha = self._linhas.pop(id, None)
+        if linha is None:
+            return
+        curso_equiv, codigo_adm, razao = linha
+        self._geral.somar(razao, -1)
+        agregado = self._por_curso[curso_equiv]
+        agregado.somar(razao, -1)
+        if not agregado.total:
+            del self._por_curso[curso_equiv]
+        self._por_codigo_adm[codigo_adm] -= 1
+        if not self._por_codigo_adm[codigo_adm]:
+            del self._por_codigo_adm[codigo_adm]
+            del self._disciplinas_adm[codigo_adm]
+
+    def resumo(self, top=10, versao=None):
+        """
+        Estatísticas do catálogo.
+
+        Args:
+            top (int): Quantos codigo_adm listar em codigos_adm_mais_mapeados
+            versao (int): Versão do catálogo já lida pela rota, se houver
+
+        Returns:
+            dict: {'total', 'cobertura_media', 'cobertas', 'sem_horas', 'por_curso',
+                'codigos_adm_mais_mapeados'}
+        """
+        self.atualizar(versao)
+        with self._lock:
+            resultado = self._geral.resumo()
+            resultado['por_curso'] = [
+                dict(curso_equiv=curso, **agregado.resumo())
+                for curso, agregado in sorted(self._por_curso.items(), key=lambda item: (-item[1].total, item[0]))
+            ]
+            mais_mapeados = heapq.nsmallest(
+                top, self._por_codigo_adm.items(), key=lambda item: (-item[1], item[0])
+            )
+            resultado['codigos_adm_mais_mapeados'] = [
+                {'codigo_adm': codigo, 'disciplina_adm': self._disciplinas_adm[codigo], 'total': total}
+                for codigo, total in mais_mapeados
+            ]
+        return resultado
+
+
+estatisticas_catalogo = registrar_indice(EstatisticasCatalogo())
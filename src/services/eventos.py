@@ -0,0 +1,388 @@
+"""
+Canal de eventos do catálogo (Server-Sent Events em /api/equivalencias/stream).
+
+Cada escrita commitada vira um evento cujo id é a versão do catálogo que ela
+gerou; o navegador reenvia o último id recebido em Last-Event-ID ao reconectar e
+o stream continua dali. Eventos:
+
+    change: {"items": [...], "deleted": [ids], "token": "<versão>"}
+            (mesmo formato de GET /api/equivalencias/changes)
+    resync: {"token": "<versão>"}: houve alterações que não cabem no stream
+            (importação em massa, eventos perdidos); o cliente busca
+            /api/equivalencias/changes desde o próprio token
+
+O quadro SSE de cada evento é montado uma única vez na publicação e repassado
+tal qual a todas as conexões. Os brokers guardam os últimos eventos em memória
+(EVENTS_BUFFER): uma conexão só recebe uma sequência de versões sem buracos; se
+faltar alguma (escrita feita em outro worker, buffer esgotado), recebe resync.
+
+BrokerLocal distribui os eventos só dentro do processo. Com vários workers ou
+processos, BrokerPostgres repassa cada evento por NOTIFY a todos eles.
+"""
+
+import asyncio
+import bisect
+import logging
+import os
+import select
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy.engine import make_url
+
+from src.services.exportacao import CAMPOS_EXPORTACAO
+from src.services.serializacao import json_bytes
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalhos das respostas de stream: sem cache nem buffer em proxies (nginx)
+CABECALHOS_STREAM = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+# Comentário SSE enviado a cada EVENTS_HEARTBEAT_SECONDS sem eventos (mantém proxies abertos)
+QUADRO_HEARTBEAT = b': heartbeat\n\n'
+
+
+class ConfiguracaoEventos:
+    """Configuração do canal de eventos, lida das variáveis de ambiente em init_eventos()"""
+
+    def __init__(self):
+        self.heartbeat = 15.0
+        self.duracao_maxima = 300.0
+        self.reconexao_ms = 3000
+        # Streams simultâneos no app Flask por worker (cada um ocupa uma thread)
+        self.vagas = threading.BoundedSemaphore(4)
+
+
+config = ConfiguracaoEventos()
+
+
+class Evento:
+    """Evento publicado: a versão do catálogo e o quadro SSE pronto"""
+
+    __slots__ = ('id', 'quadro')
+
+    def __init__(self, id, quadro):
+        self.id = id
+        self.quadro = quadro
+
+
+def quadro_sse(id, tipo, dados):
+    """Quadro SSE (bytes) de um evento; dados em JSON numa única linha data:"""
+    return b'id: %d\nevent: %s\ndata: %s\n\n' % (id, tipo.encode(), json_bytes(dados))
+
+
+def quadro_resync(versao):
+    return quadro_sse(versao, 'resync', {'token': str(versao)})
+
+
+class BrokerLocal:
+    """
+    Broker em memória do processo: os últimos `capacidade` eventos, ordenados pelo id.
+
+    Threads esperam com esperar() (um threading.Condition); handlers assíncronos
+    com esperar_async(), um asyncio.Event por event loop, de modo que publicar
+    custa o mesmo com uma ou com milhares de conexões paradas.
+    """
+
+    def __init__(self, capacidade=1000):
+        self.capacidade = capacidade
+        self._eventos = []
+        self._condicao = threading.Condition()
+        self._sinais = {}
+
+    def publicar(self, id, tipo, dados):
+        self._receber(Evento(id, quadro_sse(id, tipo, dados)))
+
+    def _receber(self, evento):
+        with self._condicao:
+            # Escritas concorrentes podem publicar fora de ordem
+            bisect.insort(self._eventos, evento, key=lambda e: e.id)
+            if len(self._eventos) > self.capacidade:
+                del self._eventos[0]
+            self._condicao.notify_all()
+            sinais, self._sinais = self._sinais, {}
+        for loop, sinal in sinais.items():
+            try:
+                loop.call_soon_threadsafe(sinal.set)
+            except RuntimeError:
+                pass  # event loop já encerrado
+
+    def _desde(self, ultimo):
+        novos = self._eventos[bisect.bisect_right(self._eventos, ultimo, key=lambda e: e.id):]
+        if novos and (novos[0].id != ultimo + 1 or novos[-1].id - novos[0].id + 1 != len(novos)):
+            return None
+        return novos
+
+    def desde(self, ultimo):
+        """
+        Eventos com id maior que ultimo, em sequência.
+
+        Returns:
+            list: Eventos (vazia se não houver nenhum), ou None se faltar alguma
+                versão no meio (o cliente precisa de resync)
+        """
+        with self._condicao:
+            return self._desde(ultimo)
+
+    def ultimo_id(self):
+        with self._condicao:
+            return self._eventos[-1].id if self._eventos else None
+
+    def esperar(self, ultimo, timeout):
+        """Como desde(), mas bloqueia a thread até haver evento novo ou passar o timeout"""
+        with self._condicao:
+            self._condicao.wait_for(
+                lambda: self._eventos and self._eventos[-1].id > ultimo, timeout
+            )
+            return self._desde(ultimo)
+
+    async def esperar_async(self, ultimo, timeout):
+        """Como esperar(), sem bloquear o event loop"""
+        loop = asyncio.get_running_loop()
+        with self._condicao:
+            novos = self._desde(ultimo)
+            if novos is None or novos:
+                return novos
+            sinal = self._sinais.get(loop)
+            if sinal is None:
+                sinal = self._sinais[loop] = asyncio.Event()
+        try:
+            await asyncio.wait_for(sinal.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.desde(ultimo)
+
+
+class BrokerPostgres(BrokerLocal):
+    """
+    Broker sobre LISTEN/NOTIFY do PostgreSQL, para vários workers e máquinas.
+
+    publicar() manda o quadro SSE pronto por NOTIFY; em cada processo, uma thread
+    faz LISTEN no canal e entrega o que chega ao buffer em memória herdado de
+    BrokerLocal, de onde as conexões leem como no broker local. A thread só é
+    iniciada no primeiro assinante do processo.
+
+    O payload de um NOTIFY é limitado a 8000 bytes: eventos maiores vão como resync.
+    A conexão do LISTEN precisa ser direta ao PostgreSQL (não passa por pgbouncer
+    em modo transação).
+    """
+
+    CANAL = 'equivalencias_eventos'
+    LIMITE_PAYLOAD = 7900
+
+    def __init__(self, url, capacidade=1000):
+        super().__init__(capacidade)
+        self.url = url
+        self._local = threading.local()
+        self._ouvinte = None
+        self._lock_ouvinte = threading.Lock()
+
+    def _conectar(self):
+        import psycopg2
+
+        conexao = psycopg2.connect(self.url)
+        conexao.autocommit = True
+        return conexao
+
+    def _conexao(self):
+        # Uma conexão por thread e por processo, como em ArmazemSQLite
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None or conexao.closed or self._local.pid != os.getpid():
+            conexao = self._conectar()
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+    def publicar(self, id, tipo, dados):
+        quadro = quadro_sse(id, tipo, dados)
+        if len(quadro) > self.LIMITE_PAYLOAD:
+            quadro = quadro_resync(id)
+        with self._conexao().cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', (self.CANAL, quadro.decode()))
+
+    def _garantir_ouvinte(self):
+        with self._lock_ouvinte:
+            if self._ouvinte is not None and self._ouvinte[1] == os.getpid():
+                return
+            thread = threading.Thread(target=self._ouvir, name='eventos-listen', daemon=True)
+            self._ouvinte = (thread, os.getpid())
+            thread.start()
+
+    def _ouvir(self):
+        while True:
+            try:
+                conexao = self._conectar()
+                with conexao.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.CANAL}')
+                logger.info("Ouvindo eventos do catálogo no canal %s", self.CANAL)
+                while True:
+                    if not select.select([conexao], [], [], 60)[0]:
+                        continue
+                    conexao.poll()
+                    while conexao.notifies:
+                        quadro = conexao.notifies.pop(0).payload
+                        # O quadro começa por "id: <versão>"
+                        id = int(quadro.split('\n', 1)[0][4:])
+                        self._receber(Evento(id, quadro.encode()))
+            except Exception as e:
+                # Eventos perdidos na reconexão viram resync (buraco na sequência)
+                logger.warning("Conexão de LISTEN perdida: %s; reconectando em 5 s", e)
+                time.sleep(5)
+
+    def desde(self, ultimo):
+        self._garantir_ouvinte()
+        return super().desde(ultimo)
+
+    def esperar(self, ultimo, timeout):
+        self._garantir_ouvinte()
+        return super().esperar(ultimo, timeout)
+
+    async def esperar_async(self, ultimo, timeout):
+        self._garantir_ouvinte()
+        return await super().esperar_async(ultimo, timeout)
+
+
+def criar_broker(app):
+    """
+    Broker conforme EVENTS_BROKER: auto (padrão), local (só o próprio processo) ou
+    postgres. auto usa o postgres quando o banco dos eventos é PostgreSQL, para que
+    vários workers recebam as escritas uns dos outros, e o local nos demais casos.
+
+    Variáveis de ambiente:
+        EVENTS_BUFFER: eventos mantidos em memória para retomada (padrão 1000)
+        EVENTS_DATABASE_URL: banco do LISTEN/NOTIFY (padrão o banco principal)
+    """
+    tipo = os.getenv('EVENTS_BROKER', 'auto')
+    capacidade = int(os.getenv('EVENTS_BUFFER', '1000'))
+    if tipo not in ('auto', 'local', 'postgres'):
+        raise ValueError(f'EVENTS_BROKER inválido: {tipo} (use auto, local ou postgres)')
+    if tipo == 'local':
+        return BrokerLocal(capacidade)
+
+    url = make_url(os.getenv('EVENTS_DATABASE_URL') or app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'postgresql':
+        if tipo == 'auto':
+            return BrokerLocal(capacidade)
+        raise ValueError('EVENTS_BROKER=postgres requer um banco PostgreSQL')
+    return BrokerPostgres(url.set(drivername='postgresql').render_as_string(hide_password=False), capacidade)
+
+
+def init_eventos(app):
+    """
+    Cria o broker de eventos do app (app.extensions['eventos']).
+
+    Variáveis de ambiente (além das de criar_broker):
+        EVENTS_HEARTBEAT_SECONDS: intervalo dos comentários de heartbeat (padrão 15)
+        EVENTS_MAX_SECONDS: duração máxima de um stream no app Flask, depois da
+            qual o navegador reconecta com Last-Event-ID (padrão 300); libera as
+            threads do gunicorn. Não se aplica ao handler do modo ASGI.
+        EVENTS_MAX_STREAMS: streams simultâneos no app Flask por worker (padrão 4);
+            acima disso a rota responde 503, para que conexões paradas não ocupem
+            todas as threads. Não se aplica ao handler do modo ASGI.
+    """
+    config.heartbeat = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+    config.duracao_maxima = float(os.getenv('EVENTS_MAX_SECONDS', '300'))
+    config.vagas = threading.BoundedSemaphore(int(os.getenv('EVENTS_MAX_STREAMS', '4')))
+    broker = app.extensions['eventos'] = criar_broker(app)
+    if type(broker) is BrokerLocal and int(os.getenv('WEB_CONCURRENCY', '1')) > 1:
+        logger.warning("Broker de eventos local com %s workers: escritas de outro worker só "
+                       "chegam ao stream como resync; use um banco PostgreSQL (EVENTS_BROKER=auto) "
+                       "ou EVENTS_BROKER=postgres", os.getenv('WEB_CONCURRENCY'))
+    return broker
+
+
+def _publicar(id, tipo, dados):
+    # O evento é um complemento: falhar ao publicar não desfaz a escrita já commitada
+    try:
+        current_app.extensions['eventos'].publicar(id, tipo, dados)
+    except Exception as e:
+        logger.warning("Erro ao publicar o evento %s da versão %s: %s", tipo, id, e)
+
+
+def publicar_alteracao(versao, gravados=(), removidos=()):
+    """Publica uma escrita commitada (registros completos e/ou ids removidos)"""
+    itens = [{campo: registro[campo] for campo in CAMPOS_EXPORTACAO} for registro in gravados]
+    _publicar(versao, 'change', {'items': itens, 'deleted': list(removidos), 'token': str(versao)})
+
+
+def publicar_resync(versao):
+    """Publica que o catálogo chegou à versão por um caminho sem evento próprio"""
+    _publicar(versao, 'resync', {'token': str(versao)})
+
+
+def ler_ultimo_id(valor):
+    """Last-Event-ID (ou last_event_id da query string) como int; ValueError se inválido"""
+    if valor in (None, ''):
+        return None
+    ultimo = int(valor)
+    if ultimo < 0:
+        raise ValueError('Last-Event-ID negativo')
+    return ultimo
+
+
+def inicio_stream(broker, ultimo, versao):
+    """
+    Primeiro trecho de um stream que retoma de `ultimo`, e o id a partir do qual esperar.
+
+    Args:
+        ultimo (int): Id informado pelo cliente (None: a partir de agora)
+        versao (callable): Retorna a versão atual do catálogo; só é chamada
+            quando o buffer não basta para saber se o cliente está em dia
+    """
+    inicio = [b'retry: %d\n\n' % config.reconexao_ms]
+    if ultimo is None:
+        ultimo = broker.ultimo_id()
+        return inicio, versao() if ultimo is None else ultimo
+
+    novos = broker.desde(ultimo)
+    if novos:
+        return inicio + [evento.quadro for evento in novos], novos[-1].id
+    atual = versao()
+    if novos is None or atual != ultimo:
+        # Alterações fora do buffer (anteriores, de outro worker, banco recriado):
+        # o cliente busca pelo feed
+        return inicio + [quadro_resync(atual)], atual
+    return inicio, ultimo
+
+
+def proximos_quadros(broker, novos, ultimo):
+    """Quadros a enviar para o resultado de esperar(), e o novo último id"""
+    if novos is None:
+        atual = broker.ultimo_id()
+        return [quadro_resync(atual)], atual
+    if not novos:
+        return [QUADRO_HEARTBEAT], ultimo
+    return [evento.quadro for evento in novos], novos[-1].id
+
+
+def reservar_vaga_stream():
+    """
+    Ocupa uma das EVENTS_MAX_STREAMS vagas de stream do worker; False se não houver.
+
+    Quem reserva libera com liberar_vaga_stream, em geral por Response.call_on_close.
+    """
+    return config.vagas.acquire(blocking=False)
+
+
+def liberar_vaga_stream():
+    config.vagas.release()
+
+
+def gerar_stream(broker, inicio, ultimo):
+    """Stream SSE para o app Flask (uma thread por conexão), até EVENTS_MAX_SECONDS"""
+    yield b''.join(inicio)
+    limite = time.monotonic() + config.duracao_maxima
+    while time.monotonic() < limite:
+        novos = broker.esperar(ultimo, min(config.heartbeat, max(limite - time.monotonic(), 0)))
+        quadros, ultimo = proximos_quadros(broker, novos, ultimo)
+        yield b''.join(quadros)
+
+
+async def gerar_stream_async(broker, inicio, ultimo):
+    """Stream SSE para o modo ASGI: só uma corrotina parada por conexão, sem limite de duração"""
+    yield b''.join(inicio)
+    while True:
+        novos = await broker.esperar_async(ultimo, config.heartbeat)
+        quadros, ultimo = proximos_quadros(broker, novos, ultimo)
+        yield b''.join(quadros)
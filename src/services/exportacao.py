@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+
+from src.models.equivalencia import db, Equivalencia
+
+# Colunas exportadas, na mesma ordem e com os mesmos nomes de Equivalencia.to_dict()
+CAMPOS_EXPORTACAO = ['id', 'disciplina_adm', 'codigo_adm', 'ch_adm', 'disciplina_equiv',
+                     'codigo_equiv', 'curso_equiv', 'ch_equiv', 'justificativa', 'data_criacao']
+
+# Linhas buscadas do cursor do servidor por vez
+LINHAS_POR_LOTE = 1000
+
+# Linhas acumuladas antes de cada yield (evita um write no socket por linha)
+LINHAS_POR_BLOCO = 200
+
+
+def consulta_exportacao(campos=CAMPOS_EXPORTACAO):
+    """Consulta de tuplas (sem objetos ORM) lida em lotes por cursor do lado do servidor"""
+    colunas = [getattr(Equivalencia, campo) for campo in campos]
+    return (
+        select(*colunas)
+        .order_by(Equivalencia.id)
+        .execution_options(yield_per=LINHAS_POR_LOTE)
+    )
+
+
+def registro_exportacao(linha):
+    """Dicionário de uma linha da consulta de exportação, com a data em ISO 8601"""
+    registro = linha._asdict()
+    if registro.get('data_criacao') is not None:
+        registro['data_criacao'] = registro['data_criacao'].isoformat()
+    return registro
+
+
+def registros_exportacao(consulta):
+    """Executa a consulta de exportação e gera um dicionário por linha"""
+    for linha in db.session.execute(consulta):
+        yield registro_exportacao(linha)
+
+
+def gerar_csv(registros, campos=None, cabecalho=True):
+    """
+    Gera o CSV em blocos de texto, com BOM para abrir direto em planilhas.
+
+    campos são as colunas do CSV (projeção fields=; None para todas). Com
+    cabecalho=False gera só as linhas (continuação de uma exportação em partes).
+    """
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=campos or CAMPOS_EXPORTACAO)
+    if cabecalho:
+        buffer.write('\ufeff')
+        escritor.writeheader()
+
+    for contagem, registro in enumerate(registros, start=1):
+        escritor.writerow(registro)
+        if contagem % LINHAS_POR_BLOCO == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def gerar_ndjson(registros, campos=None, cabecalho=True):
+    """
+    Gera um objeto JSON por linha, em blocos.
+
+    Mesma assinatura de gerar_csv; campos e cabecalho não se aplicam (cada objeto
+    já traz só os campos projetados e não há cabeçalho).
+    """
+    bloco = []
+    for registro in registros:
+        bloco.append(json.dumps(registro, ensure_ascii=False))
+        if len(bloco) == LINHAS_POR_BLOCO:
+            yield '\n'.join(bloco) + '\n'
+            bloco = []
+    if bloco:
+        yield '\n'.join(bloco) + '\n'
@@ -0,0 +1,132 @@
+from collections import deque
+
+from src.services.indices import IndiceVersionado, registrar_indice
+
+
+def normalizar_codigo(codigo):
+    return (codigo or '').strip().upper()
+
+
+class GrafoEquivalencias(IndiceVersionado):
+    """
+    Grafo de equivalências: cada código de disciplina é um vértice e cada linha da
+    tabela liga codigo_adm a codigo_equiv.
+
+    Guarda a lista de adjacência e, por aresta, os ids das equivalências que a formam.
+    """
+
+    COLUNAS = ['id', 'codigo_adm', 'disciplina_adm', 'codigo_equiv', 'disciplina_equiv', 'curso_equiv']
+
+    def __init__(self):
+        super().__init__()
+        self._limpar()
+
+    def _limpar(self):
+        # id -> (codigo_adm, disciplina_adm, codigo_equiv, disciplina_equiv, curso_equiv)
+        self._linhas = {}
+        # codigo -> {vizinho: {ids}}
+        self._adjacencia = {}
+
+    def _ligar(self, origem, destino, id):
+        self._adjacencia.setdefault(origem, {}).setdefault(destino, set()).add(id)
+
+    def _desligar(self, origem, destino, id):
+        vizinhos = self._adjacencia.get(origem, {})
+        ids = vizinhos.get(destino)
+        if ids is None:
+            return
+        ids.discard(id)
+        if not ids:
+            del vizinhos[destino]
+        if not vizinhos:
+            self._adjacencia.pop(origem, None)
+
+    def _adicionar(self, linha):
+        id, codigo_adm, disciplina_adm, codigo_equiv, disciplina_equiv, curso_equiv = linha
+        codigo_adm = normalizar_codigo(codigo_adm)
+        codigo_equiv = normalizar_codigo(codigo_equiv)
+        self._linhas[id] = (codigo_adm, disciplina_adm, codigo_equiv, disciplina_equiv, curso_equiv)
+        self._ligar(codigo_adm, codigo_equiv, id)
+        self._ligar(codigo_equiv, codigo_adm, id)
+
+    def _remover(self, id):
+        linha = self._linhas.pop(id, None)
+        if linha is None:
+            return
+        codigo_adm, _, codigo_equiv, _, _ = linha
+        self._desligar(codigo_adm, codigo_equiv, id)
+        self._desligar(codigo_equiv, codigo_adm, id)
+
+    def _vertice(self, codigo):
+        """Nome e curso de um código, tirados de qualquer equivalência que o contenha"""
+        for ids in self._adjacencia[codigo].values():
+            codigo_adm, disciplina_adm, _, disciplina_equiv, curso_equiv = self._linhas[next(iter(ids))]
+            if codigo == codigo_adm:
+                return {'codigo': codigo, 'disciplina': disciplina_adm, 'curso': None}
+            return {'codigo': codigo, 'disciplina': disciplina_equiv, 'curso': curso_equiv}
+
+    def _busca_em_largura(self, origem):
+        """Retorna o predecessor de cada vértice alcançável (árvore de caminhos mínimos)"""
+        anterior = {origem: None}
+        fila = deque([origem])
+        while fila:
+            atual = fila.popleft()
+            for vizinho in self._adjacencia[atual]:
+                if vizinho not in anterior:
+                    anterior[vizinho] = atual
+                    fila.append(vizinho)
+        return anterior
+
+    @staticmethod
+    def _caminho(anterior, destino):
+        caminho = []
+        while destino is not None:
+            caminho.append(destino)
+            destino = anterior[destino]
+        return caminho[::-1]
+
+    def consultar(self, codigo, destino=None, versao=None):
+        """
+        Componente conexo de um código e as cadeias mínimas de equivalência a partir dele.
+
+        Args:
+            codigo (str): Código de origem
+            destino (str): Se informado, retorna só a cadeia até este código
+            versao (int): Versão do catálogo já lida pela rota, se houver
+
+        Returns:
+            dict ou None se o código não aparece em nenhuma equivalência
+        """
+        self.atualizar(versao)
+        origem = normalizar_codigo(codigo)
+        with self._lock:
+            if origem not in self._adjacencia:
+                return None
+
+            anterior = self._busca_em_largura(origem)
+
+            if destino is not None:
+                destino = normalizar_codigo(destino)
+                caminho = self._caminho(anterior, destino) if destino in anterior else None
+                return {
+                    'codigo': origem,
+                    'destino': destino,
+                    'caminho': [self._vertice(c) for c in caminho] if caminho else None
+                }
+
+            arestas = []
+            for atual in anterior:
+                for vizinho, ids in self._adjacencia[atual].items():
+                    if atual < vizinho:
+                        arestas.append({'origem': atual, 'destino': vizinho,
+                                        'equivalencias': sorted(ids)})
+
+            return {
+                'codigo': origem,
+                'componente': [self._vertice(c) for c in anterior],
+                'arestas': arestas,
+                'caminhos': {c: self._caminho(anterior, c) for c in anterior if c != origem}
+            }
+
+
+grafo_equivalencias = registrar_indice(GrafoEquivalencias())
@@ -0,0 +1,142 @@
+import csv
+import io
+
+from src.models.equivalencia import CAMPOS_OBRIGATORIOS, CHAVE_NATURAL, extrair_horas
+from src.repositories import ChaveDuplicada, repositorio
+
+
+def ler_csv(texto):
+    """Converte um CSV com cabeçalho em lista de dicionários"""
+    return list(csv.DictReader(io.StringIO(texto.lstrip('\ufeff'))))
+
+
+def validar_linha(linha):
+    """
+    Valida uma linha de importação com as mesmas regras de create_equivalencia.
+
+    Returns:
+        tuple: (valores, None) se válida, ou (None, mensagem de erro)
+    """
+    if not isinstance(linha, dict):
+        return None, 'Linha deve ser um objeto'
+
+    valores, erro = _validar_campos(linha, CAMPOS_OBRIGATORIOS)
+    if erro:
+        return None, erro
+    valores['ch_adm_horas'] = extrair_horas(valores['ch_adm'])
+    valores['ch_equiv_horas'] = extrair_horas(valores['ch_equiv'])
+    return valores, None
+
+
+def validar_alteracao(dados):
+    """
+    Valida os campos enviados para update_equivalencia com as regras de validar_linha,
+    mas só os que estiverem presentes (atualização parcial).
+
+    Returns:
+        tuple: (valores, None) se válidos, ou (None, mensagem de erro)
+    """
+    if not isinstance(dados, dict):
+        return None, 'Corpo deve ser um objeto'
+    return _validar_campos(dados, [campo for campo in CAMPOS_OBRIGATORIOS if campo in dados])
+
+
+def _validar_campos(dados, campos):
+    """Campos obrigatórios sem espaços nas pontas; erro no primeiro vazio"""
+    valores = {}
+    for campo in campos:
+        valor = dados.get(campo)
+        if isinstance(valor, str):
+            valor = valor.strip()
+        if not valor:
+            return None, f'Campo {campo} é obrigatório'
+        valores[campo] = valor
+    return valores, None
+
+
+def _sem_chaves_repetidas(validas):
+    """
+    Mantém só a última ocorrência de cada chave natural da importação.
+
+    O PostgreSQL recusa um ON CONFLICT que atualize a mesma linha duas vezes no mesmo
+    comando, e entre lotes a ocorrência anterior seria sobrescrita de qualquer forma.
+
+    Returns:
+        tuple: (linhas mantidas na ordem original, [{'indice', 'erro'}] das substituídas)
+    """
+    por_chave = {}
+    substituidas = []
+    for indice, valores in validas:
+        chave = tuple(valores[c] for c in CHAVE_NATURAL)
+        anterior = por_chave.get(chave)
+        if anterior is not None:
+            substituidas.append({
+                'indice': anterior[0],
+                'erro': f'Substituída pela linha {indice} (mesma chave natural)',
+            })
+        por_chave[chave] = (indice, valores)
+    return sorted(por_chave.values(), key=lambda item: item[0]), substituidas
+
+
+def _gravar_linha_a_linha(lote, upsert):
+    """
+    Regrava um lote que falhou uma linha por vez, para saber quais linhas causaram a falha.
+
+    Returns:
+        tuple: (linhas gravadas, [{'indice', 'erro'}] das que falharam)
+    """
+    gravadas = 0
+    rejeitadas = []
+    for indice, valores in lote:
+        try:
+            repositorio.gravar_lote([valores], upsert=upsert)
+            gravadas += 1
+        except ChaveDuplicada:
+            rejeitadas.append({'indice': indice, 'erro': f"Já cadastrada ({', '.join(CHAVE_NATURAL)})"})
+        except Exception as e:
+            rejeitadas.append({'indice': indice, 'erro': f'Erro no banco: {e}'})
+    return gravadas, rejeitadas
+
+
+def importar_equivalencias(linhas, tamanho_lote, upsert=False):
+    """
+    Grava as linhas válidas em lotes, uma transação por lote.
+
+    Cada lote vira um único comando no repositório (INSERT com vários VALUES no
+    SQLAlchemy, um POST no Supabase). Com upsert=True as linhas que já existem com a
+    mesma chave natural são atualizadas, e as repetidas na própria importação são
+    rejeitadas em favor da última ocorrência. Se um lote falhar ele é regravado linha a
+    linha, e só as linhas que falharem sozinhas são rejeitadas.
+
+    Returns:
+        dict: {'inseridas' ou 'gravadas', 'rejeitadas': [{'indice', 'erro'}], 'lotes'}
+    """
+    rejeitadas = []
+    validas = []
+    for indice, linha in enumerate(linhas):
+        valores, erro = validar_linha(linha)
+        if erro:
+            rejeitadas.append({'indice': indice, 'erro': erro})
+        else:
+            validas.append((indice, valores))
+    if upsert:
+        validas, substituidas = _sem_chaves_repetidas(validas)
+        rejeitadas.extend(substituidas)
+
+    gravadas = 0
+    lotes = 0
+    for inicio in range(0, len(validas), tamanho_lote):
+        lote = validas[inicio:inicio + tamanho_lote]
+        try:
+            repositorio.gravar_lote([valores for _, valores in lote], upsert=upsert)
+            gravadas += len(lote)
+            lotes += 1
+        except Exception:
+            gravadas_lote, rejeitadas_lote = _gravar_linha_a_linha(lote, upsert)
+            gravadas += gravadas_lote
+            lotes += bool(gravadas_lote)
+            rejeitadas.extend(rejeitadas_lote)
+
+    rejeitadas.sort(key=lambda r: r['indice'])
+    return {'gravadas' if upsert else 'inseridas': gravadas, 'rejeitadas': rejeitadas, 'lotes': lotes}
+
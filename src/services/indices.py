@@ -0,0 +1,133 @@
+import logging
+import threading
+
+from src.config.database import leitura_primario
+from src.repositories import repositorio
+
+logger = logging.getLogger(__name__)
+
+
+class IndiceVersionado:
+    """
+    Estrutura em memória derivada da tabela equivalencias, amarrada à versão do catálogo.
+
+    Subclasses definem as colunas que precisam (COLUNAS) e como adicionar/remover
+    uma linha. Escritas feitas neste worker são aplicadas incrementalmente; se a
+    versão do banco andou por outro caminho (outro worker, importação em massa),
+    a próxima leitura busca só as alterações desde a versão do índice no feed do
+    repositório. A reconstrução completa fica para a primeira carga (ou um índice
+    montado na versão 0) e para backends sem o feed.
+    """
+
+    COLUNAS = ['id']
+
+    def __init__(self):
+        self._versao = None
+        self._lock = threading.RLock()
+
+    # Métodos implementados pelas subclasses
+
+    def _limpar(self):
+        raise NotImplementedError
+
+    def _adicionar(self, linha):
+        raise NotImplementedError
+
+    def _remover(self, id):
+        raise NotImplementedError
+
+    # Sincronização com o banco
+
+    def _reconstruir(self, versao):
+        linhas = repositorio.linhas(self.COLUNAS)
+        self._limpar()
+        for linha in linhas:
+            self._adicionar(linha)
+        self._versao = versao
+
+    def _sincronizar(self, versao):
+        """Aplica as alterações desde a versão do índice; reconstrói se não houver feed"""
+        try:
+            registros, removidos, atual = repositorio.alteracoes(self._versao, self.COLUNAS, versao)
+        except NotImplementedError:
+            self._reconstruir(versao)
+            return
+        self._aplicar(registros, removidos)
+        self._versao = atual
+
+    def _aplicar(self, gravados, removidos):
+        for id in removidos:
+            self._remover(id)
+        for registro in gravados:
+            self._remover(registro['id'])
+            self._adicionar(tuple(registro[c] for c in self.COLUNAS))
+
+    def atualizar(self, versao=None):
+        """
+        Garante que o índice corresponde à versão atual do catálogo.
+
+        A versão e as linhas são lidas sempre do primário: uma réplica atrasada
+        levaria o índice para trás. Quem passa a versão já lida deve tê-la lido
+        dentro de leitura_primario().
+        """
+        with leitura_primario():
+            if versao is None:
+                versao = repositorio.versao()
+            if versao == self._versao:
+                return
+            with self._lock:
+                if versao == self._versao:
+                    return
+                if not self._versao:
+                    # Sem versão, ou montado na versão 0 (catálogo novo ou linhas
+                    # anteriores ao feed): o feed desde 0 é a tabela inteira
+                    self._reconstruir(versao)
+                elif versao > self._versao:
+                    self._sincronizar(versao)
+                else:
+                    # A versão não volta no primário; um banco recriado pede invalidar_indices()
+                    logger.warning("Versão do catálogo %s menor que a do índice %s; ignorada",
+                                   versao, self._versao)
+
+    def invalidar(self):
+        """Descarta o índice; a próxima leitura o reconstrói"""
+        with self._lock:
+            self._versao = None
+
+    def aplicar(self, versao, gravados=(), removidos=()):
+        """
+        Aplica uma escrita já commitada que levou o catálogo à versão informada.
+
+        Args:
+            versao (int): Versão retornada por incrementar_versao_catalogo()
+            gravados: Registros (dicionários) criados ou alterados, retornados pelo repositório
+            removidos: ids de equivalências excluídas
+        """
+        with self._lock:
+            if self._versao != versao - 1:
+                # Escritas intermediárias de outro worker (ou esta já veio pelo feed):
+                # a próxima leitura busca as alterações pendentes
+                return
+            self._aplicar(gravados, removidos)
+            self._versao = versao
+
+
+# Índices em memória mantidos a partir das escritas das rotas
+indices_catalogo = []
+
+
+def registrar_indice(indice):
+    indices_catalogo.append(indice)
+    return indice
+
+
+def invalidar_indices():
+    """Sinal explícito de catálogo recriado (versão reiniciada): reconstrói todos os índices"""
+    for indice in indices_catalogo:
+        indice.invalidar()
+
+
+def propagar_alteracao(versao, gravados=(), removidos=()):
+    """Repassa uma escrita commitada a todos os índices registrados"""
+    for indice in indices_catalogo:
+        indice.aplicar(versao, gravados=gravados, removidos=removidos)
@@ -0,0 +1,205 @@
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+
+from src.services.profiler import registrar_eventos_sql
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    """Histograma de buckets fixos, guardado sem acumular (acumula só na exportação)"""
+
+    __slots__ = ('contagens', 'soma', 'total')
+
+    def __init__(self, contagens=None, soma=0.0, total=0):
+        self.contagens = contagens or [0] * (len(BUCKETS) + 1)
+        self.soma = soma
+        self.total = total
+
+    def observar(self, valor):
+        self.contagens[bisect_left(BUCKETS, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def somar(self, outro):
+        self.contagens = [a + b for a, b in zip(self.contagens, outro.contagens)]
+        self.soma += outro.soma
+        self.total += outro.total
+
+    def para_dict(self):
+        return {'contagens': self.contagens, 'soma': self.soma, 'total': self.total}
+
+
+class ColetorMetricas:
+    """
+    Métricas por rota (latência, status, tamanho da resposta e tempo de banco).
+
+    Cada worker do gunicorn acumula em memória e grava de tempos em tempos um
+    snapshot em METRICS_DIR (um arquivo por processo). A exportação soma os
+    snapshots de todos os workers, então qualquer worker responde pelo conjunto.
+    """
+
+    def __init__(self, diretorio=None, intervalo=1.0):
+        self.diretorio = diretorio or os.path.join(tempfile.gettempdir(), 'equivalencias_metricas')
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._pid = None
+        self._arquivo = None
+        self._ultima_gravacao = 0.0
+        self._limpar()
+
+    def _limpar(self):
+        # (rota, método) -> Histograma
+        self._latencia = {}
+        self._tempo_db = {}
+        # (rota, método) -> [bytes, respostas]
+        self._tamanho = {}
+        # (rota, método, status) -> total
+        self._status = {}
+
+    def registrar(self, rota, metodo, status, duracao, tamanho, tempo_db):
+        chave = (rota, metodo)
+        with self._lock:
+            latencia = self._latencia.get(chave)
+            if latencia is None:
+                latencia = self._latencia[chave] = Histograma()
+                self._tempo_db[chave] = Histograma()
+                self._tamanho[chave] = [0, 0]
+            latencia.observar(duracao)
+            self._tempo_db[chave].observar(tempo_db)
+            tamanho_rota = self._tamanho[chave]
+            tamanho_rota[0] += tamanho
+            tamanho_rota[1] += 1
+            chave_status = (rota, metodo, status)
+            self._status[chave_status] = self._status.get(chave_status, 0) + 1
+
+        agora = time.monotonic()
+        if agora - self._ultima_gravacao >= self.intervalo:
+            self._ultima_gravacao = agora
+            try:
+                self.gravar()
+            except OSError:
+                # Falha ao gravar o snapshot não pode derrubar a requisição
+                pass
+
+    # Snapshots compartilhados entre workers
+
+    def _snapshot(self):
+        with self._lock:
+            return {
+                'latencia': [[*k, h.para_dict()] for k, h in self._latencia.items()],
+                'tempo_db': [[*k, h.para_dict()] for k, h in self._tempo_db.items()],
+                'tamanho': [[*k, *v] for k, v in self._tamanho.items()],
+                'status': [[*k, v] for k, v in self._status.items()],
+            }
+
+    def gravar(self):
+        """Grava o snapshot deste processo (escrita atômica via rename)"""
+        if self._pid != os.getpid():
+            os.makedirs(self.diretorio, exist_ok=True)
+            # pid + horário de início: um worker reiniciado não sobrescreve os contadores do anterior
+            self._pid = os.getpid()
+            self._arquivo = os.path.join(self.diretorio, f'worker-{self._pid}-{time.time_ns()}.json')
+        temporario = f'{self._arquivo}.tmp'
+        with open(temporario, 'w') as arquivo:
+            json.dump(self._snapshot(), arquivo)
+        os.replace(temporario, self._arquivo)
+
+    def _agregar(self):
+        latencia, tempo_db, tamanho, status = {}, {}, {}, {}
+        for caminho in glob.glob(os.path.join(self.diretorio, 'worker-*.json')):
+            try:
+                with open(caminho) as arquivo:
+                    snapshot = json.load(arquivo)
+            except (OSError, ValueError):
+                continue
+            for destino, chave in ((latencia, 'latencia'), (tempo_db, 'tempo_db')):
+                for rota, metodo, dados in snapshot[chave]:
+                    destino.setdefault((rota, metodo), Histograma()).somar(Histograma(**dados))
+            for rota, metodo, soma, total in snapshot['tamanho']:
+                atual = tamanho.setdefault((rota, metodo), [0, 0])
+                atual[0] += soma
+                atual[1] += total
+            for rota, metodo, codigo, total in snapshot['status']:
+                status[(rota, metodo, codigo)] = status.get((rota, metodo, codigo), 0) + total
+        return latencia, tempo_db, tamanho, status
+
+    # Exportação no formato texto do Prometheus
+
+    @staticmethod
+    def _rotulos(**rotulos):
+        return '{' + ','.join(f'{k}="{v}"' for k, v in rotulos.items()) + '}'
+
+    def _linhas_histograma(self, nome, ajuda, histogramas):
+        linhas = [f'# HELP {nome} {ajuda}', f'# TYPE {nome} histogram']
+        for (rota, metodo), histograma in sorted(histogramas.items()):
+            acumulado = 0
+            for limite, contagem in zip(BUCKETS + ('+Inf',), histograma.contagens):
+                acumulado += contagem
+                rotulos = self._rotulos(route=rota, method=metodo, le=limite)
+                linhas.append(f'{nome}_bucket{rotulos} {acumulado}')
+            rotulos = self._rotulos(route=rota, method=metodo)
+            linhas.append(f'{nome}_sum{rotulos} {histograma.soma}')
+            linhas.append(f'{nome}_count{rotulos} {histograma.total}')
+        return linhas
+
+    def exportar_prometheus(self):
+        """Métricas agregadas de todos os workers no formato texto do Prometheus"""
+        self.gravar()
+        latencia, tempo_db, tamanho, status = self._agregar()
+
+        linhas = self._linhas_histograma(
+            'http_request_duration_seconds', 'Latência das requisições por rota', latencia)
+        linhas += self._linhas_histograma(
+            'http_request_db_seconds', 'Tempo gasto no banco por requisição', tempo_db)
+
+        linhas += ['# HELP http_requests_total Requisições por rota e status',
+                   '# TYPE http_requests_total counter']
+        for (rota, metodo, codigo), total in sorted(status.items()):
+            linhas.append(f'http_requests_total{self._rotulos(route=rota, method=metodo, status=codigo)} {total}')
+
+        linhas += ['# HELP http_response_size_bytes Tamanho das respostas por rota',
+                   '# TYPE http_response_size_bytes summary']
+        for (rota, metodo), (soma, total) in sorted(tamanho.items()):
+            rotulos = self._rotulos(route=rota, method=metodo)
+            linhas.append(f'http_response_size_bytes_sum{rotulos} {soma}')
+            linhas.append(f'http_response_size_bytes_count{rotulos} {total}')
+
+        return '\n'.join(linhas) + '\n'
+
+
+def init_metricas(app):
+    """Registra a coleta de métricas nas requisições do app e retorna o coletor"""
+    coletor = ColetorMetricas(
+        diretorio=os.getenv('METRICS_DIR'),
+        intervalo=float(os.getenv('METRICS_FLUSH_INTERVAL', '1.0'))
+    )
+
+    # Tempo de banco por requisição (g.tempo_db), medido pelos eventos do profiler
+    registrar_eventos_sql()
+
+    @app.before_request
+    def _iniciar_medicao():
+        g.inicio_requisicao = time.perf_counter()
+
+    @app.after_request
+    def _registrar_medicao(response):
+        inicio = g.get('inicio_requisicao')
+        if inicio is not None:
+            rota = request.url_rule.rule if request.url_rule else 'sem_rota'
+            coletor.registrar(rota, request.method, response.status_code,
+                              time.perf_counter() - inicio,
+                              response.content_length or 0,
+                              g.get('tempo_db', 0.0))
+        return response
+
+    app.extensions['metricas'] = coletor
+    return coletor
@@ -0,0 +1,173 @@
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class OrcamentoConsultasExcedido(AssertionError):
+    """Endpoint executou mais consultas SQL do que o orçamento declarado"""
+
+
+class ConfiguracaoProfiler:
+    """Configuração do profiler, lida das variáveis de ambiente em init_profiler()"""
+
+    def __init__(self):
+        self.ativo = False
+        self.amostragem = 1.0
+        self.limiar_lento = 0.1
+        self.limiar_repeticao = 5
+        self.orcamento_estrito = False
+
+
+config = ConfiguracaoProfiler()
+
+
+class PerfilRequisicao:
+    """Consultas executadas durante uma requisição"""
+
+    __slots__ = ('consultas', 'detalhado')
+
+    def __init__(self, detalhado=True):
+        self.consultas = []
+        # Sem detalhes só conta as consultas (usado pelos orçamentos fora da amostragem)
+        self.detalhado = detalhado
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+    def registrar(self, statement, forma, duracao, linhas):
+        self.consultas.append((statement, forma, duracao, linhas) if self.detalhado else None)
+
+    def repetidas(self, limiar):
+        """Consultas com o mesmo texto executadas pelo menos `limiar` vezes (suspeitas de N+1)"""
+        contagem = Counter(_normalizar(c[0]) for c in self.consultas if c is not None)
+        return {sql: n for sql, n in contagem.items() if n >= limiar}
+
+
+def _normalizar(statement):
+    return re.sub(r'\s+', ' ', statement).strip()
+
+
+def _forma_parametros(parameters, executemany):
+    """Descreve os parâmetros sem expor valores: nomes/quantidade e tamanho do lote"""
+    amostra = parameters[0] if executemany and parameters else parameters
+    if isinstance(amostra, dict):
+        forma = f"{{{', '.join(sorted(amostra))}}}"
+    elif isinstance(amostra, (list, tuple)):
+        forma = f'({len(amostra)} parâmetros)'
+    else:
+        forma = '()'
+    return f'{len(parameters)} x {forma}' if executemany else forma
+
+
+def _antes_cursor(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('inicio_profiler', []).append(time.perf_counter())
+
+
+def _depois_cursor(conn, cursor, statement, parameters, context, executemany):
+    duracao = time.perf_counter() - conn.info['inicio_profiler'].pop()
+
+    if config.ativo and duracao >= config.limiar_lento:
+        logger.warning("Consulta lenta (%.1f ms, parâmetros %s): %s",
+                       duracao * 1000, _forma_parametros(parameters, executemany), _normalizar(statement))
+
+    if not g:
+        return
+    # Tempo de banco da requisição, exportado pelas métricas (src.services.metricas)
+    g.tempo_db = g.get('tempo_db', 0.0) + duracao
+    perfil = g.get('perfil_sql')
+    if perfil is not None:
+        linhas = cursor.rowcount if cursor.rowcount >= 0 else None
+        perfil.registrar(statement, _forma_parametros(parameters, executemany), duracao, linhas)
+
+
+def registrar_eventos_sql():
+    """
+    Registra uma única vez o par de eventos que mede cada consulta SQL.
+
+    O mesmo par alimenta o tempo de banco das métricas, o perfil e os orçamentos
+    de consultas; init_metricas e init_profiler chamam esta função.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _antes_cursor):
+        event.listen(Engine, 'before_cursor_execute', _antes_cursor)
+        event.listen(Engine, 'after_cursor_execute', _depois_cursor)
+
+
+def orcamento_consultas(maximo):
+    """
+    Declara o máximo de consultas SQL que o endpoint pode executar.
+
+    Com app.testing (ou SQL_BUDGET_STRICT=1) exceder o orçamento lança
+    OrcamentoConsultasExcedido, fazendo o teste do endpoint falhar; em produção
+    só registra um aviso. Consultas feitas durante o streaming da resposta não contam.
+    """
+    def decorador(view):
+        @wraps(view)
+        def envolvida(*args, **kwargs):
+            if g.get('perfil_sql') is None:
+                g.perfil_sql = PerfilRequisicao(detalhado=False)
+            inicio = g.perfil_sql.total
+
+            resposta = view(*args, **kwargs)
+
+            executadas = g.perfil_sql.total - inicio
+            if executadas > maximo:
+                mensagem = (f"{request.endpoint} executou {executadas} consultas SQL "
+                            f"(orçamento: {maximo})")
+                if current_app.testing or config.orcamento_estrito:
+                    raise OrcamentoConsultasExcedido(mensagem)
+                logger.warning(mensagem)
+            return resposta
+        return envolvida
+    return decorador
+
+
+def init_profiler(app):
+    """
+    Registra o profiler de SQL (opcional, ligado por SQL_PROFILER=1).
+
+    Variáveis de ambiente:
+        SQL_PROFILER_SAMPLE: fração das requisições detalhadas (padrão 1.0)
+        SQL_SLOW_MS: limiar do log de consultas lentas (padrão 100)
+        SQL_REPEAT_THRESHOLD: repetições da mesma consulta para alertar N+1 (padrão 5)
+        SQL_BUDGET_STRICT: se 1, exceder orçamento lança erro também fora dos testes
+    """
+    config.ativo = os.getenv('SQL_PROFILER') == '1'
+    config.amostragem = float(os.getenv('SQL_PROFILER_SAMPLE', '1.0'))
+    config.limiar_lento = float(os.getenv('SQL_SLOW_MS', '100')) / 1000
+    config.limiar_repeticao = int(os.getenv('SQL_REPEAT_THRESHOLD', '5'))
+    config.orcamento_estrito = os.getenv('SQL_BUDGET_STRICT') == '1'
+
+    # Os eventos ficam sempre registrados (custo de duas chamadas por consulta) para
+    # que os orçamentos funcionem mesmo com o profiler desligado
+    registrar_eventos_sql()
+
+    @app.before_request
+    def _iniciar_perfil():
+        if config.ativo and random.random() < config.amostragem:
+            g.perfil_sql = PerfilRequisicao()
+
+    @app.after_request
+    def _relatar_perfil(response):
+        perfil = g.get('perfil_sql')
+        if perfil is None or not perfil.detalhado:
+            return response
+
+        tempo = sum(c[2] for c in perfil.consultas)
+        response.headers['X-SQL-Queries'] = str(perfil.total)
+        logger.info("%s %s: %d consultas SQL em %.1f ms",
+                    request.method, request.path, perfil.total, tempo * 1000)
+        for sql, vezes in perfil.repetidas(config.limiar_repeticao).items():
+            logger.warning("Possível N+1 em %s %s: consulta executada %d vezes: %s",
+                           request.method, request.path, vezes, sql)
+        return response
@@ -0,0 +1,36 @@
+"""
+Serialização rápida das listagens: dicionários montados de tuplas de colunas
+(sem objetos ORM) direto para bytes JSON.
+
+Usa o orjson se estiver instalado; sem ele, o json da biblioteca padrão com as
+mesmas opções (compacto, UTF-8, chaves na ordem das colunas, datas em ISO 8601),
+de modo que o corpo é o mesmo com ou sem o orjson.
+"""
+
+import json
+from datetime import date
+
+from flask import current_app
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele a serialização é mais lenta, mas igual
+    orjson = None
+
+
+def _padrao(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f'Objeto do tipo {type(valor).__name__} não é serializável em JSON')
+
+
+def json_bytes(dados):
+    """Dados (dicionários, listas, datas) em JSON compacto UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(dados)
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':'), default=_padrao).encode('utf-8')
+
+
+def resposta_json(dados, status=200):
+    """Resposta Flask com o corpo de json_bytes (no lugar de jsonify nas listagens)"""
+    return current_app.response_class(json_bytes(dados), status=status, mimetype='application/json')
@@ -0,0 +1,289 @@
+"""
+Sessões do lado do servidor, compartilhadas pelos workers do gunicorn.
+
+O cookie leva só um identificador aleatório (assinado com a SECRET_KEY); os dados
+ficam em um armazém comum a todos os workers (ArmazemSQLite, um arquivo local) e
+em um cache LRU em memória de cada worker. Verificar admin_id em uma requisição
+é uma consulta ao dicionário do cache, sem acesso ao armazém enquanto a entrada
+for recente (SESSION_CACHE_SECONDS).
+
+Logout (session.clear()) apaga a sessão do armazém: o cookie deixa de valer no
+worker que atendeu na hora e nos demais em até SESSION_CACHE_SECONDS.
+"""
+
+import logging
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SecureCookieSessionInterface, SessionInterface
+from itsdangerous import BadSignature, Signer
+from itsdangerous.encoding import want_bytes
+
+from src.config.database import PRAGMAS_SQLITE, executar_pragmas
+
+logger = logging.getLogger(__name__)
+
+serializador = TaggedJSONSerializer()
+
+
+class SessaoServidor(SecureCookieSession):
+    """Sessão cujo conteúdo fica no armazém; sid é None até a primeira gravação"""
+
+    def __init__(self, dados=None, sid=None, expira_em=None):
+        super().__init__(dados)
+        self.sid = sid
+        self.expira_em = expira_em
+
+
+class ArmazemSessoes:
+    """Armazém de sessões compartilhado entre processos (dados já serializados)"""
+
+    def ler(self, sid):
+        """
+        Returns:
+            tuple: (dados, expira_em), ou None se não existir ou tiver expirado
+        """
+        raise NotImplementedError
+
+    def gravar(self, sid, dados, expira_em):
+        raise NotImplementedError
+
+    def remover(self, sid):
+        raise NotImplementedError
+
+    def remover_expiradas(self):
+        """Apaga as sessões expiradas; retorna quantas"""
+        raise NotImplementedError
+
+
+class ArmazemSQLite(ArmazemSessoes):
+    """
+    Sessões em um arquivo SQLite local, em WAL: leituras de um worker não esperam
+    as gravações dos outros. Uma conexão por thread (e por processo, para não
+    herdar conexões através do fork do gunicorn).
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._local = threading.local()
+        with self._conexao() as conexao:
+            conexao.execute(
+                'CREATE TABLE IF NOT EXISTS sessoes ('
+                'sid TEXT PRIMARY KEY, dados TEXT NOT NULL, expira_em REAL NOT NULL)'
+            )
+            conexao.execute('CREATE INDEX IF NOT EXISTS ix_sessoes_expira_em ON sessoes (expira_em)')
+
+    def _conexao(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None or self._local.pid != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            executar_pragmas(conexao, PRAGMAS_SQLITE)
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+    def ler(self, sid):
+        linha = self._conexao().execute(
+            'SELECT dados, expira_em FROM sessoes WHERE sid = ? AND expira_em > ?', (sid, time.time())
+        ).fetchone()
+        return tuple(linha) if linha else None
+
+    def gravar(self, sid, dados, expira_em):
+        self._conexao().execute(
+            'INSERT INTO sessoes (sid, dados, expira_em) VALUES (?, ?, ?) '
+            'ON CONFLICT (sid) DO UPDATE SET dados = excluded.dados, expira_em = excluded.expira_em',
+            (sid, dados, expira_em)
+        )
+
+    def remover(self, sid):
+        self._conexao().execute('DELETE FROM sessoes WHERE sid = ?', (sid,))
+
+    def remover_expiradas(self):
+        return self._conexao().execute('DELETE FROM sessoes WHERE expira_em <= ?', (time.time(),)).rowcount
+
+
+class CacheSessoes:
+    """
+    LRU em memória à frente do armazém.
+
+    Cada entrada guarda (dados, expira_em, lida_em) e é usada sem consultar o
+    armazém por até `validade` segundos depois de lida ou gravada.
+    """
+
+    def __init__(self, capacidade=1024, validade=30.0):
+        self.capacidade = capacidade
+        self.validade = validade
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, sid):
+        agora = time.time()
+        with self._lock:
+            item = self._itens.get(sid)
+            if item is None:
+                return None
+            dados, expira_em, lida_em = item
+            if expira_em <= agora or agora - lida_em > self.validade:
+                del self._itens[sid]
+                return None
+            self._itens.move_to_end(sid)
+            return dados, expira_em
+
+    def guardar(self, sid, dados, expira_em):
+        with self._lock:
+            self._itens[sid] = (dados, expira_em, time.time())
+            self._itens.move_to_end(sid)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def remover(self, sid):
+        with self._lock:
+            self._itens.pop(sid, None)
+
+
+class InterfaceSessoesServidor(SessionInterface):
+    """SessionInterface do Flask sobre um ArmazemSessoes com CacheSessoes na frente"""
+
+    session_class = SessaoServidor
+
+    def __init__(self, armazem, cache, assinar=True, intervalo_limpeza=300.0):
+        self.armazem = armazem
+        self.cache = cache
+        self.assinar = assinar
+        self.intervalo_limpeza = intervalo_limpeza
+        self._ultima_limpeza = time.time()
+        self._assinador = None
+
+    def _signer(self, app):
+        # A derivação da chave custa mais que a própria verificação: uma vez por chave
+        if self._assinador is None or self._assinador.secret_keys[-1] != want_bytes(app.secret_key):
+            self._assinador = Signer(app.secret_key, salt='sessao-servidor')
+        return self._assinador
+
+    def _ler(self, sid):
+        """(dados, expira_em) pelo cache ou, em caso de falta, pelo armazém"""
+        encontrado = self.cache.obter(sid)
+        if encontrado is None:
+            linha = self.armazem.ler(sid)
+            if linha is None:
+                return None
+            dados, expira_em = serializador.loads(linha[0]), linha[1]
+            self.cache.guardar(sid, dados, expira_em)
+            encontrado = dados, expira_em
+        return encontrado
+
+    def open_session(self, app, request):
+        valor = request.cookies.get(self.get_cookie_name(app))
+        if not valor:
+            return self.session_class()
+
+        sid = valor
+        if self.assinar:
+            try:
+                sid = self._signer(app).unsign(valor).decode()
+            except BadSignature:
+                return self.session_class()
+
+        encontrado = self._ler(sid)
+        if encontrado is None:
+            # Sessão expirada ou revogada: começa outra, com outro sid
+            return self.session_class()
+        dados, expira_em = encontrado
+        # Cópia: os dados do cache são compartilhados entre as threads
+        return self.session_class(dict(dados), sid=sid, expira_em=expira_em)
+
+    def _remover_expiradas(self):
+        agora = time.time()
+        if agora - self._ultima_limpeza < self.intervalo_limpeza:
+            return
+        self._ultima_limpeza = agora
+        removidas = self.armazem.remover_expiradas()
+        if removidas:
+            logger.info("%d sessões expiradas removidas", removidas)
+
+    def save_session(self, app, session, response):
+        nome = self.get_cookie_name(app)
+        dominio = self.get_cookie_domain(app)
+        caminho = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified and session.sid is not None:
+                # Logout: revoga a sessão no armazém, não só no navegador
+                self.armazem.remover(session.sid)
+                self.cache.remover(session.sid)
+                response.delete_cookie(nome, domain=dominio, path=caminho)
+                response.vary.add('Cookie')
+            return
+
+        agora = time.time()
+        duracao = app.permanent_session_lifetime.total_seconds()
+        # Renova a expiração quando passar da metade, sem gravar a cada requisição
+        renovar = session.expira_em is not None and session.expira_em - agora < duracao / 2
+        if not (session.modified or renovar or session.sid is None):
+            return
+
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+        session.expira_em = agora + duracao
+        dados = dict(session)
+        self.armazem.gravar(session.sid, serializador.dumps(dados), session.expira_em)
+        self.cache.guardar(session.sid, dados, session.expira_em)
+        self._remover_expiradas()
+
+        valor = self._signer(app).sign(session.sid).decode() if self.assinar else session.sid
+        response.set_cookie(
+            nome, valor,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=dominio,
+            path=caminho,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+            partitioned=self.get_cookie_partitioned(app),
+        )
+        response.vary.add('Cookie')
+
+
+def criar_interface(app):
+    """
+    Interface de sessões conforme SESSION_TYPE: sqlite (padrão, no servidor) ou
+    cookie (cookie assinado padrão do Flask, sem revogação).
+
+    Variáveis de ambiente:
+        SESSION_SQLITE_PATH: arquivo do armazém (padrão no diretório temporário,
+            comum a todos os workers da máquina)
+        SESSION_CACHE_SIZE: sessões no LRU de cada worker (padrão 1024)
+        SESSION_CACHE_SECONDS: tempo em que uma entrada do LRU é usada sem
+            consultar o armazém (padrão 30)
+        SESSION_SWEEP_SECONDS: intervalo da remoção das sessões expiradas (padrão 300)
+    """
+    tipo = app.config.get('SESSION_TYPE', 'sqlite')
+    if tipo == 'cookie':
+        return SecureCookieSessionInterface()
+    if tipo != 'sqlite':
+        raise ValueError(f'SESSION_TYPE inválido: {tipo} (use sqlite ou cookie)')
+
+    caminho = os.getenv('SESSION_SQLITE_PATH',
+                        os.path.join(tempfile.gettempdir(), 'equivalencias_sessoes.db'))
+    return InterfaceSessoesServidor(
+        ArmazemSQLite(caminho),
+        CacheSessoes(capacidade=int(os.getenv('SESSION_CACHE_SIZE', '1024')),
+                     validade=float(os.getenv('SESSION_CACHE_SECONDS', '30'))),
+        assinar=app.config.get('SESSION_USE_SIGNER', True),
+        intervalo_limpeza=float(os.getenv('SESSION_SWEEP_SECONDS', '300')),
+    )
+
+
+def init_sessoes(app):
+    """Troca a interface de sessões do app pela escolhida em SESSION_TYPE"""
+    app.session_interface = criar_interface(app)
+    return app.session_interface
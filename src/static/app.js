@@ -1,5 +1,9 @@
 // Global variables
 let allEquivalencias = [];
+// Versão do catálogo já carregada (token de /api/equivalencias/changes)
+let syncToken = null;
+// Stream de eventos do catálogo (aberto enquanto o admin está logado)
+let eventSource = null;
 let currentEditId = null;
 let sortDirection = {};
 
@@ -95,11 +99,52 @@ function showAdminSection(username) {
     document.getElementById('adminSection').classList.remove('hidden');
     document.getElementById('adminUsername').textContent = username;
     loadAdminTable();
+    openEventStream();
 }
 
 function hideAdminSection() {
     document.getElementById('adminSection').classList.add('hidden');
     clearForm();
+    closeEventStream();
+}
+
+// Alterações feitas por outros admins chegam por Server-Sent Events
+function openEventStream() {
+    if (eventSource || !window.EventSource) {
+        return;
+    }
+    // Na primeira conexão retoma da versão já carregada; nas reconexões o navegador envia Last-Event-ID
+    const query = syncToken === null ? '' : `?last_event_id=${syncToken}`;
+    eventSource = new EventSource(`/api/equivalencias/stream${query}`);
+    
+    eventSource.addEventListener('change', function(event) {
+        const data = JSON.parse(event.data);
+        applyChanges(data.items, data.deleted);
+        if (syncToken === null || Number(data.token) > Number(syncToken)) {
+            syncToken = data.token;
+        }
+    });
+    // Alterações que não vieram no stream (importação em massa, eventos perdidos)
+    eventSource.addEventListener('resync', syncEquivalencias);
+    // Erro HTTP (ex.: 503 sem vaga de stream) encerra o EventSource sem reconexão automática
+    eventSource.onerror = function() {
+        if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+            closeEventStream();
+            setTimeout(function() {
+                if (!document.getElementById('adminSection').classList.contains('hidden')) {
+                    syncEquivalencias();
+                    openEventStream();
+                }
+            }, 30000);
+        }
+    };
+}
+
+function closeEventStream() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
 }
 
 // Data loading functions
@@ -112,6 +157,7 @@ async function loadEquivalencias() {
         
         if (response.ok) {
             allEquivalencias = data;
+            syncToken = response.headers.get('X-Catalog-Version');
             displayEquivalencias(data);
         } else {
             showAlert('Erro ao carregar equivalências', 'error');
@@ -124,6 +170,45 @@ async function loadEquivalencias() {
     }
 }
 
+// Sincronização incremental: só as equivalências alteradas desde o último carregamento
+async function syncEquivalencias() {
+    try {
+        const response = syncToken === null ? null :
+            await fetch(`/api/equivalencias/changes?since=${syncToken}`, { credentials: 'same-origin' });
+        
+        if (!response || !response.ok) {
+            // Sem token, token inválido (410) ou backend sem feed: recarrega tudo
+            await loadEquivalencias();
+            loadAdminTable();
+            return;
+        }
+        
+        const data = await response.json();
+        applyChanges(data.items, data.deleted);
+        syncToken = data.token;
+    } catch (error) {
+        console.error('Erro ao sincronizar equivalências:', error);
+    }
+}
+
+function applyChanges(items, deleted) {
+    const removed = new Set(deleted);
+    const changed = new Map(items.map(equiv => [equiv.id, equiv]));
+    
+    allEquivalencias = allEquivalencias
+        .filter(equiv => !removed.has(equiv.id))
+        .map(equiv => {
+            const updated = changed.get(equiv.id);
+            changed.delete(equiv.id);
+            return updated || equiv;
+        });
+    allEquivalencias.push(...changed.values());
+    
+    // Reaplica a busca digitada, se houver
+    filterTable();
+    displayAdminTable(allEquivalencias);
+}
+
 function displayEquivalencias(equivalencias) {
     const tbody = document.getElementById('equivalenciasTable');
     const noResults = document.getElementById('noResults');
@@ -162,7 +247,9 @@ function displayEquivalencias(equivalencias) {
 
 async function loadAdminTable() {
     try {
-        const response = await fetch('/api/equivalencias', { credentials: 'same-origin' });
+        // Só as colunas da tabela; o registro completo é buscado ao editar
+        const params = new URLSearchParams({ fields: 'id,disciplina_adm,disciplina_equiv,curso_equiv' });
+        const response = await fetch(`/api/equivalencias?${params}`, { credentials: 'same-origin' });
         const data = await response.json();
         
         if (response.ok) {
@@ -239,8 +326,7 @@ async function handleFormSubmit(e) {
         if (response.ok) {
             showAlert(currentEditId ? 'Equivalência atualizada com sucesso!' : 'Equivalência criada com sucesso!', 'success');
             clearForm();
-            loadEquivalencias();
-            loadAdminTable();
+            syncEquivalencias();
         } else {
             showAlert(data.error || 'Erro ao salvar equivalência', 'error');
         }
@@ -262,8 +348,12 @@ function cancelEdit() {
 
 async function editEquivalencia(id) {
     try {
-        const equiv = allEquivalencias.find(e => e.id === id);
-        if (!equiv) return;
+        const response = await fetch(`/api/equivalencias/${id}`, { credentials: 'same-origin' });
+        const equiv = await response.json();
+        if (!response.ok) {
+            showAlert(equiv.error || 'Erro ao carregar equivalência', 'error');
+            return;
+        }
         
         document.getElementById('disciplina_adm').value = equiv.disciplina_adm;
         document.getElementById('codigo_adm').value = equiv.codigo_adm;
@@ -299,8 +389,7 @@ async function deleteEquivalencia(id) {
         
         if (response.ok) {
             showAlert('Equivalência excluída com sucesso!', 'success');
-            loadEquivalencias();
-            loadAdminTable();
+            syncEquivalencias();
         } else {
             showAlert(data.error || 'Erro ao excluir equivalência', 'error');
         }
@@ -311,24 +400,48 @@ async function deleteEquivalencia(id) {
 }
 
 // Search and filter functions
+let searchTimeout = null;
+let searchController = null;
+
 function filterTable() {
-    const searchTerm = document.getElementById('searchInput').value.toLowerCase();
+    const searchTerm = document.getElementById('searchInput').value.trim();
+    
+    clearTimeout(searchTimeout);
+    if (searchController) {
+        searchController.abort();
+        searchController = null;
+    }
     
     if (!searchTerm) {
         displayEquivalencias(allEquivalencias);
         return;
     }
     
-    const filtered = allEquivalencias.filter(equiv => 
-        equiv.disciplina_adm.toLowerCase().includes(searchTerm) ||
-        equiv.codigo_adm.toLowerCase().includes(searchTerm) ||
-        equiv.disciplina_equiv.toLowerCase().includes(searchTerm) ||
-        equiv.codigo_equiv.toLowerCase().includes(searchTerm) ||
-        equiv.curso_equiv.toLowerCase().includes(searchTerm) ||
-        equiv.justificativa.toLowerCase().includes(searchTerm)
-    );
+    // Aguarda o usuário parar de digitar antes de consultar o servidor
+    searchTimeout = setTimeout(() => searchEquivalencias(searchTerm), 250);
+}
+
+async function searchEquivalencias(searchTerm) {
+    searchController = new AbortController();
     
-    displayEquivalencias(filtered);
+    try {
+        const params = new URLSearchParams({ q: searchTerm, limit: 500 });
+        const response = await fetch(`/api/equivalencias/search?${params}`, {
+            credentials: 'same-origin',
+            signal: searchController.signal
+        });
+        const data = await response.json();
+        
+        if (response.ok) {
+            displayEquivalencias(data.items);
+        } else {
+            showAlert(data.error || 'Erro na busca', 'error');
+        }
+    } catch (error) {
+        if (error.name !== 'AbortError') {
+            console.error('Erro na busca:', error);
+        }
+    }
 }
 
 // Sort table function
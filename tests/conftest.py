@@ -0,0 +1,107 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Banco, sessões e métricas dos testes em um diretório temporário; definido antes de
+# qualquer import de src, que lê as variáveis de ambiente ao ser importado
+DIRETORIO_TESTES = tempfile.mkdtemp(prefix='equivalencias_testes_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DIRETORIO_TESTES, 'equivalencias.db')
+os.environ['SESSION_SQLITE_PATH'] = os.path.join(DIRETORIO_TESTES, 'sessoes.db')
+os.environ['METRICS_DIR'] = os.path.join(DIRETORIO_TESTES, 'metricas')
+os.environ['STORAGE_BACKEND'] = 'sqlalchemy'
+os.environ.pop('DATABASE_READ_URL', None)
+
+from tests.stub_postgrest import EstadoPostgrest, iniciar_stub  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DIRETORIO_TESTES, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def _servidor_postgrest():
+    servidor = iniciar_stub()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+@pytest.fixture
+def stub_postgrest(_servidor_postgrest):
+    """Stub da API REST do Supabase com as tabelas vazias a cada teste"""
+    _servidor_postgrest.estado = EstadoPostgrest()
+    return _servidor_postgrest
+
+
+@pytest.fixture(scope='session')
+def _app():
+    from src.bootstrap import inicializar_banco
+    from src.main import app
+
+    # Orçamentos de consultas (@orcamento_consultas) estourados viram erro
+    app.config['TESTING'] = True
+    inicializar_banco(app, testar_supabase=False)
+    return app
+
+
+@pytest.fixture
+def app(_app):
+    """
+    App com o catálogo vazio na versão 0, sem índices em memória nem respostas em
+    cache de testes anteriores.
+
+    Chamadas diretas ao repositório precisam de `with app.app_context():`; não
+    deixamos um contexto aberto porque o cliente de teste o reaproveitaria (e o g)
+    em todas as requisições.
+    """
+    from sqlalchemy import delete, update
+
+    from src.models.equivalencia import CatalogoVersao, Equivalencia, EquivalenciaRemovida, db
+    from src.routes.equivalencia import cache_estatisticas
+    from src.services.cache import cache_listagem
+    from src.services.indices import invalidar_indices
+
+    with _app.app_context():
+        db.session.execute(delete(Equivalencia))
+        db.session.execute(delete(EquivalenciaRemovida))
+        db.session.execute(update(CatalogoVersao).values(versao=0))
+        db.session.commit()
+    invalidar_indices()
+    cache_listagem.limpar()
+    cache_estatisticas.limpar()
+    return _app
+
+
+@pytest.fixture
+def consultas():
+    """Lista das consultas SQL executadas durante o teste (em qualquer engine)"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    executadas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        executadas.append(statement)
+
+    event.listen(Engine, 'after_cursor_execute', registrar)
+    yield executadas
+    event.remove(Engine, 'after_cursor_execute', registrar)
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(app):
+    """Cliente com a sessão do administrador padrão"""
+    cliente = app.test_client()
+    resposta = cliente.post('/api/login', json={'username': 'admin', 'password': 'adm4125'})
+    assert resposta.status_code == 200, resposta.get_json()
+    return cliente
@@ -0,0 +1,19 @@
+"""Dados de exemplo compartilhados pelos testes"""
+
+
+def equivalencia(i, **valores):
+    """Equivalência válida e única por i (chave natural ADM{i}/EQ{i}/curso)"""
+    linha = {
+        'disciplina_adm': f'Disciplina ADM {i}', 'codigo_adm': f'ADM{i:03d}', 'ch_adm': '60h',
+        'disciplina_equiv': f'Disciplina Equiv {i}', 'codigo_equiv': f'EQ{i:03d}',
+        'curso_equiv': 'Economia', 'ch_equiv': '60h', 'justificativa': 'Conteúdo equivalente',
+    }
+    linha.update(valores)
+    return linha
+
+
+def criar(admin, i, **valores):
+    """Cria pela API (cliente com sessão do admin) e retorna o id"""
+    resposta = admin.post('/api/equivalencias', json=equivalencia(i, **valores))
+    assert resposta.status_code == 201, resposta.get_json()
+    return resposta.get_json()['id']
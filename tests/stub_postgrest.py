@@ -0,0 +1,197 @@
+"""
+Servidor HTTP local que imita o subconjunto da API REST (PostgREST) do Supabase
+usado por RepositorioSupabase: filtros eq/gt/gte/lte, and(or(ilike)), select,
+cabeçalho Range, Prefer (return=representation, resolution=merge-duplicates)
+e o 409 com código 23505 na violação da chave natural.
+
+Também imita o gatilho de supabase-config.md: cada requisição de escrita é uma
+transação que incrementa a versão do catálogo uma vez, grava a versão nas linhas
+e deixa lápides nas exclusões.
+"""
+
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+from src.models.equivalencia import CHAVE_NATURAL
+
+PREFIXO = '/rest/v1/'
+
+
+class EstadoPostgrest:
+    """Tabelas em memória e o registro das requisições recebidas"""
+
+    def __init__(self):
+        self.linhas = {}
+        self.removidas = {}
+        self.versao = 0
+        self.proximo_id = 1
+        self.requisicoes = []
+        # (método, tabela) -> (status, corpo bruto) devolvido no lugar da resposta
+        self.falhas = {}
+        self.lock = threading.Lock()
+
+    def transacao(self):
+        """Versão do catálogo da escrita atual (uma por requisição, como o gatilho)"""
+        self.versao += 1
+        return self.versao
+
+
+def _comparar(linha, campo, condicao):
+    operador, _, valor = condicao.partition('.')
+    atual = linha.get(campo)
+    if operador == 'eq':
+        return str(atual) == valor
+    if atual is None:
+        return False
+    if operador == 'gt':
+        return float(atual) > float(valor)
+    if operador == 'gte':
+        return float(atual) >= float(valor)
+    if operador == 'lte':
+        return float(atual) <= float(valor)
+    raise ValueError(f'Operador não suportado pelo stub: {condicao}')
+
+
+def _ilike(linha, expressao):
+    """and=(or(campo.ilike.*termo*,...),...): cada grupo or precisa de um campo que contenha o termo"""
+    for grupo in re.findall(r'or\(([^)]*)\)', expressao):
+        condicoes = (c.split('.', 2) for c in grupo.split(','))
+        if not any(padrao.strip('*').lower() in str(linha.get(campo) or '').lower()
+                   for campo, _, padrao in condicoes):
+            return False
+    return True
+
+
+class ManipuladorPostgrest(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def estado(self):
+        return self.server.estado
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, corpo=None, bruto=None):
+        dados = bruto if bruto is not None else (json.dumps(corpo).encode() if corpo is not None else b'')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _entrada(self):
+        url = urlparse(self.path)
+        tabela = url.path[len(PREFIXO):]
+        params = parse_qsl(url.query)
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        corpo = json.loads(self.rfile.read(tamanho)) if tamanho else None
+        self.estado.requisicoes.append((self.command, tabela, params))
+        return tabela, params, corpo
+
+    def _selecionar(self, tabela, params):
+        linhas = sorted((self.estado.removidas if tabela == 'equivalencias_removidas'
+                         else self.estado.linhas).values(), key=lambda linha: linha['id'])
+        for campo, condicao in params:
+            if campo in ('select', 'order', 'on_conflict'):
+                continue
+            if campo == 'and':
+                linhas = [linha for linha in linhas if _ilike(linha, condicao)]
+            else:
+                linhas = [linha for linha in linhas if _comparar(linha, campo, condicao)]
+        return linhas
+
+    @staticmethod
+    def _projetar(linhas, params):
+        colunas = dict(params).get('select')
+        if not colunas:
+            return [dict(linha) for linha in linhas]
+        return [{coluna: linha.get(coluna) for coluna in colunas.split(',')} for linha in linhas]
+
+    def _representar(self, status, linhas, params):
+        if 'return=representation' in (self.headers.get('Prefer') or ''):
+            return self._responder(status, self._projetar(linhas, params))
+        self._responder(status)
+
+    def _tratar(self, metodo):
+        tabela, params, corpo = self._entrada()
+        falha = self.estado.falhas.get((self.command, tabela))
+        if falha:
+            status, bruto = falha
+            return self._responder(status, bruto=bruto.encode())
+        with self.estado.lock:
+            metodo(tabela, params, corpo)
+
+    def do_GET(self):
+        self._tratar(self._get)
+
+    def do_POST(self):
+        self._tratar(self._post)
+
+    def do_PATCH(self):
+        self._tratar(self._patch)
+
+    def do_DELETE(self):
+        self._tratar(self._delete)
+
+    def _get(self, tabela, params, corpo):
+        if tabela == 'catalogo_versao':
+            return self._responder(200, [{'versao': self.estado.versao}] if self.estado.versao else [])
+        linhas = self._selecionar(tabela, params)
+        intervalo = self.headers.get('Range')
+        if intervalo:
+            inicio, fim = map(int, intervalo.split('-'))
+            linhas = linhas[inicio:fim + 1]
+        self._responder(200, self._projetar(linhas, params))
+
+    def _post(self, tabela, params, corpo):
+        if tabela.startswith('rpc/'):
+            return self._responder(404, {'message': f'Função {tabela} não existe no stub'})
+        mesclar = 'merge-duplicates' in (self.headers.get('Prefer') or '')
+        itens = corpo if isinstance(corpo, list) else [corpo]
+        chaves = {tuple(linha[c] for c in CHAVE_NATURAL): linha for linha in self.estado.linhas.values()}
+        existentes = [chaves.get(tuple(item[c] for c in CHAVE_NATURAL)) for item in itens]
+        if not mesclar and any(existentes):
+            # A transação inteira é desfeita, como no Postgres
+            return self._responder(409, {
+                'code': '23505', 'message': 'duplicate key value violates unique constraint'
+            })
+        versao = self.estado.transacao()
+        gravadas = []
+        for item, existente in zip(itens, existentes):
+            if existente is None:
+                existente = {'id': self.estado.proximo_id, 'data_criacao': '2026-01-01T00:00:00'}
+                self.estado.proximo_id += 1
+                self.estado.linhas[existente['id']] = existente
+                self.estado.removidas.pop(existente['id'], None)
+            existente.update(item, versao=versao)
+            gravadas.append(existente)
+        self._representar(201, gravadas, params)
+
+    def _patch(self, tabela, params, corpo):
+        linhas = self._selecionar(tabela, params)
+        if linhas:
+            versao = self.estado.transacao()
+            for linha in linhas:
+                linha.update(corpo, versao=versao)
+        self._representar(200, linhas, params)
+
+    def _delete(self, tabela, params, corpo):
+        linhas = self._selecionar(tabela, params)
+        if linhas:
+            versao = self.estado.transacao()
+            for linha in linhas:
+                del self.estado.linhas[linha['id']]
+                self.estado.removidas[linha['id']] = {'id': linha['id'], 'versao': versao}
+        self._representar(200, linhas, params)
+
+
+def iniciar_stub():
+    """Sobe o stub em uma porta livre; retorna o servidor (estado em servidor.estado)"""
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), ManipuladorPostgrest)
+    servidor.estado = EstadoPostgrest()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
@@ -0,0 +1,68 @@
+"""ETag/304 e cache por versão do catálogo na listagem e nas estatísticas"""
+
+import gzip
+import json
+
+import pytest
+
+from tests.fabricas import criar
+
+ROTAS = ['/api/equivalencias', '/api/equivalencias/stats']
+
+
+@pytest.fixture
+def catalogo(admin):
+    for i in range(1, 21):
+        criar(admin, i)
+    return admin
+
+
+@pytest.mark.parametrize('url', ROTAS)
+def test_etag_e_304(catalogo, cliente, url):
+    primeira = cliente.get(url)
+    assert primeira.status_code == 200
+    etag = primeira.headers['ETag']
+    assert primeira.headers['Cache-Control'] == 'no-cache'
+    assert primeira.headers['X-Catalog-Version'] == '20'
+
+    revalidada = cliente.get(url, headers={'If-None-Match': etag})
+    assert revalidada.status_code == 304
+    assert revalidada.data == b''
+    assert revalidada.headers['ETag'] == etag
+
+
+@pytest.mark.parametrize('url', ROTAS)
+def test_escrita_troca_etag_e_conteudo(catalogo, cliente, url):
+    antes = cliente.get(url)
+    criar(catalogo, 21)
+
+    depois = cliente.get(url, headers={'If-None-Match': antes.headers['ETag']})
+    assert depois.status_code == 200
+    assert depois.headers['ETag'] != antes.headers['ETag']
+    assert depois.headers['X-Catalog-Version'] == '21'
+    assert depois.data != antes.data
+
+
+def test_etag_depende_da_consulta(catalogo, cliente):
+    todas = cliente.get('/api/equivalencias')
+    projetada = cliente.get('/api/equivalencias?fields=id')
+    assert todas.headers['ETag'] != projetada.headers['ETag']
+    assert projetada.get_json()[0] == {'id': 1}
+    assert cliente.get('/api/equivalencias', headers={'If-None-Match': projetada.headers['ETag']}).status_code == 200
+
+
+def test_mesma_versao_responde_do_cache(catalogo, cliente, consultas):
+    primeira = cliente.get('/api/equivalencias?limit=5')
+    executadas = len(consultas)
+    segunda = cliente.get('/api/equivalencias?limit=5')
+    # Só a leitura da versão do catálogo; a página vem do cache
+    assert len(consultas) - executadas == 1
+    assert segunda.data == primeira.data
+
+
+def test_cache_guarda_a_versao_comprimida(catalogo, cliente):
+    resposta = cliente.get('/api/equivalencias', headers={'Accept-Encoding': 'gzip'})
+    assert resposta.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in resposta.headers['Vary']
+    assert len(json.loads(gzip.decompress(resposta.data))) == 20
+    assert cliente.get('/api/equivalencias', headers={'Accept-Encoding': 'gzip'}).data == resposta.data
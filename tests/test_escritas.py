@@ -0,0 +1,49 @@
+"""Criação e atualização de equivalências: validação e erros de integridade"""
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.repositories import ChaveDuplicada, repositorio
+from tests.fabricas import criar, equivalencia
+
+
+def test_atualizar_com_campo_nulo_ou_vazio_responde_400(admin):
+    id = criar(admin, 1)
+    for valor in (None, '', '   '):
+        resposta = admin.put(f'/api/equivalencias/{id}', json={'disciplina_adm': valor})
+        assert resposta.status_code == 400
+        assert resposta.get_json() == {'error': 'Campo disciplina_adm é obrigatório'}
+    assert admin.get(f'/api/equivalencias/{id}').get_json()['disciplina_adm'] == 'Disciplina ADM 1'
+
+
+def test_atualizar_sem_objeto_responde_400(admin):
+    id = criar(admin, 1)
+    assert admin.put(f'/api/equivalencias/{id}', json=['disciplina_adm']).status_code == 400
+    assert admin.put(f'/api/equivalencias/{id}', data='x', content_type='text/plain').status_code == 400
+
+
+def test_atualizar_remove_espacos_e_recalcula_horas(admin):
+    id = criar(admin, 1)
+    resposta = admin.put(f'/api/equivalencias/{id}', json={'ch_equiv': ' 90h ', 'ignorado': 1})
+    assert resposta.status_code == 200
+    assert admin.get(f'/api/equivalencias/{id}').get_json()['ch_equiv'] == '90h'
+    assert admin.get('/api/equivalencias?min_ch=90').get_json()[0]['id'] == id
+
+
+def test_atualizar_para_chave_existente_responde_409(admin):
+    criar(admin, 1)
+    id = criar(admin, 2)
+    resposta = admin.put(f'/api/equivalencias/{id}', json={'codigo_adm': 'ADM001', 'codigo_equiv': 'EQ001'})
+    assert resposta.status_code == 409
+
+
+def test_so_violacao_de_unicidade_vira_chave_duplicada(app):
+    with app.app_context():
+        registro, _ = repositorio.criar(equivalencia(1))
+        with pytest.raises(ChaveDuplicada):
+            repositorio.criar(equivalencia(1))
+        with pytest.raises(IntegrityError) as erro:
+            repositorio.atualizar(registro['id'], {'disciplina_adm': None})
+        assert not isinstance(erro.value, ChaveDuplicada)
+    with app.app_context():
+        assert repositorio.obter(registro['id'])['disciplina_adm'] == 'Disciplina ADM 1'
@@ -0,0 +1,47 @@
+"""Escolha do broker de eventos de /api/equivalencias/stream"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.eventos import BrokerLocal, BrokerPostgres, criar_broker
+
+POSTGRES = 'postgresql+psycopg2://usuario:senha@db:5432/equivalencias'
+SQLITE = 'sqlite:///equivalencias.db'
+
+
+def app_com_banco(url):
+    return SimpleNamespace(config={'SQLALCHEMY_DATABASE_URI': url})
+
+
+@pytest.fixture(autouse=True)
+def sem_configuracao(monkeypatch):
+    monkeypatch.delenv('EVENTS_BROKER', raising=False)
+    monkeypatch.delenv('EVENTS_DATABASE_URL', raising=False)
+
+
+def test_auto_usa_postgres_quando_o_banco_e_postgres():
+    broker = criar_broker(app_com_banco(POSTGRES))
+    assert type(broker) is BrokerPostgres
+    # Conexão do LISTEN pelo driver padrão, com a senha
+    assert broker.url == 'postgresql://usuario:senha@db:5432/equivalencias'
+
+
+def test_auto_usa_local_com_sqlite():
+    assert type(criar_broker(app_com_banco(SQLITE))) is BrokerLocal
+
+
+def test_auto_segue_o_banco_dos_eventos(monkeypatch):
+    monkeypatch.setenv('EVENTS_DATABASE_URL', POSTGRES)
+    assert type(criar_broker(app_com_banco(SQLITE))) is BrokerPostgres
+
+
+def test_local_explicito_e_postgres_sem_postgres(monkeypatch):
+    monkeypatch.setenv('EVENTS_BROKER', 'local')
+    assert type(criar_broker(app_com_banco(POSTGRES))) is BrokerLocal
+    monkeypatch.setenv('EVENTS_BROKER', 'postgres')
+    with pytest.raises(ValueError):
+        criar_broker(app_com_banco(SQLITE))
+    monkeypatch.setenv('EVENTS_BROKER', 'redis')
+    with pytest.raises(ValueError):
+        criar_broker(app_com_banco(POSTGRES))
@@ -0,0 +1,50 @@
+"""GET /api/equivalencias/changes: sincronização incremental pelo token da versão"""
+
+from tests.fabricas import criar
+
+
+def alteracoes(cliente, desde, campos='id,ch_equiv'):
+    resposta = cliente.get(f'/api/equivalencias/changes?since={desde}&fields={campos}')
+    assert resposta.status_code == 200, resposta.get_json()
+    return resposta.get_json()
+
+
+def test_alteracoes_desde_o_token_da_listagem(admin, cliente):
+    ids = [criar(admin, i) for i in range(1, 4)]
+    token = cliente.get('/api/equivalencias').headers['X-Catalog-Version']
+    assert token == '3'
+
+    admin.put(f'/api/equivalencias/{ids[0]}', json={'ch_equiv': '90h'})
+    admin.delete(f'/api/equivalencias/{ids[1]}')
+    novo = criar(admin, 4)
+
+    dados = alteracoes(cliente, token)
+    assert dados['items'] == [{'id': ids[0], 'ch_equiv': '90h'}, {'id': novo, 'ch_equiv': '60h'}]
+    assert dados['deleted'] == [ids[1]]
+    assert dados['token'] == '6'
+
+    # Com o token devolvido não há nada pendente
+    assert alteracoes(cliente, dados['token']) == {'items': [], 'deleted': [], 'token': '6'}
+
+
+def test_alteracoes_desde_zero_traz_tudo_e_as_exclusoes(admin, cliente):
+    ids = [criar(admin, i) for i in range(1, 4)]
+    admin.delete(f'/api/equivalencias/{ids[2]}')
+    dados = alteracoes(cliente, 0, 'id')
+    assert dados == {'items': [{'id': ids[0]}, {'id': ids[1]}], 'deleted': [ids[2]], 'token': '4'}
+
+
+def test_criar_de_novo_depois_de_excluir_volta_como_gravada(admin, cliente):
+    id = criar(admin, 1)
+    admin.delete(f'/api/equivalencias/{id}')
+    token = alteracoes(cliente, 0)['token']
+    novo = criar(admin, 1)
+    dados = alteracoes(cliente, token, 'id')
+    assert dados['items'] == [{'id': novo}]
+
+
+def test_token_invalido(cliente):
+    assert cliente.get('/api/equivalencias/changes?since=abc').status_code == 400
+    assert cliente.get('/api/equivalencias/changes?since=-1').status_code == 400
+    # Token à frente do catálogo (banco recriado): o cliente recarrega a listagem
+    assert cliente.get('/api/equivalencias/changes?since=99').status_code == 410
@@ -0,0 +1,119 @@
+"""Importação em massa (POST /bulk) e gravação pela chave natural (PUT /by-key)"""
+
+import csv
+import io
+
+from tests.fabricas import criar, equivalencia
+
+CHAVE_DUPLICADA = 'Já cadastrada (codigo_adm, codigo_equiv, curso_equiv)'
+
+
+def como_csv(linhas, codificacao='utf-8'):
+    saida = io.StringIO()
+    escritor = csv.DictWriter(saida, fieldnames=list(linhas[0]))
+    escritor.writeheader()
+    escritor.writerows(linhas)
+    return saida.getvalue().encode(codificacao)
+
+
+def listar(cliente):
+    return cliente.get('/api/equivalencias?fields=codigo_adm,ch_equiv').get_json()
+
+
+def test_bulk_json_em_lotes_com_linha_invalida(admin, cliente):
+    linhas = [equivalencia(i) for i in range(1, 6)]
+    linhas[2]['disciplina_adm'] = '  '
+    resposta = admin.post('/api/equivalencias/bulk?chunk_size=2', json=linhas)
+
+    assert resposta.status_code == 200
+    assert resposta.get_json() == {
+        'inseridas': 4,
+        'rejeitadas': [{'indice': 2, 'erro': 'Campo disciplina_adm é obrigatório'}],
+        'lotes': 2,
+    }
+    assert [linha['codigo_adm'] for linha in listar(cliente)] == ['ADM001', 'ADM002', 'ADM004', 'ADM005']
+
+
+def test_bulk_csv_por_arquivo_e_pelo_corpo(admin, cliente):
+    arquivo = como_csv([equivalencia(1), equivalencia(2)])
+    resposta = admin.post('/api/equivalencias/bulk', data={'arquivo': (io.BytesIO(arquivo), 'catalogo.csv')},
+                          content_type='multipart/form-data')
+    assert resposta.get_json()['inseridas'] == 2
+
+    resposta = admin.post('/api/equivalencias/bulk', data=como_csv([equivalencia(3)]), content_type='text/csv')
+    assert resposta.get_json()['inseridas'] == 1
+    assert len(listar(cliente)) == 3
+
+
+def test_bulk_csv_fora_de_utf8(admin):
+    arquivo = como_csv([equivalencia(1, disciplina_adm='Economia Política')], 'latin-1')
+    resposta = admin.post('/api/equivalencias/bulk', data={'arquivo': (io.BytesIO(arquivo), 'catalogo.csv')},
+                          content_type='multipart/form-data')
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == 'O arquivo CSV deve estar em UTF-8'
+
+
+def test_bulk_rejeita_so_a_linha_ja_cadastrada(admin, cliente):
+    criar(admin, 2)
+    resposta = admin.post('/api/equivalencias/bulk', json=[equivalencia(i) for i in range(1, 4)])
+    assert resposta.get_json() == {
+        'inseridas': 2,
+        'rejeitadas': [{'indice': 1, 'erro': CHAVE_DUPLICADA}],
+        'lotes': 1,
+    }
+    assert len(listar(cliente)) == 3
+
+
+def test_bulk_upsert_atualiza_e_fica_com_a_ultima_repetida(admin, cliente):
+    criar(admin, 1)
+    linhas = [equivalencia(1, ch_equiv='90h'), equivalencia(2), equivalencia(2, ch_equiv='75h')]
+    resposta = admin.post('/api/equivalencias/bulk?upsert=1', json=linhas)
+    assert resposta.get_json() == {
+        'gravadas': 2,
+        'rejeitadas': [{'indice': 1, 'erro': 'Substituída pela linha 2 (mesma chave natural)'}],
+        'lotes': 1,
+    }
+    assert [(linha['codigo_adm'], linha['ch_equiv']) for linha in listar(cliente)] == [
+        ('ADM001', '90h'), ('ADM002', '75h'),
+    ]
+
+
+def test_by_key_cria_e_depois_atualiza_o_mesmo_id(admin, cliente):
+    criada = admin.put('/api/equivalencias/by-key', json=equivalencia(1))
+    assert criada.status_code == 200
+    id = criada.get_json()['id']
+
+    atualizada = admin.put('/api/equivalencias/by-key', json=equivalencia(1, ch_equiv=' 90h '))
+    assert atualizada.get_json()['id'] == id
+    assert cliente.get(f'/api/equivalencias/{id}').get_json()['ch_equiv'] == '90h'
+    assert len(listar(cliente)) == 1
+
+
+def test_by_key_objeto_invalido(admin):
+    resposta = admin.put('/api/equivalencias/by-key', json=equivalencia(1, curso_equiv=None))
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == 'Campo curso_equiv é obrigatório'
+
+
+def test_by_key_lista_retorna_o_relatorio(admin, cliente):
+    criar(admin, 1)
+    resposta = admin.put('/api/equivalencias/by-key', json=[equivalencia(1, ch_equiv='90h'), equivalencia(2)])
+    assert resposta.get_json() == {'gravadas': 2, 'rejeitadas': [], 'lotes': 1}
+    assert len(listar(cliente)) == 2
+
+
+def test_escritas_em_massa_exigem_login(cliente):
+    assert cliente.post('/api/equivalencias/bulk', json=[equivalencia(1)]).status_code == 401
+    assert cliente.put('/api/equivalencias/by-key', json=equivalencia(1)).status_code == 401
+
+
+def test_importacao_chega_aos_indices_pelo_feed(admin, cliente):
+    criar(admin, 1)
+    assert cliente.get('/api/equivalencias/stats').get_json()['total'] == 1
+
+    # /bulk e /by-key só publicam um resync: os índices alcançam a versão pelo feed
+    admin.post('/api/equivalencias/bulk', json=[equivalencia(i) for i in range(2, 5)])
+    admin.put('/api/equivalencias/by-key', json=equivalencia(1, codigo_equiv='EQ002'))
+    assert cliente.get('/api/equivalencias/stats').get_json()['total'] == 5
+    componente = cliente.get('/api/equivalencias/graph/ADM001').get_json()['componente']
+    assert [vertice['codigo'] for vertice in componente] == ['ADM001', 'EQ001', 'EQ002', 'ADM002']
@@ -0,0 +1,97 @@
+"""Índices em memória (estatísticas, grafo) acompanhando escritas de outros workers"""
+
+from sqlalchemy import delete, update
+
+from src.models.equivalencia import CatalogoVersao, Equivalencia, db
+from src.repositories import repositorio
+from src.services.indices import invalidar_indices
+from tests.fabricas import criar, equivalencia
+
+
+def semear_legado(app, quantidade):
+    """Linhas anteriores ao feed de alterações: versão 0, com o catálogo ainda na versão 0"""
+    with app.app_context():
+        linhas = [Equivalencia(**equivalencia(i)) for i in range(1, quantidade + 1)]
+        db.session.add_all(linhas)
+        db.session.commit()
+        return [linha.id for linha in linhas]
+
+
+def test_feed_desde_zero_traz_as_exclusoes(app):
+    ids = semear_legado(app, 3)
+    with app.app_context():
+        versao = repositorio.remover(ids[1])
+        registros, removidos, atual = repositorio.alteracoes(0)
+    assert atual == versao
+    assert sorted(r['id'] for r in registros) == [ids[0], ids[2]]
+    assert removidos == [ids[1]]
+
+
+def test_indice_na_versao_zero_remove_linha_excluida_por_outro_worker(app, cliente):
+    ids = semear_legado(app, 3)
+    assert cliente.get('/api/equivalencias/stats').get_json()['total'] == 3
+    assert cliente.get('/api/equivalencias/graph/ADM002').status_code == 200
+
+    # Outro worker: grava no banco sem passar pelos índices deste processo
+    with app.app_context():
+        repositorio.remover(ids[1])
+
+    assert cliente.get('/api/equivalencias/stats').get_json()['total'] == 2
+    assert cliente.get('/api/equivalencias/graph/ADM002').status_code == 404
+    assert cliente.get('/api/equivalencias/graph/ADM001').status_code == 200
+
+
+def conferir(cliente, *codigos):
+    resposta = cliente.post('/api/match', json=[{'codigo': c, 'carga_horaria': '60h'} for c in codigos])
+    return [disciplina['codigo'] for disciplina in resposta.get_json()['nao_encontradas']]
+
+
+def test_indices_quentes_sincronizam_pelo_feed_sem_reconstruir(app, admin, cliente, monkeypatch):
+    ids = [criar(admin, i) for i in range(1, 4)]
+    assert cliente.get('/api/equivalencias/stats').get_json()['total'] == 3
+    assert cliente.get('/api/equivalencias/graph/ADM001').status_code == 200
+    assert conferir(cliente, 'EQ003') == []
+
+    # Outro worker cria, altera e exclui sem passar pelos índices deste processo
+    with app.app_context():
+        repositorio.criar(equivalencia(4))
+        repositorio.atualizar(ids[0], {'codigo_equiv': 'EQ002'})
+        repositorio.remover(ids[2])
+
+    # Índices já montados só leem o feed; uma releitura da tabela seria um erro
+    def sem_reconstruir(*args, **kwargs):
+        raise AssertionError('índice reconstruído em vez de sincronizado')
+    monkeypatch.setattr(repositorio, 'linhas', sem_reconstruir)
+
+    assert cliente.get('/api/equivalencias/stats').get_json()['total'] == 3
+    componente = cliente.get('/api/equivalencias/graph/ADM001').get_json()['componente']
+    assert [vertice['codigo'] for vertice in componente] == ['ADM001', 'EQ002', 'ADM002']
+    assert conferir(cliente, 'EQ003', 'EQ004') == ['EQ003']
+
+
+def test_escrita_da_rota_chega_aos_indices_sem_consultar_o_feed(admin, cliente, consultas):
+    criar(admin, 1)
+    assert cliente.get('/api/equivalencias/graph/ADM001').status_code == 200
+    criar(admin, 2)
+
+    executadas = len(consultas)
+    assert cliente.get('/api/equivalencias/graph/ADM002').status_code == 200
+    # Só a leitura da versão: a escrita já foi aplicada em processo por propagar_alteracao
+    assert len(consultas) - executadas == 1
+
+
+def test_invalidar_indices_reconstroi(app, admin, cliente):
+    criar(admin, 1)
+    assert cliente.get('/api/equivalencias/graph/ADM001').status_code == 200
+
+    # Banco recriado com a versão para trás: o índice ignora a versão menor até ser invalidado
+    with app.app_context():
+        db.session.execute(delete(Equivalencia))
+        db.session.execute(update(CatalogoVersao).values(versao=0))
+        db.session.commit()
+        repositorio.criar(equivalencia(2))
+    assert cliente.get('/api/equivalencias/graph/ADM002').status_code == 404
+
+    invalidar_indices()
+    assert cliente.get('/api/equivalencias/graph/ADM002').status_code == 200
+    assert cliente.get('/api/equivalencias/graph/ADM001').status_code == 404
@@ -0,0 +1,73 @@
+"""
+Orçamentos de consultas SQL (@orcamento_consultas) das rotas de leitura.
+
+Com app.testing um orçamento estourado lança OrcamentoConsultasExcedido e o teste
+falha. Cada rota é exercitada com os índices e caches frios (primeira leitura),
+quentes (mesma versão) e atrasados (escrita de outro worker desde a última leitura).
+"""
+
+import pytest
+from sqlalchemy import text
+
+from src.models.equivalencia import db
+from src.repositories import repositorio
+from src.services.profiler import OrcamentoConsultasExcedido, orcamento_consultas
+from tests.fabricas import equivalencia
+
+LEITURAS = [
+    ('get', '/api/equivalencias', None),
+    ('get', '/api/equivalencias?curso_equiv=Economia&min_ch=30&fields=id,codigo_adm', None),
+    ('get', '/api/equivalencias/search?q=disciplina', None),
+    ('get', '/api/equivalencias/1', None),
+    ('get', '/api/equivalencias/stats', None),
+    ('get', '/api/equivalencias/graph/ADM001', None),
+    ('get', '/api/equivalencias/graph/ADM001?destino=EQ002', None),
+    ('post', '/api/match', [{'codigo': 'EQ001', 'carga_horaria': '60h'}, {'codigo': 'XYZ'}]),
+    ('get', '/api/equivalencias/changes?since=0', None),
+    ('get', '/api/equivalencias/changes?since=1', None),
+]
+
+
+@pytest.fixture
+def catalogo(app, admin):
+    linhas = [equivalencia(i) for i in range(1, 21)]
+    # Uma cadeia no grafo: ADM001 -> EQ001 <- ADM002 -> EQ002
+    linhas.append(equivalencia(21, codigo_adm='ADM002', codigo_equiv='EQ001'))
+    resposta = admin.post('/api/equivalencias/bulk', json=linhas)
+    assert resposta.get_json()['rejeitadas'] == []
+    return app
+
+
+def ler(cliente, metodo, url, corpo):
+    resposta = getattr(cliente, metodo)(url, json=corpo)
+    assert resposta.status_code == 200, (url, resposta.get_json())
+    return resposta
+
+
+@pytest.mark.parametrize('metodo,url,corpo', LEITURAS, ids=[url for _, url, _ in LEITURAS])
+def test_leitura_frio_quente_e_atrasado_dentro_do_orcamento(catalogo, cliente, metodo, url, corpo):
+    ler(cliente, metodo, url, corpo)   # índices e caches frios
+    ler(cliente, metodo, url, corpo)   # quentes, mesma versão
+
+    # Outro worker grava: os índices deste processo ficam para trás e sincronizam pelo feed
+    with catalogo.app_context():
+        repositorio.criar(equivalencia(30))
+        repositorio.remover(5)
+    ler(cliente, metodo, url, corpo)
+
+
+def test_leitura_do_admin_dentro_do_orcamento(catalogo, admin):
+    # Sessão do admin: leituras pelo primário, sem o cache público
+    for metodo, url, corpo in LEITURAS:
+        ler(admin, metodo, url, corpo)
+
+
+def test_orcamento_estourado_falha_em_testes(app):
+    @orcamento_consultas(1)
+    def duas_consultas():
+        db.session.execute(text('SELECT 1'))
+        db.session.execute(text('SELECT 2'))
+
+    with app.test_request_context('/'):
+        with pytest.raises(OrcamentoConsultasExcedido):
+            duas_consultas()
@@ -0,0 +1,195 @@
+"""RepositorioSupabase contra o stub local da API REST (tests/stub_postgrest.py)"""
+
+import pytest
+
+from src.repositories import supabase
+from src.repositories.base import COLUNAS_REGISTRO, ChaveDuplicada, com_horas
+from src.repositories.supabase import ErroSupabase, RepositorioSupabase
+from tests.fabricas import equivalencia
+
+
+@pytest.fixture
+def repositorio(stub_postgrest):
+    host, porta = stub_postgrest.server_address
+    return RepositorioSupabase(f'http://{host}:{porta}', 'chave-de-teste', timeout=2)
+
+
+@pytest.fixture
+def estado(stub_postgrest):
+    return stub_postgrest.estado
+
+
+def chamadas_rpc(estado):
+    return [r for r in estado.requisicoes if r[1].startswith('rpc/')]
+
+
+# Leituras
+
+def test_listar_filtra_e_pagina_por_id(repositorio, monkeypatch):
+    repositorio.gravar_lote([equivalencia(i, curso_equiv='Economia' if i % 2 else 'Direito')
+                             for i in range(7)])
+    monkeypatch.setattr(supabase, 'LINHAS_POR_PAGINA', 2)
+
+    todas = repositorio.listar({})
+    assert [linha['id'] for linha in todas] == list(range(1, 8))
+
+    economia = repositorio.listar({'curso_equiv': 'Economia'})
+    assert {linha['curso_equiv'] for linha in economia} == {'Economia'}
+    assert len(economia) == 3
+
+    pagina = repositorio.listar({}, limit=2, cursor=3, campos=['id', 'codigo_adm'])
+    assert pagina == [{'id': 4, 'codigo_adm': 'ADM003'}, {'id': 5, 'codigo_adm': 'ADM004'}]
+
+
+def test_listar_filtra_por_carga_horaria_minima(repositorio):
+    # Os lotes chegam da importação já com as horas extraídas
+    repositorio.gravar_lote([com_horas(equivalencia(1, ch_equiv='30h')),
+                             com_horas(equivalencia(2, ch_equiv='90h'))])
+    assert [linha['codigo_adm'] for linha in repositorio.listar({'min_ch': 60})] == ['ADM002']
+
+
+def test_buscar_exige_todos_os_termos(repositorio):
+    repositorio.gravar_lote([
+        equivalencia(1, disciplina_adm='Cálculo Diferencial'),
+        equivalencia(2, disciplina_adm='Cálculo Integral'),
+        equivalencia(3, disciplina_equiv='Integral de Linha'),
+    ])
+    encontrados = repositorio.buscar('integral', {}, limit=10, offset=0)
+    assert [linha['id'] for linha in encontrados] == [2, 3]
+    assert [linha['id'] for linha in repositorio.buscar('cálculo integral', {}, 10, 0)] == [2]
+    assert [linha['id'] for linha in repositorio.buscar('integral', {}, limit=1, offset=1)] == [3]
+    assert repositorio.buscar('!!', {}, 10, 0) == []
+
+
+def test_obter_e_versao(repositorio):
+    assert repositorio.versao() == 0
+    assert repositorio.obter(1) is None
+    registro, versao = repositorio.criar(equivalencia(1))
+    assert repositorio.versao() == versao == 1
+    assert repositorio.obter(registro['id'])['codigo_adm'] == 'ADM001'
+
+
+# Escritas: a versão vem do gatilho, na mesma requisição da escrita
+
+def test_criar_retorna_registro_completo_e_versao(repositorio, estado):
+    registro, versao = repositorio.criar(equivalencia(1))
+    assert versao == 1
+    assert set(registro) == set(COLUNAS_REGISTRO)
+    assert registro['ch_adm_horas'] == 60
+    assert estado.linhas[registro['id']]['versao'] == 1
+    assert chamadas_rpc(estado) == []
+
+
+def test_criar_com_chave_repetida_lanca_chave_duplicada(repositorio, estado):
+    repositorio.criar(equivalencia(1))
+    with pytest.raises(ChaveDuplicada):
+        repositorio.criar(equivalencia(1, disciplina_adm='Outra'))
+    assert estado.versao == 1
+
+
+def test_atualizar(repositorio, estado):
+    registro, _ = repositorio.criar(equivalencia(1))
+    atualizado, versao = repositorio.atualizar(registro['id'], {'ch_equiv': '90h'})
+    assert versao == 2
+    assert atualizado['ch_equiv_horas'] == 90
+    assert 'versao' not in atualizado
+    assert estado.linhas[registro['id']]['versao'] == 2
+    assert repositorio.atualizar(999, {'ch_equiv': '90h'}) == (None, None)
+    # Sem campos não há escrita nem nova versão
+    assert repositorio.atualizar(registro['id'], {})[1] == 2
+    assert chamadas_rpc(estado) == []
+
+
+def test_remover_le_versao_da_lapide(repositorio, estado):
+    registro, _ = repositorio.criar(equivalencia(1))
+    repositorio.criar(equivalencia(2))
+    assert repositorio.remover(registro['id']) == 3
+    assert estado.removidas[registro['id']]['versao'] == 3
+    assert repositorio.obter(registro['id']) is None
+    assert repositorio.remover(registro['id']) is None
+    assert chamadas_rpc(estado) == []
+
+
+def test_gravar_lote_e_upsert_usam_uma_versao_por_escrita(repositorio, estado):
+    assert repositorio.gravar_lote([equivalencia(i) for i in range(3)]) == 1
+    assert {linha['versao'] for linha in estado.linhas.values()} == {1}
+
+    versao = repositorio.gravar_lote([equivalencia(0, ch_equiv='90h'), equivalencia(3)], upsert=True)
+    assert versao == 2
+    assert len(estado.linhas) == 4
+    assert estado.linhas[1]['ch_equiv'] == '90h'
+    assert estado.linhas[1]['versao'] == 2
+
+    id, versao = repositorio.upsert(equivalencia(1, justificativa='Revisada'))
+    assert (id, versao) == (2, 3)
+    assert estado.linhas[2]['justificativa'] == 'Revisada'
+    assert chamadas_rpc(estado) == []
+
+
+def test_gravar_lote_com_chave_repetida_nao_grava_nada(repositorio, estado):
+    repositorio.criar(equivalencia(1))
+    with pytest.raises(ChaveDuplicada):
+        repositorio.gravar_lote([equivalencia(2), equivalencia(1)])
+    assert len(estado.linhas) == 1
+    assert estado.versao == 1
+
+
+# Erros
+
+def test_erro_http_vira_erro_supabase(repositorio, estado):
+    estado.falhas[('GET', 'equivalencias')] = (500, '{"message": "falha interna"}')
+    with pytest.raises(ErroSupabase, match='500: falha interna'):
+        repositorio.listar({})
+
+
+def test_erro_sem_json_usa_texto_da_resposta(repositorio, estado):
+    estado.falhas[('POST', 'equivalencias')] = (502, 'Bad Gateway')
+    with pytest.raises(ErroSupabase, match='502: Bad Gateway'):
+        repositorio.criar(equivalencia(1))
+
+
+def test_conflito_sem_codigo_de_unicidade_nao_e_chave_duplicada(repositorio, estado):
+    estado.falhas[('PATCH', 'equivalencias')] = (409, '{"code": "23503", "message": "violação de chave estrangeira"}')
+    with pytest.raises(ErroSupabase, match='409'):
+        repositorio.atualizar(1, {'ch_equiv': '90h'})
+
+
+def test_filtro_sem_suporte_lanca_value_error(repositorio, estado):
+    with pytest.raises(ValueError):
+        repositorio.listar({'ch_ratio_min': 1.0})
+    assert estado.requisicoes == []
+
+
+# Feed de alterações
+
+def test_feed_de_alteracoes_pela_versao_das_linhas_e_lapides(repositorio, estado, monkeypatch):
+    monkeypatch.setattr(supabase, 'LINHAS_POR_PAGINA', 2)
+    repositorio.gravar_lote([equivalencia(i) for i in range(1, 6)])      # versão 1, ids 1-5
+    repositorio.atualizar(2, {'ch_equiv': '90h'})                        # versão 2
+    repositorio.remover(4)                                               # versão 3
+    repositorio.criar(equivalencia(6))                                   # versão 4
+
+    registros, removidos, versao = repositorio.alteracoes(1, ['id', 'ch_equiv'])
+    assert versao == 4
+    assert registros == [{'id': 2, 'ch_equiv': '90h'}, {'id': 6, 'ch_equiv': '60h'}]
+    assert removidos == [4]
+
+    registros, removidos, versao = repositorio.alteracoes(4)
+    assert (registros, removidos, versao) == ([], [], 4)
+
+
+def test_feed_desde_zero_traz_tudo_e_as_exclusoes(repositorio):
+    repositorio.gravar_lote([equivalencia(i) for i in range(1, 4)])
+    repositorio.remover(2)
+    registros, removidos, versao = repositorio.alteracoes(0, ['id'])
+    assert (registros, removidos, versao) == ([{'id': 1}, {'id': 3}], [2], 2)
+
+
+def test_feed_nao_passa_da_versao_informada(repositorio, estado):
+    repositorio.criar(equivalencia(1))
+    repositorio.criar(equivalencia(2))
+    repositorio.remover(1)
+    # Versão já lida por quem chama: o que veio depois fica para a próxima chamada
+    registros, removidos, versao = repositorio.alteracoes(0, ['id'], versao=1)
+    assert (registros, removidos, versao) == ([], [], 1)
+    assert not [r for r in estado.requisicoes if r[1] == 'catalogo_versao']
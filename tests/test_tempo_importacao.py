@@ -0,0 +1,18 @@
+"""Importar src.main (o que cada worker faz ao subir) precisa caber no orçamento de tempo"""
+
+import os
+
+from src.bootstrap import LIMITE_IMPORTACAO_PADRAO, medir_importacao
+
+# Medições repetidas antes de reprovar: a primeira paga o cache frio do disco
+TENTATIVAS = 3
+
+
+def test_importar_app_cabe_no_orcamento():
+    limite = float(os.getenv('IMPORT_BUDGET_SECONDS', LIMITE_IMPORTACAO_PADRAO))
+    duracoes = []
+    for _ in range(TENTATIVAS):
+        duracoes.append(medir_importacao())
+        if duracoes[-1] <= limite:
+            break
+    assert min(duracoes) <= limite, f'src.main levou {min(duracoes):.3f}s para importar (limite {limite:.3f}s)'